@@ -1,31 +1,41 @@
-from fastapi import FastAPI, HTTPException
-from pydantic import BaseModel
-import sqlite3
+import asyncio
+import io
+import tempfile
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, HTTPException, Request
 from sqlite3 import Error
-import json
 from dotenv import load_dotenv
 import os
-import requests
+from categorizer import CATEGORIES, CATEGORIZER_VERSION, request_categories
+from category_cache import CategoryCache
+from classifier import train_from_database
+from db import ConnectionPool, create_schema, database_path
+from ingest import FORMATS, ingest, insert_change_requests
+from llm_client import get_client
+from models import ChangeRequest
+from queries import change_request_stats, list_change_requests, parse_ids
+from stats_cache import StatsCache
+from worker import CategorizationWorker, PENDING_CATEGORY
 
 load_dotenv()
-app = FastAPI()
-TOGETHER_API_KEY = os.getenv("TOGETHER_API_KEY")
-
-class ChangeRequest(BaseModel):
-    project_name: str
-    change_number: str
-    requested_by: str
-    date_of_request: str
-    presented_to: str
-    change_name: str
-    description: str
-    reason: str
-    cost_items: list
+pool = ConnectionPool(database_path())
+
+@asynccontextmanager
+async def lifespan(app):
+    training = asyncio.create_task(train_local_classifier())
+    await categorization_worker.start()
+    yield
+    training.cancel()
+    await categorization_worker.stop()
+    get_client().close()
+    pool.close_all()
+
+app = FastAPI(lifespan=lifespan)
 
 def create_connection():
-    """Create a connection to the SQLite database."""
+    """Get this thread's pooled connection to the SQLite database."""
     try:
-        return sqlite3.connect('../database/change_requests.db')
+        return pool.get()
     except Error as e:
         print(f"Database connection error: {e}")
         return None
@@ -35,89 +45,211 @@ def create_table():
     conn = create_connection()
     if conn:
         try:
-            c = conn.cursor()
-            c.execute('''CREATE TABLE IF NOT EXISTS change_requests
-                         (id INTEGER PRIMARY KEY AUTOINCREMENT,
-                          project_name TEXT,
-                          change_number TEXT,
-                          requested_by TEXT,
-                          date_of_request DATE,
-                          presented_to TEXT,
-                          change_name TEXT,
-                          description TEXT,
-                          reason TEXT,
-                          cost_items TEXT,
-                          category TEXT,
-                          timestamp DATETIME DEFAULT CURRENT_TIMESTAMP)''')
-            conn.commit()
+            create_schema(conn)
         except Error as e:
             print(f"Table creation error: {e}")
-        finally:
-            conn.close()
 
 create_table()
 
-def categorize_description(description: str) -> str:
-    """Categorize the description using Together AI API."""
-    categories = ["hardware issue", "software issue", "personnel issue", "other"]
-    prompt = (
-        f"Classify the following description the best that you can. Here are some example categories: "
-        f"hardware issue, software issue, personnel issue, other. "
-        f"You are not limited to the list. "
-        f"Description: {description} Category:"
-    )
-    
+category_cache = CategoryCache(
+    pool,
+    CATEGORIZER_VERSION,
+    max_entries=int(os.getenv("CATEGORY_CACHE_MAX_ENTRIES", "100000")),
+    ttl=float(os.getenv("CATEGORY_CACHE_TTL", str(30 * 24 * 3600))),
+)
+
+stats_cache = StatsCache(ttl=float(os.getenv("STATS_CACHE_TTL", "60")))
+
+def data_changed():
+    """Called after every write to change_requests so cached aggregates are recomputed."""
+    stats_cache.invalidate()
+
+# Trained in the background after startup; until then every row goes to the LLM.
+local_classifier = None
+local_classifier_threshold = float(os.getenv("LOCAL_CLASSIFIER_THRESHOLD", "0.6"))
+
+async def train_local_classifier():
+    global local_classifier
+    if os.getenv("LOCAL_CLASSIFIER", "1") != "1":
+        return
+    limit = int(os.getenv("LOCAL_CLASSIFIER_MAX_TRAINING_ROWS", "50000"))
     try:
-        response = requests.post(
-            "https://api.together.xyz/v1/completions",
-            headers={
-                "Authorization": f"Bearer {TOGETHER_API_KEY}",
-                "Content-Type": "application/json"
-            },
-            json={
-                "model": "meta-llama/Llama-3.3-70B-Instruct-Turbo-Free",
-                "prompt": prompt,
-                "max_tokens": 10,
-                "temperature": 0.0,
-                "stop": ["\n"]
-            }
-        )
-        response.raise_for_status()
-        result = response.json()
-        generated_text = result.get("choices", [{}])[0].get("text", "").strip().lower()
-        
-        for category in categories:
-            if category in generated_text:
-                print(f"Description: '{description}'")
-                print(f"Predicted Category: '{category}'")
-                return category
-        print(f"Description: '{description}'")
-        print(f"Predicted Category: 'other' (no match found)")
-        return "other"
-    except requests.RequestException as e:
-        print(f"API error: {e}")
-        print(f"Description: '{description}'")
-        print(f"Predicted Category: 'other' (API error)")
-        return "other"
+        local_classifier = await asyncio.to_thread(train_from_database, pool, CATEGORIES, limit)
+    except Exception as e:
+        print(f"Could not train the local classifier, categorizing with the LLM only: {e!r}")
+
+def categorize(descriptions):
+    """Categorize with the cache, the local classifier once trained, then the LLM."""
+    return request_categories(descriptions, cache=category_cache, classifier=local_classifier,
+                              threshold=local_classifier_threshold, with_sources=True)
+
+categorization_worker = CategorizationWorker(
+    pool,
+    categorize,
+    concurrency=int(os.getenv("CATEGORIZATION_CONCURRENCY", "4")),
+    batch_size=int(os.getenv("CATEGORIZATION_BATCH_SIZE", "20")),
+    max_retries=int(os.getenv("CATEGORIZATION_MAX_RETRIES", "3")),
+    on_change=data_changed,
+)
 
 @app.post("/change_requests")
 def create_change_request(change_request: ChangeRequest):
-    """Create a new change request with automated categorization."""
-    category = categorize_description(change_request.description)
-    cost_items_json = json.dumps(change_request.cost_items)
+    """Create a new change request; its category is filled in by the background worker."""
+    category = PENDING_CATEGORY
 
     conn = create_connection()
     if not conn:
         raise HTTPException(status_code=500, detail="Database connection error")
     try:
-        c = conn.cursor()
-        c.execute(
-            "INSERT INTO change_requests (project_name, change_number, requested_by, date_of_request, presented_to, change_name, description, reason, cost_items, category) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
-            (change_request.project_name, change_request.change_number, change_request.requested_by, change_request.date_of_request, change_request.presented_to, change_request.change_name, change_request.description, change_request.reason, cost_items_json, category)
-        )
+        change_request_id = insert_change_requests(conn, [change_request], category)[0]
         conn.commit()
-        return {"message": "Change request created", "id": c.lastrowid, "category": category}
+        data_changed()
+        categorization_worker.submit(change_request_id, change_request.description)
+        return {"message": "Change request created", "id": change_request_id, "category": category}
     except Error as e:
+        conn.rollback()
         raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
+
+@app.post("/change_requests/bulk")
+async def bulk_create_change_requests(request: Request, format: str = None, categorize: bool = True):
+    """Create many change requests from a streamed JSON Lines or CSV body.
+
+    Rows are validated against ChangeRequest and inserted in chunked transactions.
+    Invalid rows are reported by line number without aborting the batch. New rows
+    start out pending and are categorized together in one batch pass afterwards.
+    """
+    fmt = format or ("csv" if "csv" in request.headers.get("content-type", "") else "jsonl")
+    if fmt not in FORMATS:
+        raise HTTPException(status_code=400, detail=f"Unsupported format {fmt!r}, expected one of {list(FORMATS)}")
+    body = tempfile.SpooledTemporaryFile(max_size=8 * 1024 * 1024)
+    try:
+        async for chunk in request.stream():
+            body.write(chunk)
+        body.seek(0)
+        text = io.TextIOWrapper(body, encoding="utf-8", newline="")
+        summary = await asyncio.to_thread(ingest, pool, text, fmt, category=PENDING_CATEGORY)
     finally:
-        conn.close()
\ No newline at end of file
+        body.close()
+    if summary["inserted"]:
+        data_changed()
+    if categorize and summary["inserted"]:
+        summary["queued_for_categorization"] = await categorization_worker.enqueue_pending()
+    return summary
+
+@app.get("/change_requests")
+def get_change_requests(
+    project_name: str = None,
+    requested_by: str = None,
+    category: str = None,
+    date_from: str = None,
+    date_to: str = None,
+    since_id: int = None,
+    ids: str = None,
+    fields: str = None,
+    order: str = "id",
+    cursor: str = None,
+    limit: int = 50,
+):
+    """List change requests one page at a time.
+
+    Filter on project_name, requested_by, category and a date_of_request range,
+    pick columns with a comma-separated fields list, and pass next_cursor back as
+    cursor to fetch the following page. since_id returns only rows added after
+    that id, and ids (comma-separated, up to one page) only those rows, for
+    clients that refresh incrementally.
+    """
+    conn = create_connection()
+    if not conn:
+        raise HTTPException(status_code=500, detail="Database connection error")
+    try:
+        items, next_cursor = list_change_requests(
+            conn, fields=fields, order=order, cursor=cursor, limit=limit,
+            project_name=project_name, requested_by=requested_by, category=category,
+            date_from=date_from, date_to=date_to, since_id=since_id,
+            ids=parse_ids(ids) if ids is not None else None,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"items": items, "next_cursor": next_cursor}
+
+@app.get("/change_requests/stats")
+def get_change_request_stats(
+    project_name: str = None,
+    requested_by: str = None,
+    category: str = None,
+    date_from: str = None,
+    date_to: str = None,
+    top: int = 10,
+):
+    """Return dashboard aggregates computed in SQL and cached until the next write."""
+    filters = {"project_name": project_name, "requested_by": requested_by, "category": category,
+               "date_from": date_from, "date_to": date_to}
+    conn = create_connection()
+    if not conn:
+        raise HTTPException(status_code=500, detail="Database connection error")
+    key = (top, *filters.values())
+    return stats_cache.get_or_compute(key, lambda: change_request_stats(conn, top=max(1, min(top, 100)), **filters))
+
+COST_TOTAL_GROUPS = {
+    "change_request": ("cr.id", "cr.id AS id, cr.change_number AS change_number, cr.project_name AS project_name"),
+    "project": ("cr.project_name", "cr.project_name AS project_name, COUNT(DISTINCT cr.id) AS change_requests"),
+}
+
+@app.get("/change_requests/cost_totals")
+def get_cost_totals(group_by: str = "change_request", project_name: str = None):
+    """Sum cost item hours and dollars per change request or per project in SQL."""
+    if group_by not in COST_TOTAL_GROUPS:
+        raise HTTPException(status_code=400, detail=f"group_by must be one of {list(COST_TOTAL_GROUPS)}")
+    group_column, select_columns = COST_TOTAL_GROUPS[group_by]
+    conn = create_connection()
+    if not conn:
+        raise HTTPException(status_code=500, detail="Database connection error")
+    where, params = ("WHERE cr.project_name = ? COLLATE NOCASE", (project_name,)) if project_name else ("", ())
+    rows = conn.execute(
+        f"""SELECT {select_columns},
+                   COALESCE(SUM(ci.hours_increase), 0) AS hours_increase,
+                   COALESCE(SUM(ci.hours_reduction), 0) AS hours_reduction,
+                   COALESCE(SUM(ci.dollars_increase), 0) AS dollars_increase,
+                   COALESCE(SUM(ci.dollars_reduction), 0) AS dollars_reduction,
+                   COALESCE(SUM(ci.dollars_increase - ci.dollars_reduction), 0) AS total_cost_increase
+            FROM change_requests cr LEFT JOIN cost_items ci ON ci.change_request_id = cr.id
+            {where}
+            GROUP BY {group_column}
+            ORDER BY {group_column}""",
+        params
+    )
+    columns = [column[0] for column in rows.description]
+    return [dict(zip(columns, row)) for row in rows.fetchall()]
+
+@app.get("/change_requests/{change_request_id}/category")
+def get_category(change_request_id: int):
+    """Report the category of a change request and whether categorization has finished."""
+    conn = create_connection()
+    if not conn:
+        raise HTTPException(status_code=500, detail="Database connection error")
+    row = conn.execute("SELECT category FROM change_requests WHERE id = ?", (change_request_id,)).fetchone()
+    if row is None:
+        raise HTTPException(status_code=404, detail="Change request not found")
+    category = row[0]
+    status = "pending" if category == PENDING_CATEGORY else "done"
+    return {"id": change_request_id, "category": category, "status": status}
+
+@app.get("/categorization/cache")
+def get_category_cache_stats():
+    """Report size and hit/miss counters of the categorization cache."""
+    return category_cache.stats()
+
+@app.get("/llm/stats")
+def get_llm_stats():
+    """Report call counts, retries, token usage and latency percentiles of the shared LLM client."""
+    return get_client().stats()
+
+@app.get("/health")
+def health():
+    """Report database connectivity for load balancers and monitoring."""
+    status = pool.health()
+    if status["status"] != "ok":
+        raise HTTPException(status_code=503, detail=status)
+    status["categorization_queue"] = categorization_worker.queue_size()
+    status["local_classifier"] = "ready" if local_classifier is not None else "not trained"
+    return status
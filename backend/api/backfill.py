@@ -0,0 +1,66 @@
+"""Re-categorize change requests in bulk using batched LLM calls.
+
+    python backfill.py                 # rows that are pending or have no category
+    python backfill.py --all           # every row
+"""
+import argparse
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from categorizer import CATEGORIZER_VERSION, request_categories
+from category_cache import CategoryCache
+from db import ConnectionPool, database_path
+from worker import PENDING_CATEGORY
+
+def select_rows(conn, recategorize_all):
+    if recategorize_all:
+        return conn.execute("SELECT id, description FROM change_requests ORDER BY id").fetchall()
+    return conn.execute(
+        "SELECT id, description FROM change_requests WHERE category IS NULL OR category = '' OR category = ? ORDER BY id",
+        (PENDING_CATEGORY,)
+    ).fetchall()
+
+def backfill(pool, recategorize_all=False, batch_size=25, workers=4, categorize=request_categories):
+    """Categorize the selected rows in batches of batch_size across workers threads."""
+    with pool.connection() as conn:
+        rows = select_rows(conn, recategorize_all)
+    batches = [rows[i:i + batch_size] for i in range(0, len(rows), batch_size)]
+    print(f"Backfilling {len(rows)} change requests in {len(batches)} batches")
+
+    def run(batch):
+        categories = categorize([description or "" for _, description in batch])
+        with pool.connection() as conn:
+            conn.executemany(
+                "UPDATE change_requests SET category = ?, category_source = 'llm' WHERE id = ?",
+                [(category, row_id) for category, (row_id, _) in zip(categories, batch)]
+            )
+        return len(batch)
+
+    start_time = time.time()
+    done = 0
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        for count in executor.map(run, batches):
+            done += count
+            print(f"{done}/{len(rows)} categorized")
+    print(f"Backfill finished in {time.time() - start_time:.2f}s")
+    return done
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Re-categorize change requests with batched LLM calls.")
+    parser.add_argument("--all", action="store_true", help="re-categorize every row, not just missing ones")
+    parser.add_argument("--batch-size", type=int, default=25)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--db", default=None, help="database path (defaults to CHANGE_REQUESTS_DB)")
+    parser.add_argument("--no-cache", action="store_true", help="ignore and do not fill the category cache")
+    args = parser.parse_args()
+    pool = ConnectionPool(args.db or database_path())
+    try:
+        categorize = request_categories
+        if not args.no_cache:
+            cache = CategoryCache(pool, CATEGORIZER_VERSION)
+            categorize = partial(request_categories, cache=cache)
+        backfill(pool, args.all, args.batch_size, args.workers, categorize)
+        if not args.no_cache:
+            print(f"Category cache: {cache.stats()}")
+    finally:
+        pool.close_all()
@@ -0,0 +1,139 @@
+"""Benchmark the FastAPI submit, categorize and query paths against a generated database.
+
+The LLM is replaced by stub_llm.py and the database by a temporary copy filled
+by fake_data.py, so results only reflect this service:
+
+    python benchmark_api.py --rows 10000 --posts 500 --json
+"""
+import argparse
+import contextlib
+import json
+import os
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "database"))
+from db import PRAGMAS
+from fake_data import iter_chunks, write_database
+from stub_llm import serve_in_thread
+
+def summarize(name, samples, **params):
+    """One machine-readable result: latency percentiles in milliseconds and throughput."""
+    ordered = sorted(samples)
+    return {
+        "name": name,
+        **params,
+        "iterations": len(samples),
+        "mean_ms": statistics.mean(samples) * 1000,
+        "p50_ms": ordered[len(ordered) // 2] * 1000,
+        "p95_ms": ordered[int(0.95 * (len(ordered) - 1))] * 1000,
+        "ops_per_sec": len(samples) / sum(samples) if sum(samples) else None,
+    }
+
+def timed(function, iterations):
+    samples = []
+    for _ in range(iterations):
+        start_time = time.perf_counter()
+        function()
+        samples.append(time.perf_counter() - start_time)
+    return samples
+
+def sample_change_request(number):
+    return {
+        "project_name": "Benchmark",
+        "change_number": f"BENCH-{number}",
+        "requested_by": "Load Tester",
+        "date_of_request": "2025-01-01",
+        "presented_to": "Review Board",
+        "change_name": "Benchmark request",
+        "description": f"The build server needs to be replaced before release {number}.",
+        "reason": "Benchmark",
+        "cost_items": [{"item_description": "server", "hours_increase": 4, "dollars_increase": 1200.0}],
+    }
+
+def benchmark(rows=10000, posts=500, iterations=200, seed=0):
+    workdir = tempfile.mkdtemp(prefix="crs-bench-")
+    path = os.path.join(workdir, "change_requests.db")
+    write_database(iter_chunks(rows, seed), path)
+    server, url = serve_in_thread()
+    os.environ.update(CHANGE_REQUESTS_DB=path, TOGETHER_API_URL=url, TOGETHER_API_KEY="benchmark",
+                      LOCAL_CLASSIFIER="0")
+    from fastapi.testclient import TestClient
+    import api
+
+    results = []
+    with TestClient(api.app) as client:
+        numbers = iter(range(posts))
+        start_time = time.perf_counter()
+        samples = timed(lambda: client.post("/change_requests", json=sample_change_request(next(numbers))), posts)
+        post_seconds = time.perf_counter() - start_time
+        results.append(summarize("fastapi_post_change_request", samples, rows=rows))
+
+        deadline = time.perf_counter() + 120
+        while True:
+            with api.pool.connection() as conn:
+                pending = conn.execute("SELECT COUNT(*) FROM change_requests WHERE category = 'pending'").fetchone()[0]
+            if not pending or time.perf_counter() > deadline:
+                break
+            time.sleep(0.01)
+        drain_seconds = time.perf_counter() - start_time
+        results.append({"name": "fastapi_categorize_backlog", "rows": rows, "iterations": posts,
+                        "pending_left": pending, "seconds": drain_seconds,
+                        "ops_per_sec": posts / drain_seconds, "submit_seconds": post_seconds})
+
+        results.append(summarize("create_connection_pooled", timed(api.create_connection, iterations * 10), rows=rows))
+
+        def connect_fresh():
+            conn = sqlite3.connect(path)
+            for name, value in PRAGMAS.items():
+                conn.execute(f"PRAGMA {name} = {value}")
+            conn.execute("SELECT 1")
+            conn.close()
+
+        results.append(summarize("create_connection_fresh", timed(connect_fresh, iterations), rows=rows))
+
+        cursor = {}
+
+        def list_page():
+            response = client.get("/change_requests", params={"limit": 50, **cursor}).json()
+            cursor.clear()
+            if response["next_cursor"]:
+                cursor["cursor"] = response["next_cursor"]
+
+        results.append(summarize("fastapi_list_page", timed(list_page, iterations), rows=rows, page_size=50))
+
+        def stats_uncached():
+            api.stats_cache.invalidate()
+            client.get("/change_requests/stats")
+
+        results.append(summarize("fastapi_stats_uncached", timed(stats_uncached, max(1, iterations // 10)), rows=rows))
+        results.append(summarize("fastapi_stats_cached",
+                                 timed(lambda: client.get("/change_requests/stats"), iterations), rows=rows))
+        results.append({"name": "llm_client", **api.get_client().stats()})
+    server.shutdown()
+    return results
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the FastAPI service with a stubbed LLM.")
+    parser.add_argument("--rows", type=int, default=10000, help="generated rows in the database")
+    parser.add_argument("--posts", type=int, default=500, help="change requests to submit")
+    parser.add_argument("--iterations", type=int, default=200, help="repetitions of each read benchmark")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", action="store_true", help="print machine-readable results")
+    args = parser.parse_args()
+
+    # Keep the service's own logging off stdout so --json output stays parseable.
+    with contextlib.redirect_stdout(sys.stderr):
+        results = benchmark(args.rows, args.posts, args.iterations, args.seed)
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        for result in results:
+            if "p50_ms" in result:
+                print(f"{result['name']:<32} p50 {result['p50_ms']:8.3f} ms  p95 {result['p95_ms']:8.3f} ms  "
+                      f"{result['ops_per_sec']:10.1f} ops/s")
+            else:
+                print(f"{result['name']:<32} {json.dumps({k: v for k, v in result.items() if k != 'name'})}")
@@ -0,0 +1,110 @@
+"""Compare the local classifier against the LLM categorization path.
+
+Trains on a random split of labelled rows and reports, on the held-out rows,
+accuracy against the stored (LLM-assigned) categories, the share of rows above
+each confidence threshold with their accuracy, and per-description latency.
+A sample of held-out rows is also sent through the LLM path for its latency;
+point TOGETHER_API_URL at stub_llm.py to run this offline.
+
+    python benchmark_classifier.py --db ../database/change_requests.db --llm-sample 20
+"""
+import argparse
+import json
+import random
+import statistics
+import time
+from categorizer import CATEGORIES, request_category
+from classifier import CentroidClassifier, load_training_rows
+from db import ConnectionPool, database_path
+
+def split(rows, test_fraction, seed):
+    rows = list(rows)
+    random.Random(seed).shuffle(rows)
+    cut = max(1, int(len(rows) * test_fraction))
+    return rows[cut:], rows[:cut]
+
+def benchmark(rows, test_fraction=0.2, seed=0, thresholds=(0.0, 0.5, 0.6, 0.7, 0.8, 0.9), llm_sample=0):
+    train, test = split(rows, test_fraction, seed)
+    start_time = time.perf_counter()
+    classifier = CentroidClassifier().fit([d for d, _ in train], [label for _, label in train])
+    train_seconds = time.perf_counter() - start_time
+
+    predictions = []
+    latencies = []
+    for description, label in test:
+        start_time = time.perf_counter()
+        category, confidence = classifier.predict(description)
+        latencies.append(time.perf_counter() - start_time)
+        predictions.append((category, confidence, label))
+
+    coverage = []
+    for threshold in thresholds:
+        accepted = [(p, l) for p, c, l in predictions if c >= threshold]
+        coverage.append({
+            "threshold": threshold,
+            "coverage": len(accepted) / len(predictions),
+            "accuracy": sum(p == l for p, l in accepted) / len(accepted) if accepted else None,
+        })
+
+    results = {
+        "train_rows": len(train),
+        "test_rows": len(test),
+        "train_seconds": train_seconds,
+        "temperature": classifier.temperature,
+        "min_margin": classifier.min_margin,
+        "classifier_accuracy": sum(p == l for p, _, l in predictions) / len(predictions),
+        "classifier_latency_ms": {
+            "mean": statistics.mean(latencies) * 1000,
+            "p95": sorted(latencies)[int(0.95 * (len(latencies) - 1))] * 1000,
+        },
+        "thresholds": coverage,
+    }
+
+    if llm_sample:
+        sample = test[:llm_sample]
+        llm_latencies = []
+        correct = 0
+        for description, label in sample:
+            start_time = time.perf_counter()
+            correct += request_category(description) == label
+            llm_latencies.append(time.perf_counter() - start_time)
+        results["llm_accuracy"] = correct / len(sample)
+        results["llm_latency_ms"] = {
+            "mean": statistics.mean(llm_latencies) * 1000,
+            "p95": sorted(llm_latencies)[int(0.95 * (len(llm_latencies) - 1))] * 1000,
+        }
+    return results
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the local classifier against the LLM path.")
+    parser.add_argument("--db", default=None, help="database path (defaults to CHANGE_REQUESTS_DB)")
+    parser.add_argument("--limit", type=int, default=50000, help="maximum labelled rows to load")
+    parser.add_argument("--test-fraction", type=float, default=0.2)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--llm-sample", type=int, default=0, help="held-out rows to also send to the LLM")
+    parser.add_argument("--json", action="store_true", help="print machine-readable results")
+    args = parser.parse_args()
+
+    pool = ConnectionPool(args.db or database_path())
+    with pool.connection() as conn:
+        rows = load_training_rows(conn, CATEGORIES, args.limit)
+    pool.close_all()
+    if len({label for _, label in rows}) < 2:
+        raise SystemExit(f"Need labelled rows from at least two categories, found {len(rows)} rows")
+
+    results = benchmark(rows, args.test_fraction, args.seed, llm_sample=args.llm_sample)
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        print(f"Trained on {results['train_rows']} rows in {results['train_seconds']:.2f}s, "
+              f"tested on {results['test_rows']}")
+        print(f"Classifier accuracy: {results['classifier_accuracy']:.1%}, "
+              f"latency mean {results['classifier_latency_ms']['mean']:.2f} ms, "
+              f"p95 {results['classifier_latency_ms']['p95']:.2f} ms")
+        for row in results["thresholds"]:
+            accuracy = f"{row['accuracy']:.1%}" if row["accuracy"] is not None else "n/a"
+            print(f"  threshold {row['threshold']:.2f}: coverage {row['coverage']:.1%}, accuracy {accuracy}")
+        if "llm_accuracy" in results:
+            print(f"LLM accuracy: {results['llm_accuracy']:.1%}, "
+                  f"latency mean {results['llm_latency_ms']['mean']:.0f} ms, "
+                  f"p95 {results['llm_latency_ms']['p95']:.0f} ms")
@@ -0,0 +1,117 @@
+import hashlib
+import re
+from llm_client import MODEL, LLMError, get_client
+
+CATEGORIES = ["hardware issue", "software issue", "personnel issue", "other"]
+
+CATEGORY_PROMPT = (
+    "Classify the following description the best that you can. Here are some example categories: "
+    "{categories}. "
+    "You are not limited to the list. "
+    "Description: {description} Category:"
+)
+
+BATCH_PROMPT = (
+    "Classify each numbered description into exactly one of these categories: "
+    "{categories}. "
+    "Answer with one line per description in the form '<number>. <category>' and nothing else.\n\n"
+    "Descriptions:\n{numbered}\n\nCategories:\n"
+)
+
+# Changes whenever the model, prompts or category list change, so cached answers are invalidated.
+CATEGORIZER_VERSION = hashlib.sha256(
+    "\0".join([MODEL, CATEGORY_PROMPT, BATCH_PROMPT, *CATEGORIES]).encode()
+).hexdigest()[:16]
+
+def _complete(prompt, max_tokens, stop):
+    """Send a completion request through the shared client and return the generated text."""
+    return get_client().complete(prompt, max_tokens=max_tokens, stop=stop)
+
+def match_category(text):
+    """Return the first known category mentioned in text, or None."""
+    text = text.strip().lower()
+    for category in CATEGORIES:
+        if category in text:
+            return category
+    return None
+
+def request_category(description: str) -> str:
+    """Ask the Together AI API for a category, raising LLMError on failure."""
+    prompt = CATEGORY_PROMPT.format(categories=", ".join(CATEGORIES), description=description)
+    category = match_category(_complete(prompt, max_tokens=10, stop=["\n"]))
+    print(f"Description: '{description}'")
+    if category is None:
+        print(f"Predicted Category: 'other' (no match found)")
+        return "other"
+    print(f"Predicted Category: '{category}'")
+    return category
+
+def build_batch_prompt(descriptions):
+    """Pack several descriptions into one numbered classification prompt."""
+    numbered = "\n".join(
+        f"{i}. {' '.join(description.split())}" for i, description in enumerate(descriptions, 1)
+    )
+    return BATCH_PROMPT.format(categories=", ".join(CATEGORIES), numbered=numbered)
+
+BATCH_LINE = re.compile(r"^\s*(\d+)\s*[.):\-]\s*(.+?)\s*$")
+
+def parse_batch_answer(text, count):
+    """Parse '<number>. <category>' lines into a list of count labels, None where unparsable."""
+    labels = [None] * count
+    for line in text.splitlines():
+        match = BATCH_LINE.match(line)
+        if not match:
+            continue
+        index = int(match.group(1)) - 1
+        if 0 <= index < count and labels[index] is None:
+            labels[index] = match_category(match.group(2))
+    return labels
+
+def request_categories(descriptions, cache=None, classifier=None, threshold=0.6, with_sources=False):
+    """Categorize many descriptions with as few API calls as possible.
+
+    Cache hits are used as-is. With a local classifier, predictions whose
+    confidence reaches threshold are accepted without calling the API. The rest
+    are sent in one batch call, each distinct description once, and items
+    missing from or unparsable in the batch answer fall back to single requests.
+    With with_sources, returns (category, source) pairs where source is
+    'classifier' or 'llm' (cache entries only ever hold LLM answers).
+    Raises LLMError if the API cannot be reached.
+    """
+    labels = [cache.get(description) if cache is not None else None for description in descriptions]
+    sources = ["llm"] * len(descriptions)
+    if classifier is not None:
+        for i, label in enumerate(labels):
+            if label is None:
+                category, confidence = classifier.predict(descriptions[i])
+                if confidence >= threshold:
+                    labels[i] = category
+                    sources[i] = "classifier"
+    misses = {}
+    for i, label in enumerate(labels):
+        if label is None:
+            key = cache.key(descriptions[i]) if cache is not None else descriptions[i]
+            misses.setdefault(key, []).append(i)
+    if misses:
+        unique = [descriptions[indexes[0]] for indexes in misses.values()]
+        for indexes, category in zip(misses.values(), _request_batch(unique)):
+            if cache is not None:
+                cache.put(descriptions[indexes[0]], category)
+            for i in indexes:
+                labels[i] = category
+    return list(zip(labels, sources)) if with_sources else labels
+
+def _request_batch(descriptions):
+    if not descriptions:
+        return []
+    if len(descriptions) == 1:
+        return [request_category(descriptions[0])]
+    text = _complete(build_batch_prompt(descriptions), max_tokens=8 * len(descriptions) + 16, stop=["\n\n"])
+    labels = parse_batch_answer(text, len(descriptions))
+    missing = [i for i, label in enumerate(labels) if label is None]
+    if missing:
+        print(f"Batch answer missing {len(missing)} of {len(descriptions)} labels, falling back to single requests")
+    for i in missing:
+        labels[i] = request_category(descriptions[i])
+    print(f"Categorized batch of {len(descriptions)} descriptions")
+    return labels
@@ -0,0 +1,118 @@
+import hashlib
+import re
+import threading
+import time
+
+def normalize_description(description):
+    """Lowercase, drop punctuation and collapse whitespace so near-identical descriptions share a key."""
+    return " ".join(re.sub(r"[^\w\s]", " ", (description or "").lower()).split())
+
+class CategoryCache:
+    """Persistent description -> category cache in a SQLite side table.
+
+    Keys hash the normalized description together with version, a fingerprint of the
+    model, prompt templates and category list. When the stored fingerprint differs from
+    version the table is cleared. Entries expire after ttl seconds, and the least
+    recently used entries are evicted once the table grows past max_entries.
+    """
+
+    EVICT_EVERY = 100  # puts between size checks
+
+    def __init__(self, pool, version, max_entries=100000, ttl=30 * 24 * 3600):
+        self.pool = pool
+        self.version = version
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._puts = 0
+        self._lock = threading.Lock()
+        self._create_tables()
+
+    def _create_tables(self):
+        with self.pool.connection() as conn:
+            conn.execute('''CREATE TABLE IF NOT EXISTS category_cache
+                            (key TEXT PRIMARY KEY,
+                             category TEXT NOT NULL,
+                             created_at REAL NOT NULL,
+                             last_used REAL NOT NULL)''')
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_category_cache_last_used ON category_cache (last_used)")
+            conn.execute("CREATE TABLE IF NOT EXISTS category_cache_meta (name TEXT PRIMARY KEY, value TEXT)")
+            row = conn.execute("SELECT value FROM category_cache_meta WHERE name = 'version'").fetchone()
+            if row is None or row[0] != self.version:
+                if row is not None:
+                    print(f"Categorizer version changed ({row[0]} -> {self.version}), clearing category cache")
+                conn.execute("DELETE FROM category_cache")
+                conn.execute("INSERT OR REPLACE INTO category_cache_meta (name, value) VALUES ('version', ?)",
+                             (self.version,))
+
+    def key(self, description):
+        normalized = normalize_description(description)
+        return hashlib.sha256(f"{self.version}\0{normalized}".encode()).hexdigest()
+
+    def _count(self, hit):
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def get(self, description):
+        """Return the cached category for description, or None on a miss."""
+        key = self.key(description)
+        now = time.time()
+        with self.pool.connection() as conn:
+            row = conn.execute("SELECT category, created_at FROM category_cache WHERE key = ?", (key,)).fetchone()
+            if row is not None and now - row[1] > self.ttl:
+                conn.execute("DELETE FROM category_cache WHERE key = ?", (key,))
+                row = None
+            elif row is not None:
+                conn.execute("UPDATE category_cache SET last_used = ? WHERE key = ?", (now, key))
+        self._count(row is not None)
+        return row[0] if row is not None else None
+
+    def put(self, description, category):
+        now = time.time()
+        with self.pool.connection() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO category_cache (key, category, created_at, last_used) VALUES (?, ?, ?, ?)",
+                (self.key(description), category, now, now)
+            )
+        with self._lock:
+            self._puts += 1
+            check = self._puts % self.EVICT_EVERY == 0
+        if check:
+            self.evict()
+
+    def evict(self):
+        """Drop expired entries, then the least recently used ones beyond max_entries."""
+        with self.pool.connection() as conn:
+            removed = conn.execute("DELETE FROM category_cache WHERE created_at < ?", (time.time() - self.ttl,)).rowcount
+            size = conn.execute("SELECT COUNT(*) FROM category_cache").fetchone()[0]
+            if size > self.max_entries:
+                removed += conn.execute(
+                    "DELETE FROM category_cache WHERE key IN "
+                    "(SELECT key FROM category_cache ORDER BY last_used LIMIT ?)",
+                    (size - self.max_entries,)
+                ).rowcount
+        with self._lock:
+            self.evictions += removed
+        return removed
+
+    def clear(self):
+        with self.pool.connection() as conn:
+            conn.execute("DELETE FROM category_cache")
+
+    def stats(self):
+        with self.pool.connection() as conn:
+            size = conn.execute("SELECT COUNT(*) FROM category_cache").fetchone()[0]
+        lookups = self.hits + self.misses
+        return {
+            "size": size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "version": self.version,
+        }
@@ -0,0 +1,163 @@
+import re
+import time
+from collections import Counter
+import numpy as np
+
+TOKEN = re.compile(r"[a-z0-9]+")
+
+def tokenize(text):
+    """Split text into lowercase word unigrams and bigrams."""
+    words = TOKEN.findall((text or "").lower())
+    return words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+
+class CentroidClassifier:
+    """TF-IDF nearest-centroid classifier over change request descriptions.
+
+    Each category is represented by the normalized mean TF-IDF vector of its
+    training descriptions. A description is scored by the dot product of its
+    (unnormalized) TF-IDF vector with every centroid, so the score grows with
+    how much category-specific text it contains, not just with its direction.
+    Documents are kept sparse, as (term indexes, weights) pairs, so the cost is
+    in the number of terms a document uses rather than the vocabulary size.
+
+    fit() holds out a share of each label's rows to calibrate, before training on all of
+    them, the softmax temperature (minimizing held-out negative log-likelihood)
+    and min_margin, a low quantile of the gap between the best and second-best
+    score of correctly classified held-out rows. predict() gives confidence 0
+    to a description whose gap is below min_margin, so text with little
+    evidence for any one category falls through to the LLM.
+    """
+
+    TEMPERATURES = np.geomspace(0.05, 20.0, 60)
+
+    def __init__(self, temperature=None, min_margin=None, min_df=1, holdout=0.2, margin_quantile=0.01, seed=0):
+        self.temperature = temperature
+        self.min_margin = min_margin
+        self.min_df = min_df
+        self.holdout = holdout
+        self.margin_quantile = margin_quantile
+        self.seed = seed
+        self.vocabulary = {}
+        self.idf = None
+        self.labels = []
+        self.centroids = None
+
+    def _vectorize(self, counts):
+        """Return (indexes, weights) of the TF-IDF vector of a token Counter."""
+        pairs = [(self.vocabulary[token], count) for token, count in counts.items() if token in self.vocabulary]
+        indexes = np.array([index for index, _ in pairs], dtype=np.int64)
+        weights = (1 + np.log(np.array([count for _, count in pairs], dtype=float))) * self.idf[indexes]
+        return indexes, weights
+
+    def _train(self, documents, labels):
+        document_frequency = Counter(token for counts in documents for token in counts)
+        tokens = [token for token, df in document_frequency.items() if df >= self.min_df]
+        self.vocabulary = {token: i for i, token in enumerate(tokens)}
+        self.idf = np.log((1 + len(documents)) / (1 + np.array([document_frequency[t] for t in tokens]))) + 1
+        self.labels = sorted(set(labels))
+        label_index = {label: i for i, label in enumerate(self.labels)}
+        sums = np.zeros((len(self.labels), len(tokens)))
+        for counts, label in zip(documents, labels):
+            indexes, weights = self._vectorize(counts)
+            if len(indexes):
+                sums[label_index[label], indexes] += weights / np.linalg.norm(weights)
+        norms = np.linalg.norm(sums, axis=1, keepdims=True)
+        self.centroids = sums / np.where(norms == 0, 1, norms)
+
+    def _scores(self, counts):
+        indexes, weights = self._vectorize(counts)
+        return self.centroids[:, indexes] @ weights
+
+    def _calibrate(self, documents, labels):
+        label_index = {label: i for i, label in enumerate(self.labels)}
+        known = [i for i, label in enumerate(labels) if label in label_index]
+        if not known:
+            return
+        scores = np.array([self._scores(documents[i]) for i in known])
+        truth = np.array([label_index[labels[i]] for i in known])
+        if self.temperature is None:
+            def loss(temperature):
+                scaled = (scores - scores.max(axis=1, keepdims=True)) / temperature
+                log_probabilities = scaled - np.log(np.exp(scaled).sum(axis=1, keepdims=True))
+                return -log_probabilities[np.arange(len(truth)), truth].mean()
+            self.temperature = float(min(self.TEMPERATURES, key=loss))
+        if self.min_margin is None:
+            ranked = np.sort(scores, axis=1)
+            correct = scores.argmax(axis=1) == truth
+            margins = (ranked[:, -1] - ranked[:, -2])[correct]
+            self.min_margin = float(np.quantile(margins, self.margin_quantile)) if len(margins) else 0.0
+
+    def _holdout_split(self, labels):
+        """Split row indexes into (train, held out), holding out the same share of every label.
+
+        A label with too few rows to spare one stays entirely in the training split.
+        """
+        rng = np.random.default_rng(self.seed)
+        by_label = {}
+        for i, label in enumerate(labels):
+            by_label.setdefault(label, []).append(i)
+        train, held_out = [], []
+        for label in sorted(by_label):
+            indexes = rng.permutation(by_label[label])
+            cut = int(len(indexes) * self.holdout)
+            held_out.extend(indexes[:cut])
+            train.extend(indexes[cut:])
+        return train, held_out
+
+    def fit(self, descriptions, labels):
+        documents = [Counter(tokenize(text)) for text in descriptions]
+        labels = list(labels)
+        if self.temperature is None or self.min_margin is None:
+            train, held_out = self._holdout_split(labels)
+            if held_out and len({labels[i] for i in train}) > 1:
+                self._train([documents[i] for i in train], [labels[i] for i in train])
+                self._calibrate([documents[i] for i in held_out], [labels[i] for i in held_out])
+        if self.temperature is None:
+            self.temperature = 1.0
+        if self.min_margin is None:
+            self.min_margin = 0.0
+        self._train(documents, labels)
+        return self
+
+    def predict_proba(self, description):
+        """Return a {category: probability} dict for description."""
+        scores = self._scores(Counter(tokenize(description)))
+        exp = np.exp((scores - scores.max()) / self.temperature)
+        return dict(zip(self.labels, exp / exp.sum()))
+
+    def predict(self, description):
+        """Return (category, confidence) for description; confidence is 0 when the margin is below min_margin."""
+        scores = self._scores(Counter(tokenize(description)))
+        ranked = np.sort(scores)
+        best = int(scores.argmax())
+        if len(scores) > 1 and ranked[-1] - ranked[-2] < self.min_margin:
+            return self.labels[best], 0.0
+        exp = np.exp((scores - scores.max()) / self.temperature)
+        return self.labels[best], float(exp[best] / exp.sum())
+
+def load_training_rows(conn, categories, limit=50000):
+    """Fetch the most recent descriptions labelled with one of categories by the LLM.
+
+    Rows the classifier labelled itself, or that got the fallback category after
+    failed retries, are left out so the classifier does not train on its own output.
+    """
+    placeholders = ", ".join("?" for _ in categories)
+    return conn.execute(
+        f"SELECT description, category FROM change_requests "
+        f"WHERE category IN ({placeholders}) AND description IS NOT NULL "
+        f"AND COALESCE(category_source, 'llm') = 'llm' ORDER BY id DESC LIMIT ?",
+        (*categories, limit)
+    ).fetchall()
+
+def train_from_database(pool, categories, limit=50000):
+    """Train a classifier from labelled rows, or return None when there are fewer than two categories."""
+    with pool.connection() as conn:
+        rows = load_training_rows(conn, categories, limit)
+    if len({label for _, label in rows}) < 2:
+        print(f"Not enough labelled change requests to train the local classifier ({len(rows)} rows)")
+        return None
+    start_time = time.time()
+    classifier = CentroidClassifier().fit([d for d, _ in rows], [label for _, label in rows])
+    print(f"Trained local classifier on {len(rows)} rows, {len(classifier.vocabulary)} terms "
+          f"in {time.time() - start_time:.2f}s")
+    return classifier
@@ -0,0 +1,232 @@
+import json
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+from sqlite3 import Error
+
+DEFAULT_DATABASE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "database", "change_requests.db")
+
+# Applied to every new connection. WAL lets readers run alongside the single writer,
+# and synchronous=NORMAL is durable under WAL without an fsync per commit.
+PRAGMAS = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "cache_size": -20000,      # in KiB, ~20 MB page cache per connection
+    "mmap_size": 268435456,    # 256 MB memory-mapped reads
+    "busy_timeout": 5000,      # ms to wait on a locked database before failing
+    "foreign_keys": "ON",
+}
+
+SCHEMA = [
+    '''CREATE TABLE IF NOT EXISTS change_requests
+       (id INTEGER PRIMARY KEY AUTOINCREMENT,
+        project_name TEXT,
+        change_number TEXT,
+        requested_by TEXT,
+        date_of_request DATE,
+        presented_to TEXT,
+        change_name TEXT,
+        description TEXT,
+        reason TEXT,
+        cost_items TEXT,
+        category TEXT,
+        timestamp DATETIME DEFAULT CURRENT_TIMESTAMP)''',
+]
+
+COST_ITEM_INSERT_SQL = (
+    "INSERT INTO cost_items (change_request_id, item_description, hours_reduction, hours_increase, "
+    "dollars_reduction, dollars_increase) VALUES (?, ?, ?, ?, ?, ?)"
+)
+
+def _number(value, cast):
+    try:
+        return cast(value or 0)
+    except (TypeError, ValueError):
+        return cast(0)
+
+def cost_item_values(change_request_id, item):
+    """Map one cost item dict to COST_ITEM_INSERT_SQL parameters.
+
+    Rows written by older versions of fake_data.py use {"item", "cost"}; those
+    are read as the item description and a dollar increase.
+    """
+    return (
+        change_request_id,
+        item.get("item_description", item.get("item", "")),
+        _number(item.get("hours_reduction"), int),
+        _number(item.get("hours_increase"), int),
+        _number(item.get("dollars_reduction"), float),
+        _number(item.get("dollars_increase", item.get("cost")), float),
+    )
+
+def _create_cost_items(conn):
+    """Move cost_items JSON blobs into a typed, indexed child table."""
+    conn.execute('''CREATE TABLE IF NOT EXISTS cost_items
+                    (id INTEGER PRIMARY KEY AUTOINCREMENT,
+                     change_request_id INTEGER NOT NULL REFERENCES change_requests (id) ON DELETE CASCADE,
+                     item_description TEXT,
+                     hours_reduction INTEGER NOT NULL DEFAULT 0,
+                     hours_increase INTEGER NOT NULL DEFAULT 0,
+                     dollars_reduction REAL NOT NULL DEFAULT 0,
+                     dollars_increase REAL NOT NULL DEFAULT 0)''')
+    # Leads with the foreign key and covers the amounts, so per-request and
+    # per-project sums are answered from the index alone.
+    conn.execute('''CREATE INDEX IF NOT EXISTS idx_cost_items_change_request
+                    ON cost_items (change_request_id, dollars_increase, dollars_reduction,
+                                   hours_increase, hours_reduction)''')
+    rows = []
+    for change_request_id, blob in conn.execute("SELECT id, cost_items FROM change_requests WHERE cost_items IS NOT NULL"):
+        try:
+            items = json.loads(blob)
+        except (TypeError, ValueError):
+            print(f"Skipping unreadable cost_items on change request {change_request_id}")
+            continue
+        rows.extend(cost_item_values(change_request_id, item) for item in items if isinstance(item, dict))
+    conn.executemany(COST_ITEM_INSERT_SQL, rows)
+    print(f"Migrated {len(rows)} cost items into the cost_items table")
+
+def _create_filter_indexes(conn):
+    """Index the read API's filter and sort columns.
+
+    SQLite appends the rowid to every index, so (column) serves equality filters
+    ordered by id and (column, date_of_request) serves them ordered or ranged by
+    date, both as keyset seeks without a sort step.
+    """
+    for column in ("project_name", "requested_by", "category"):
+        conn.execute(f"CREATE INDEX IF NOT EXISTS idx_change_requests_{column} ON change_requests ({column})")
+        conn.execute(f"CREATE INDEX IF NOT EXISTS idx_change_requests_{column}_date "
+                     f"ON change_requests ({column}, date_of_request)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_change_requests_date ON change_requests (date_of_request)")
+
+def _add_category_source(conn):
+    """Record who assigned each category: 'llm', 'classifier' or 'fallback'.
+
+    Rows from before this column existed are NULL and were labelled by the LLM.
+    """
+    conn.execute("ALTER TABLE change_requests ADD COLUMN category_source TEXT")
+
+def _case_insensitive_name_indexes(conn):
+    """Rebuild the project_name and requested_by indexes with NOCASE collation.
+
+    The read API matches names case-insensitively, and SQLite only uses an index
+    for a COLLATE NOCASE comparison when the index has the same collation.
+    """
+    for column in ("project_name", "requested_by"):
+        conn.execute(f"DROP INDEX IF EXISTS idx_change_requests_{column}")
+        conn.execute(f"DROP INDEX IF EXISTS idx_change_requests_{column}_date")
+        conn.execute(f"CREATE INDEX idx_change_requests_{column} ON change_requests ({column} COLLATE NOCASE)")
+        conn.execute(f"CREATE INDEX idx_change_requests_{column}_date "
+                     f"ON change_requests ({column} COLLATE NOCASE, date_of_request)")
+
+# Applied in order; PRAGMA user_version records how many have run.
+MIGRATIONS = [
+    _create_cost_items,
+    _create_filter_indexes,
+    _add_category_source,
+    _case_insensitive_name_indexes,
+]
+
+def migrate(conn):
+    """Apply any migrations newer than the database's user_version, each in its own transaction."""
+    version = conn.execute("PRAGMA user_version").fetchone()[0]
+    for number, migration in enumerate(MIGRATIONS[version:], version + 1):
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            migration(conn)
+            conn.execute(f"PRAGMA user_version = {number}")
+            conn.commit()
+        except BaseException:
+            conn.rollback()
+            raise
+        print(f"Applied migration {number}: {migration.__name__}")
+
+def create_schema(conn):
+    """Create the change request tables if they don’t exist and bring them up to date."""
+    for statement in SCHEMA:
+        conn.execute(statement)
+    conn.commit()
+    migrate(conn)
+
+def database_path():
+    """Resolve the database file from CHANGE_REQUESTS_DB, falling back to backend/database."""
+    return os.path.abspath(os.getenv("CHANGE_REQUESTS_DB", DEFAULT_DATABASE_PATH))
+
+class ConnectionPool:
+    """Keep one persistent, tuned SQLite connection per thread."""
+
+    def __init__(self, path, pragmas=None):
+        self.path = path
+        self.pragmas = PRAGMAS if pragmas is None else pragmas
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._connections = set()
+
+    def _open(self):
+        conn = sqlite3.connect(self.path, check_same_thread=False)
+        for name, value in self.pragmas.items():
+            conn.execute(f"PRAGMA {name} = {value}")
+        with self._lock:
+            self._connections.add(conn)
+        return conn
+
+    def _discard(self, conn):
+        with self._lock:
+            self._connections.discard(conn)
+        try:
+            conn.close()
+        except Error:
+            pass
+
+    @staticmethod
+    def _is_healthy(conn):
+        try:
+            conn.execute("SELECT 1").fetchone()
+            return True
+        except Error:
+            return False
+
+    def get(self):
+        """Return this thread's connection, reopening it if the health check fails."""
+        conn = getattr(self._local, "conn", None)
+        if conn is not None and self._is_healthy(conn):
+            return conn
+        if conn is not None:
+            print("Database connection failed health check, reconnecting")
+            self._discard(conn)
+        conn = self._open()
+        self._local.conn = conn
+        return conn
+
+    @contextmanager
+    def connection(self):
+        """Yield this thread's connection, committing on success and rolling back on error."""
+        conn = self.get()
+        try:
+            yield conn
+            conn.commit()
+        except BaseException:
+            conn.rollback()
+            raise
+
+    def health(self):
+        """Report whether the database is reachable along with the active journal mode."""
+        try:
+            conn = self.get()
+            journal_mode = conn.execute("PRAGMA journal_mode").fetchone()[0]
+            return {"status": "ok", "database": self.path, "journal_mode": journal_mode,
+                    "connections": len(self._connections)}
+        except Error as e:
+            return {"status": "error", "database": self.path, "detail": str(e)}
+
+    def close_all(self):
+        """Close every connection handed out by the pool."""
+        with self._lock:
+            connections = list(self._connections)
+            self._connections.clear()
+        for conn in connections:
+            try:
+                conn.close()
+            except Error:
+                pass
+        self._local = threading.local()
@@ -0,0 +1,187 @@
+"""Bulk ingestion of change requests from JSON Lines or CSV.
+
+Directly into the database, then categorize the new rows in batches:
+
+    python ingest.py historical.jsonl --categorize
+    python ingest.py historical.csv --db ../database/change_requests.db
+
+Or streamed to a running API:
+
+    python ingest.py historical.csv --url http://127.0.0.1:8000/change_requests/bulk
+"""
+import argparse
+import csv
+import json
+import sys
+from sqlite3 import Error
+from pydantic import ValidationError
+from db import COST_ITEM_INSERT_SQL, cost_item_values
+from models import ChangeRequest
+
+FORMATS = ("jsonl", "csv")
+
+COLUMNS = ["project_name", "change_number", "requested_by", "date_of_request", "presented_to",
+           "change_name", "description", "reason", "cost_items", "category"]
+
+INSERT_SQL = (
+    f"INSERT INTO change_requests ({', '.join(COLUMNS)}) "
+    f"VALUES ({', '.join('?' for _ in COLUMNS)})"
+)
+
+def row_values(change_request, category):
+    """Order a validated ChangeRequest's fields to match INSERT_SQL."""
+    cost_items = [item.model_dump() for item in change_request.cost_items]
+    return (change_request.project_name, change_request.change_number, change_request.requested_by,
+            change_request.date_of_request, change_request.presented_to, change_request.change_name,
+            change_request.description, change_request.reason, json.dumps(cost_items), category)
+
+def insert_change_requests(conn, change_requests, category):
+    """Insert change requests and their cost items on conn, returning the new ids.
+
+    Runs inside the caller's transaction. AUTOINCREMENT ids handed out while the
+    transaction holds the write lock are consecutive, so the ids of an
+    executemany batch are recovered from last_insert_rowid().
+    """
+    conn.executemany(INSERT_SQL, [row_values(change_request, category) for change_request in change_requests])
+    last_id = conn.execute("SELECT last_insert_rowid()").fetchone()[0]
+    ids = list(range(last_id - len(change_requests) + 1, last_id + 1))
+    conn.executemany(COST_ITEM_INSERT_SQL, [
+        cost_item_values(change_request_id, item.model_dump())
+        for change_request_id, change_request in zip(ids, change_requests)
+        for item in change_request.cost_items
+    ])
+    return ids
+
+def detect_format(name):
+    return "csv" if name.lower().endswith(".csv") else "jsonl"
+
+def iter_records(text, fmt):
+    """Yield (line_number, record dict) from a text stream; a record is an Exception if it can't be parsed."""
+    if fmt == "csv":
+        reader = csv.DictReader(text)
+        for record in reader:
+            cost_items = record.get("cost_items")
+            try:
+                record["cost_items"] = json.loads(cost_items) if cost_items else []
+            except json.JSONDecodeError as e:
+                record = ValueError(f"cost_items is not valid JSON: {e}")
+            yield reader.line_num, record
+        return
+    for line_number, line in enumerate(text, 1):
+        if not line.strip():
+            continue
+        try:
+            yield line_number, json.loads(line)
+        except json.JSONDecodeError as e:
+            yield line_number, ValueError(f"invalid JSON: {e}")
+
+def describe_validation_error(error):
+    return "; ".join(f"{'.'.join(str(part) for part in err['loc'])}: {err['msg']}" for err in error.errors())
+
+class IngestResult:
+    """Counts and per-row errors of one ingestion run, capped at max_errors reported rows."""
+
+    def __init__(self, max_errors):
+        self.max_errors = max_errors
+        self.inserted = 0
+        self.failed = 0
+        self.errors = []
+
+    def error(self, line_number, message):
+        self.failed += 1
+        if len(self.errors) < self.max_errors:
+            self.errors.append({"line": line_number, "error": message})
+
+    def as_dict(self):
+        return {"inserted": self.inserted, "failed": self.failed, "errors": self.errors,
+                "errors_truncated": self.failed > len(self.errors)}
+
+def _flush(pool, chunk, category, result):
+    """Insert a chunk in one transaction, retrying row by row to isolate failures if it is rejected."""
+    if not chunk:
+        return
+    try:
+        with pool.connection() as conn:
+            insert_change_requests(conn, [change_request for _, change_request in chunk], category)
+        result.inserted += len(chunk)
+        return
+    except Error:
+        pass
+    for line_number, change_request in chunk:
+        try:
+            with pool.connection() as conn:
+                insert_change_requests(conn, [change_request], category)
+            result.inserted += 1
+        except Error as e:
+            result.error(line_number, f"Database error: {e}")
+
+def ingest(pool, text, fmt="jsonl", chunk_size=1000, category="pending", max_errors=1000):
+    """Validate and insert change requests from a text stream in chunked transactions.
+
+    Rows that fail to parse, validate or insert are reported in the result
+    without aborting the rest of the batch. Inserted rows get category, leaving
+    categorization to a later batch pass.
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"Unsupported format {fmt!r}, expected one of {FORMATS}")
+    result = IngestResult(max_errors)
+    chunk = []
+    for line_number, record in iter_records(text, fmt):
+        if isinstance(record, Exception):
+            result.error(line_number, str(record))
+            continue
+        try:
+            change_request = ChangeRequest.model_validate(record)
+        except ValidationError as e:
+            result.error(line_number, describe_validation_error(e))
+            continue
+        chunk.append((line_number, change_request))
+        if len(chunk) >= chunk_size:
+            _flush(pool, chunk, category, result)
+            chunk = []
+    _flush(pool, chunk, category, result)
+    print(f"Ingested {result.inserted} change requests, {result.failed} failed")
+    return result.as_dict()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Bulk load change requests from JSON Lines or CSV.")
+    parser.add_argument("path", help="input file, or - for stdin")
+    parser.add_argument("--format", choices=FORMATS, help="input format (defaults to the file extension)")
+    parser.add_argument("--url", help="stream the file to this bulk endpoint instead of writing to the database")
+    parser.add_argument("--db", default=None, help="database path (defaults to CHANGE_REQUESTS_DB)")
+    parser.add_argument("--chunk-size", type=int, default=1000, help="rows per transaction")
+    parser.add_argument("--categorize", action="store_true", help="categorize the new rows in batches afterwards")
+    args = parser.parse_args()
+    fmt = args.format or detect_format(args.path)
+
+    if args.url:
+        import requests
+        stream = sys.stdin.buffer if args.path == "-" else open(args.path, "rb")
+        with stream:
+            response = requests.post(
+                args.url,
+                params={"format": fmt, "categorize": str(args.categorize).lower()},
+                data=stream,
+                headers={"Content-Type": "text/csv" if fmt == "csv" else "application/x-ndjson"},
+            )
+        response.raise_for_status()
+        summary = response.json()
+    else:
+        from db import ConnectionPool, create_schema, database_path
+        pool = ConnectionPool(args.db or database_path())
+        try:
+            create_schema(pool.get())
+            stream = sys.stdin if args.path == "-" else open(args.path, newline="", encoding="utf-8")
+            with stream:
+                summary = ingest(pool, stream, fmt, args.chunk_size)
+            if args.categorize and summary["inserted"]:
+                from backfill import backfill
+                backfill(pool)
+        finally:
+            pool.close_all()
+
+    for error in summary["errors"]:
+        print(f"line {error['line']}: {error['error']}", file=sys.stderr)
+    if summary["errors_truncated"]:
+        print(f"... {summary['failed'] - len(summary['errors'])} more errors not shown", file=sys.stderr)
+    print(json.dumps({k: v for k, v in summary.items() if k != "errors"}))
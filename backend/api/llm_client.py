@@ -0,0 +1,268 @@
+"""Shared client for the Together completions API, used by the backend and the frontend.
+
+One keep-alive aiohttp session is owned by a background event loop, so
+synchronous callers in worker threads and async callers on any other loop
+(FastAPI, Panel) all reuse the same pooled connections:
+
+    from llm_client import get_client
+    text = get_client().complete(prompt, max_tokens=10, stop=["\\n"])
+    text = await get_client().acomplete(prompt)
+    async for chunk in get_client().astream(prompt): ...
+
+Configured with TOGETHER_API_KEY, TOGETHER_API_URL, LLM_TIMEOUT,
+LLM_MAX_CONCURRENCY, LLM_MAX_RETRIES and LLM_MAX_BACKOFF. Calls are retried
+with jittered exponential backoff on 429, 5xx and connection errors, waiting
+at most LLM_MAX_BACKOFF seconds between attempts even when asked to wait longer.
+"""
+import asyncio
+import json
+import os
+import random
+import threading
+import time
+from collections import deque
+import aiohttp
+from dotenv import load_dotenv
+
+load_dotenv()
+TOGETHER_API_URL = os.getenv("TOGETHER_API_URL", "https://api.together.xyz/v1/completions")
+MODEL = "meta-llama/Llama-3.3-70B-Instruct-Turbo-Free"
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+class LLMError(Exception):
+    """A completion request failed; status is the HTTP status when there was a response."""
+
+    def __init__(self, message, status=None):
+        super().__init__(message)
+        self.status = status
+
+class LLMMetrics:
+    """Thread-safe counters plus a window of recent call latencies."""
+
+    def __init__(self, window=1000):
+        self._lock = threading.Lock()
+        self.latencies = deque(maxlen=window)
+        self.calls = 0
+        self.errors = 0
+        self.retries = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+
+    def record(self, latency, usage=None, error=False):
+        with self._lock:
+            self.calls += 1
+            self.errors += int(error)
+            self.latencies.append(latency)
+            if usage:
+                self.prompt_tokens += usage.get("prompt_tokens") or 0
+                self.completion_tokens += usage.get("completion_tokens") or 0
+
+    def record_retry(self):
+        with self._lock:
+            self.retries += 1
+
+    def snapshot(self):
+        with self._lock:
+            latencies = sorted(self.latencies)
+            calls, errors, retries = self.calls, self.errors, self.retries
+            prompt_tokens, completion_tokens = self.prompt_tokens, self.completion_tokens
+
+        def percentile(p):
+            return round(latencies[min(len(latencies) - 1, int(p * len(latencies)))], 4) if latencies else None
+
+        return {
+            "calls": calls,
+            "errors": errors,
+            "retries": retries,
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "latency_p50": percentile(0.5),
+            "latency_p95": percentile(0.95),
+            "latency_max": round(latencies[-1], 4) if latencies else None,
+        }
+
+class LLMClient:
+    """Pooled, rate-limited completions client with retries and metrics."""
+
+    def __init__(self, url=TOGETHER_API_URL, api_key=None, model=MODEL, timeout=60.0,
+                 max_concurrency=8, max_retries=3, backoff=0.5, max_backoff=30.0):
+        self.url = url
+        self.api_key = api_key if api_key is not None else os.getenv("TOGETHER_API_KEY")
+        self.model = model
+        self.timeout = timeout
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.metrics = LLMMetrics()
+        self._lock = threading.Lock()
+        self._loop = None
+        self._session = None
+        self._semaphore = None
+
+    def _ensure_loop(self):
+        with self._lock:
+            if self._loop is None:
+                loop = asyncio.new_event_loop()
+                ready = threading.Event()
+
+                def run():
+                    asyncio.set_event_loop(loop)
+                    loop.call_soon(ready.set)
+                    loop.run_forever()
+
+                threading.Thread(target=run, name="llm-client", daemon=True).start()
+                ready.wait()
+                self._loop = loop
+            return self._loop
+
+    def _run(self, coroutine):
+        return asyncio.run_coroutine_threadsafe(coroutine, self._ensure_loop())
+
+    async def _get_session(self):
+        # Only ever called on the client's own loop.
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(limit=self.max_concurrency, keepalive_timeout=60)
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=aiohttp.ClientTimeout(total=self.timeout, sock_connect=10),
+                headers={"Authorization": f"Bearer {self.api_key}", "Content-Type": "application/json"},
+            )
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self._session
+
+    def payload(self, prompt, max_tokens, stop, stream=False, **params):
+        return {"model": self.model, "prompt": prompt, "max_tokens": max_tokens, "temperature": 0.0,
+                "stop": list(stop), "stream": stream, **params}
+
+    def _retry_delay(self, attempt, response=None):
+        retry_after = response.headers.get("Retry-After") if response is not None else None
+        if retry_after:
+            try:
+                # A misbehaving upstream must not stall the caller indefinitely.
+                return min(max(float(retry_after), 0.0), self.max_backoff)
+            except ValueError:
+                pass
+        return min(self.backoff * (2 ** attempt) * random.uniform(0.5, 1.5), self.max_backoff)
+
+    async def _post(self, payload, handle):
+        """POST payload, retrying transient failures, and return await handle(response)."""
+        session = await self._get_session()
+        for attempt in range(self.max_retries + 1):
+            start = time.perf_counter()
+            response = None
+            try:
+                async with self._semaphore:
+                    async with session.post(self.url, json=payload) as response:
+                        if response.status < 400:
+                            result, usage = await handle(response)
+                            self.metrics.record(time.perf_counter() - start, usage)
+                            return result
+                        detail = (await response.text())[:500]
+                        error = LLMError(f"HTTP {response.status}: {detail}", response.status)
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                error = LLMError(f"{type(e).__name__}: {e}")
+                if response is not None and response.status < 400:
+                    # Part of the body was already handled; repeating the call could duplicate output.
+                    self.metrics.record(time.perf_counter() - start, error=True)
+                    raise error
+            self.metrics.record(time.perf_counter() - start, error=True)
+            if (error.status is not None and error.status not in RETRY_STATUSES) or attempt == self.max_retries:
+                raise error
+            delay = self._retry_delay(attempt, response if error.status is not None else None)
+            self.metrics.record_retry()
+            print(f"LLM call failed ({error}), retrying in {delay:.1f}s")
+            await asyncio.sleep(delay)
+
+    async def _complete(self, prompt, max_tokens, stop, **params):
+        async def handle(response):
+            result = await response.json()
+            return result.get("choices", [{}])[0].get("text", ""), result.get("usage")
+
+        return await self._post(self.payload(prompt, max_tokens, stop, **params), handle)
+
+    def complete(self, prompt, max_tokens=500, stop=("\n\n",), **params):
+        """Return the completion text, blocking the calling thread. Raises LLMError."""
+        return self._run(self._complete(prompt, max_tokens, stop, **params)).result()
+
+    async def acomplete(self, prompt, max_tokens=500, stop=("\n\n",), **params):
+        """Return the completion text from any event loop. Raises LLMError."""
+        return await asyncio.wrap_future(self._run(self._complete(prompt, max_tokens, stop, **params)))
+
+    async def astream(self, prompt, max_tokens=500, stop=("\n\n",), **params):
+        """Yield completion text chunks from the server-sent event stream as they arrive.
+
+        Closing the generator or cancelling its consumer closes the connection.
+        Only the connection attempt is retried; a stream that fails midway raises LLMError.
+        """
+        consumer = asyncio.get_running_loop()
+        chunks = asyncio.Queue()
+        done = object()
+
+        async def handle(response):
+            usage, produced = None, 0
+            async for line in response.content:
+                line = line.decode().strip()
+                if not line.startswith("data:"):
+                    continue
+                data = line[len("data:"):].strip()
+                if data == "[DONE]":
+                    break
+                event = json.loads(data)
+                usage = event.get("usage") or usage
+                text = (event.get("choices") or [{}])[0].get("text", "")
+                if text:
+                    produced += 1
+                    consumer.call_soon_threadsafe(chunks.put_nowait, text)
+            return None, usage or {"completion_tokens": produced}
+
+        async def produce():
+            try:
+                await self._post(self.payload(prompt, max_tokens, stop, stream=True, **params), handle)
+                consumer.call_soon_threadsafe(chunks.put_nowait, done)
+            except Exception as e:
+                consumer.call_soon_threadsafe(chunks.put_nowait, e)
+
+        future = self._run(produce())
+        try:
+            while True:
+                item = await chunks.get()
+                if item is done:
+                    return
+                if isinstance(item, Exception):
+                    raise item
+                yield item
+        finally:
+            future.cancel()
+
+    def stats(self):
+        return {"url": self.url, "max_concurrency": self.max_concurrency, **self.metrics.snapshot()}
+
+    def close(self):
+        """Close the pooled session and stop the background loop."""
+        with self._lock:
+            loop, self._loop = self._loop, None
+        if loop is None:
+            return
+        if self._session is not None:
+            asyncio.run_coroutine_threadsafe(self._session.close(), loop).result()
+            self._session = None
+        loop.call_soon_threadsafe(loop.stop)
+
+_default_client = None
+_default_lock = threading.Lock()
+
+def get_client():
+    """Return the process-wide client, created from the environment on first use."""
+    global _default_client
+    with _default_lock:
+        if _default_client is None:
+            _default_client = LLMClient(
+                url=os.getenv("TOGETHER_API_URL", TOGETHER_API_URL),
+                timeout=float(os.getenv("LLM_TIMEOUT", "60")),
+                max_concurrency=int(os.getenv("LLM_MAX_CONCURRENCY", "8")),
+                max_retries=int(os.getenv("LLM_MAX_RETRIES", "3")),
+                max_backoff=float(os.getenv("LLM_MAX_BACKOFF", "30")),
+            )
+        return _default_client
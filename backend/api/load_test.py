@@ -0,0 +1,221 @@
+"""Load-test the change request API with concurrent simulated form submitters.
+
+Each virtual user posts realistic change requests, like crp_form.py does,
+optionally mixed with list reads. With --rate, requests follow a fixed
+schedule shared by all users and latency is measured from each request's
+scheduled time, so queueing behind a saturated server is counted rather than
+hidden. Reports p50/p95/p99 latency, throughput, error rates and how many
+failures were SQLite "database is locked" errors.
+
+Start a throwaway FastAPI stack (stub LLM, generated database) and load it:
+
+    python load_test.py --spawn --users 50 --duration 30
+    python load_test.py --spawn --users 50 --rate 200 --llm-latency 0.5 --json
+
+Or point it at a running server; Django is started with
+DJANGO_DATABASE=/tmp/load.sqlite3 python manage.py runserver --noreload:
+
+    python load_test.py --target django --url http://127.0.0.1:8000/api/change_requests/ --users 20
+"""
+import argparse
+import asyncio
+import contextlib
+import itertools
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from collections import Counter
+import aiohttp
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "database"))
+from fake_data import DEFAULT_START_DATE, generate_chunk, iter_chunks, write_database
+from stub_llm import serve_in_thread
+
+DEFAULT_URLS = {
+    "fastapi": "http://127.0.0.1:8000/change_requests",
+    "django": "http://127.0.0.1:8000/api/change_requests/",
+}
+
+# Query parameters of the list request sent as a read: one 50-row page from either backend.
+READ_PARAMS = {"fastapi": {"limit": 50}, "django": {"page_size": 50}}
+
+def payloads(count, target, seed=0):
+    """Generated change requests shaped as each backend's POST body."""
+    records = generate_chunk((seed, 0, 0, count, DEFAULT_START_DATE, 365))
+    bodies = []
+    for record in records:
+        body = {key: value for key, value in record.items() if key not in ("category", "timestamp")}
+        if target == "django":
+            body.update(effect_on_deliverables="None", effect_on_organization="None",
+                        effect_on_schedule="None", effect_of_not_approving="None")
+            for item in body["cost_items"]:
+                item["item_description"] = item["item_description"][:255]
+        bodies.append(body)
+    return bodies
+
+class Stats:
+    def __init__(self):
+        self.latencies = []
+        self.statuses = Counter()
+        self.errors = Counter()
+        self.locked = 0
+
+    def record(self, kind, latency, status=None, body="", error=None):
+        self.latencies.append((kind, latency))
+        if error is not None:
+            self.errors[error] += 1
+            return
+        self.statuses[status] += 1
+        if status >= 400:
+            self.errors[f"HTTP {status}"] += 1
+            if "database is locked" in body:
+                self.locked += 1
+
+    def report(self, elapsed):
+        def percentiles(values):
+            values = sorted(values)
+            if not values:
+                return None
+            pick = lambda p: round(values[min(len(values) - 1, int(p * len(values)))] * 1000, 2)
+            return {"p50_ms": pick(0.5), "p95_ms": pick(0.95), "p99_ms": pick(0.99), "max_ms": round(values[-1] * 1000, 2)}
+
+        total = len(self.latencies)
+        failed = sum(self.errors.values())
+        return {
+            "requests": total,
+            "elapsed_seconds": round(elapsed, 2),
+            "throughput_rps": round(total / elapsed, 1) if elapsed else None,
+            "error_rate": round(failed / total, 4) if total else 0.0,
+            "database_locked": self.locked,
+            "statuses": {str(status): count for status, count in sorted(self.statuses.items())},
+            "errors": dict(self.errors),
+            "latency": {kind: percentiles([latency for k, latency in self.latencies if k == kind])
+                        for kind in sorted({kind for kind, _ in self.latencies})},
+        }
+
+async def run_load(url, bodies, users, duration, rate=0.0, read_fraction=0.0, timeout=30.0, seed=0, read_params=None):
+    stats = Stats()
+    start = time.perf_counter()
+    end = start + duration
+    slots = itertools.count()
+    rng = random.Random(seed)
+    # Django requires unique change numbers, and the body pool repeats, so every post gets its own.
+    run = f"{int(time.time()):x}"
+
+    async def user(session):
+        while True:
+            slot = next(slots)
+            scheduled = start + slot / rate if rate else time.perf_counter()
+            if scheduled >= end:
+                return
+            delay = scheduled - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            kind = "read" if rng.random() < read_fraction else "submit"
+            try:
+                if kind == "read":
+                    request = session.get(url, params=read_params)
+                else:
+                    request = session.post(url, json={**bodies[slot % len(bodies)], "change_number": f"LT-{run}-{slot}"})
+                async with request as response:
+                    body = await response.text()
+                stats.record(kind, time.perf_counter() - scheduled, response.status, body)
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                stats.record(kind, time.perf_counter() - scheduled, error=type(e).__name__)
+
+    connector = aiohttp.TCPConnector(limit=users)
+    async with aiohttp.ClientSession(connector=connector, timeout=aiohttp.ClientTimeout(total=timeout)) as session:
+        await asyncio.gather(*(user(session) for _ in range(users)))
+    return stats.report(time.perf_counter() - start)
+
+def wait_for(url, process, timeout=30):
+    import requests
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if process.poll() is not None:
+            raise SystemExit(f"Server exited with status {process.returncode}")
+        try:
+            if requests.get(url, timeout=1).ok:
+                return
+        except requests.RequestException:
+            time.sleep(0.2)
+    raise SystemExit(f"Server at {url} did not become healthy in {timeout}s")
+
+def spawn_fastapi(port, rows, llm_latency, seed):
+    """Start the stub LLM in-process and uvicorn on a generated database; returns (process, url)."""
+    workdir = tempfile.mkdtemp(prefix="crs-load-")
+    path = os.path.join(workdir, "change_requests.db")
+    write_database(iter_chunks(rows, seed), path)
+    _, llm_url = serve_in_thread(latency=llm_latency)
+    env = {**os.environ, "CHANGE_REQUESTS_DB": path, "TOGETHER_API_URL": llm_url,
+           "TOGETHER_API_KEY": "load-test", "LOCAL_CLASSIFIER": "0"}
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "api:app", "--port", str(port), "--log-level", "warning"],
+        cwd=os.path.dirname(os.path.abspath(__file__)), env=env,
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    wait_for(f"http://127.0.0.1:{port}/health", process)
+    return process, f"http://127.0.0.1:{port}/change_requests"
+
+def categorization_backlog(base_url):
+    import requests
+    health = requests.get(f"{base_url}/health", timeout=5).json()
+    llm = requests.get(f"{base_url}/llm/stats", timeout=5).json()
+    return {"categorization_queue": health.get("categorization_queue"), "llm": llm}
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Simulate concurrent change request submitters.")
+    parser.add_argument("--target", choices=list(DEFAULT_URLS), default="fastapi")
+    parser.add_argument("--url", help="change request collection URL (default depends on --target)")
+    parser.add_argument("--users", type=int, default=20, help="concurrent virtual users")
+    parser.add_argument("--rate", type=float, default=0.0, help="total requests per second (0: as fast as possible)")
+    parser.add_argument("--duration", type=float, default=30.0, help="seconds to generate load")
+    parser.add_argument("--read-fraction", type=float, default=0.0, help="share of requests that list instead")
+    parser.add_argument("--timeout", type=float, default=30.0, help="per-request timeout in seconds")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--spawn", action="store_true", help="start a FastAPI server with a stub LLM for the run")
+    parser.add_argument("--port", type=int, default=8010, help="port for --spawn")
+    parser.add_argument("--rows", type=int, default=10000, help="generated rows in the --spawn database")
+    parser.add_argument("--llm-latency", type=float, default=0.2, help="stub LLM seconds per call with --spawn")
+    parser.add_argument("--json", action="store_true", help="print machine-readable results")
+    args = parser.parse_args()
+
+    process = None
+    url = args.url or DEFAULT_URLS[args.target]
+    if args.spawn:
+        if args.target != "fastapi":
+            raise SystemExit("--spawn starts the FastAPI backend; run Django yourself and pass --url")
+        with contextlib.redirect_stdout(sys.stderr):
+            process, url = spawn_fastapi(args.port, args.rows, args.llm_latency, args.seed)
+    try:
+        bodies = payloads(1000, args.target, args.seed)
+        report = asyncio.run(run_load(url, bodies, args.users, args.duration, args.rate,
+                                      args.read_fraction, args.timeout, args.seed, READ_PARAMS[args.target]))
+        report.update(target=args.target, url=url, users=args.users, rate=args.rate, duration=args.duration)
+        if args.target == "fastapi":
+            try:
+                report.update(categorization_backlog(url.rsplit("/change_requests", 1)[0]))
+            except Exception as e:
+                report["backlog_error"] = str(e)
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait()
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print(f"{report['target']} {report['url']}: {report['users']} users, {report['requests']} requests "
+              f"in {report['elapsed_seconds']}s ({report['throughput_rps']} req/s)")
+        for kind, latency in report["latency"].items():
+            print(f"  {kind}: p50 {latency['p50_ms']} ms, p95 {latency['p95_ms']} ms, p99 {latency['p99_ms']} ms, "
+                  f"max {latency['max_ms']} ms")
+        print(f"  error rate {report['error_rate']:.2%}, database locked {report['database_locked']}, "
+              f"statuses {report['statuses']}, errors {report['errors']}")
+        if "categorization_queue" in report:
+            print(f"  categorization queue after run: {report['categorization_queue']}, "
+                  f"LLM calls {report['llm']['calls']} (p95 {report['llm']['latency_p95']}s)")
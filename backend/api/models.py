@@ -0,0 +1,37 @@
+from pydantic import BaseModel, ConfigDict, model_validator
+
+class CostItem(BaseModel):
+    # Unknown keys are an error rather than silently dropped, so no amounts are lost.
+    model_config = ConfigDict(extra="forbid")
+
+    item_description: str = ""
+    hours_reduction: int = 0
+    hours_increase: int = 0
+    dollars_reduction: float = 0.0
+    dollars_increase: float = 0.0
+
+    @model_validator(mode="before")
+    @classmethod
+    def legacy_keys(cls, data):
+        """Read {"item", "cost"} from older payloads as the description and a dollar increase, as db.cost_item_values does.
+
+        A legacy key sent alongside its replacement is left in place and rejected as unknown.
+        """
+        if isinstance(data, dict) and ("item" in data or "cost" in data):
+            data = dict(data)
+            if "item" in data and "item_description" not in data:
+                data["item_description"] = data.pop("item")
+            if "cost" in data and "dollars_increase" not in data:
+                data["dollars_increase"] = data.pop("cost")
+        return data
+
+class ChangeRequest(BaseModel):
+    project_name: str
+    change_number: str
+    requested_by: str
+    date_of_request: str
+    presented_to: str
+    change_name: str
+    description: str
+    reason: str
+    cost_items: list[CostItem]
@@ -0,0 +1,161 @@
+import base64
+import json
+
+FIELDS = ["id", "project_name", "change_number", "requested_by", "date_of_request", "presented_to",
+          "change_name", "description", "reason", "cost_items", "category", "timestamp"]
+
+# sort name -> (column, descending)
+ORDERS = {
+    "id": ("id", False),
+    "-id": ("id", True),
+    "date_of_request": ("date_of_request", False),
+    "-date_of_request": ("date_of_request", True),
+}
+
+MAX_PAGE_SIZE = 500
+
+def encode_cursor(order, row):
+    column, _ = ORDERS[order]
+    return base64.urlsafe_b64encode(json.dumps([order, row[column], row["id"]]).encode()).decode()
+
+def decode_cursor(cursor, order):
+    """Return (value, id) from a cursor, raising ValueError if it is malformed or from another ordering."""
+    try:
+        cursor_order, value, last_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except (ValueError, TypeError) as e:
+        raise ValueError(f"Invalid cursor: {e}")
+    if cursor_order != order:
+        raise ValueError(f"Cursor was issued for order {cursor_order!r}, not {order!r}")
+    return value, last_id
+
+def parse_fields(fields):
+    """Validate a comma-separated projection; id is always included so cursors can be built."""
+    if not fields:
+        return list(FIELDS)
+    requested = [field.strip() for field in fields.split(",") if field.strip()]
+    unknown = [field for field in requested if field not in FIELDS]
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+    return ["id"] + [field for field in requested if field != "id"]
+
+def parse_ids(ids):
+    """Parse a comma-separated id list, at most one page of them."""
+    try:
+        parsed = sorted({int(part) for part in ids.split(",") if part.strip()})
+    except ValueError:
+        raise ValueError("ids must be a comma-separated list of integers")
+    if len(parsed) > MAX_PAGE_SIZE:
+        raise ValueError(f"At most {MAX_PAGE_SIZE} ids can be requested at once")
+    return parsed
+
+def filter_clause(project_name=None, requested_by=None, category=None, date_from=None, date_to=None, since_id=None,
+                  ids=None):
+    """Build a WHERE clause and parameters from the supported filters.
+
+    Project and requester names match case-insensitively, using their NOCASE indexes.
+    """
+    conditions, params = [], []
+    if since_id is not None:
+        conditions.append("id > ?")
+        params.append(since_id)
+    if ids is not None:
+        conditions.append(f"id IN ({', '.join('?' for _ in ids)})" if ids else "0")
+        params.extend(ids)
+    for column, value in (("project_name", project_name), ("requested_by", requested_by)):
+        if value is not None:
+            conditions.append(f"{column} = ? COLLATE NOCASE")
+            params.append(value)
+    if category is not None:
+        conditions.append("category = ?")
+        params.append(category)
+    if date_from is not None:
+        conditions.append("date_of_request >= ?")
+        params.append(date_from)
+    if date_to is not None:
+        conditions.append("date_of_request <= ?")
+        params.append(date_to)
+    return conditions, params
+
+def list_change_requests(conn, fields=None, order="id", cursor=None, limit=50, **filters):
+    """Fetch one page of change requests using keyset pagination.
+
+    Pages are continued with the returned cursor, which records the sort value
+    and id of the last row, so any page costs one index seek regardless of depth.
+    Returns (rows, next_cursor); next_cursor is None on the last page.
+    """
+    if order not in ORDERS:
+        raise ValueError(f"order must be one of {list(ORDERS)}")
+    columns = parse_fields(fields)
+    column, descending = ORDERS[order]
+    if column not in columns:
+        columns.append(column)
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+
+    conditions, params = filter_clause(**filters)
+    if cursor:
+        value, last_id = decode_cursor(cursor, order)
+        comparison = "<" if descending else ">"
+        if column == "id":
+            conditions.append(f"id {comparison} ?")
+            params.append(last_id)
+        else:
+            conditions.append(f"({column}, id) {comparison} (?, ?)")
+            params.extend([value, last_id])
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+    direction = "DESC" if descending else "ASC"
+    order_by = "id" if column == "id" else f"{column} {direction}, id"
+    rows = conn.execute(
+        f"SELECT {', '.join(columns)} FROM change_requests {where} ORDER BY {order_by} {direction} LIMIT ?",
+        (*params, limit + 1)
+    ).fetchall()
+
+    items = [dict(zip(columns, row)) for row in rows[:limit]]
+    for item in items:
+        if "cost_items" in item and item["cost_items"] is not None:
+            try:
+                item["cost_items"] = json.loads(item["cost_items"])
+            except ValueError:
+                pass
+    next_cursor = encode_cursor(order, items[-1]) if len(rows) > limit else None
+    return items, next_cursor
+
+def change_request_stats(conn, top=10, **filters):
+    """Compute dashboard aggregates in SQL: counts per project, category and month,
+    cost totals and the top requesters, restricted by the list filters."""
+    conditions, params = filter_clause(**filters)
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+
+    def grouped(expression, limit=None):
+        sql = (f"SELECT {expression} AS name, COUNT(*) AS count FROM change_requests {where} "
+               f"GROUP BY name ORDER BY count DESC, name")
+        if limit:
+            sql += f" LIMIT {int(limit)}"
+        return [{"name": name, "count": count} for name, count in conn.execute(sql, params)]
+
+    total = conn.execute(f"SELECT COUNT(*) FROM change_requests {where}", params).fetchone()[0]
+    cost_filter = f"WHERE ci.change_request_id IN (SELECT id FROM change_requests {where})" if where else ""
+    costs = conn.execute(
+        f"""SELECT COALESCE(SUM(ci.hours_increase), 0), COALESCE(SUM(ci.hours_reduction), 0),
+                   COALESCE(SUM(ci.dollars_increase), 0), COALESCE(SUM(ci.dollars_reduction), 0)
+            FROM cost_items ci {cost_filter}""",
+        params
+    ).fetchone()
+    months = conn.execute(
+        f"SELECT substr(date_of_request, 1, 7) AS month, COUNT(*) FROM change_requests {where} "
+        f"GROUP BY month ORDER BY month",
+        params
+    ).fetchall()
+    return {
+        "total": total,
+        "per_project": grouped("project_name", top),
+        "per_category": grouped("category"),
+        "per_month": [{"month": month, "count": count} for month, count in months],
+        "top_requesters": grouped("requested_by", top),
+        "costs": {
+            "hours_increase": costs[0],
+            "hours_reduction": costs[1],
+            "dollars_increase": costs[2],
+            "dollars_reduction": costs[3],
+            "net_dollars_increase": costs[2] - costs[3],
+        },
+    }
@@ -0,0 +1,36 @@
+import threading
+import time
+
+class StatsCache:
+    """Memoize aggregate query results until the data changes.
+
+    invalidate() is called from every write path. The ttl bounds staleness when
+    several API processes share one database and only one of them saw the write.
+    """
+
+    def __init__(self, ttl=60.0, max_entries=256):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def get_or_compute(self, key, compute):
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and now - entry[0] < self.ttl:
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+        value = compute()
+        with self._lock:
+            if len(self._entries) >= self.max_entries:
+                self._entries.clear()
+            self._entries[key] = (now, value)
+        return value
+
+    def invalidate(self):
+        with self._lock:
+            self._entries.clear()
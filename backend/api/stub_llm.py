@@ -0,0 +1,130 @@
+"""Local stand-in for the Together completions API.
+
+Run it and point the backend at it to exercise categorization offline:
+
+    python stub_llm.py --port 8001
+    TOGETHER_API_URL=http://127.0.0.1:8001/v1/completions uvicorn api:app
+
+Requests with "stream": true are answered as server-sent events, one word per
+event. --fail-every N answers every Nth request with --fail-status (503 by
+default), sending --retry-after as a Retry-After header when given, to exercise
+retries.
+"""
+import argparse
+import json
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+KEYWORDS = {
+    "hardware issue": ["printer", "server", "laptop", "disk", "monitor", "hardware", "network", "cable", "keyboard"],
+    "software issue": ["bug", "crash", "software", "update", "install", "login", "database", "error", "app"],
+    "personnel issue": ["staff", "hire", "training", "team", "manager", "personnel", "schedule", "employee"],
+}
+
+def classify(description):
+    """Pick a category from keywords in the description, 'other' when nothing matches."""
+    text = description.lower()
+    for category, words in KEYWORDS.items():
+        if any(word in text for word in words):
+            return category
+    return "other"
+
+NUMBERED = re.compile(r"^(\d+)\. (.*)$", re.MULTILINE)
+
+def complete(prompt, drop_every=0):
+    """Answer a single-description or numbered batch classification prompt."""
+    if "Descriptions:\n" in prompt:
+        body = prompt.split("Descriptions:\n", 1)[1].split("\n\nCategories:", 1)[0]
+        lines = []
+        for number, description in NUMBERED.findall(body):
+            if drop_every and int(number) % drop_every == 0:
+                continue
+            lines.append(f"{number}. {classify(description)}")
+        return "\n".join(lines)
+    if "Description:" in prompt:
+        description = prompt.rsplit("Description:", 1)[1].rsplit("Category:", 1)[0]
+        return " " + classify(description)
+    return "This is a stub answer."
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, so clients can reuse connections
+    drop_every = 0
+    latency = 0.0
+    fail_every = 0
+    fail_status = 503
+    retry_after = None
+    requests_served = 0
+    counter_lock = threading.Lock()
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        payload = json.loads(self.rfile.read(length) or b"{}")
+        with self.counter_lock:
+            type(self).requests_served += 1
+            number = type(self).requests_served
+        if self.latency:
+            time.sleep(self.latency)
+        if self.fail_every and number % self.fail_every == 0:
+            headers = {"Retry-After": self.retry_after} if self.retry_after is not None else {}
+            self._send_json(self.fail_status, {"error": "stub failure"}, headers)
+            return
+        prompt = payload.get("prompt", "")
+        text = complete(prompt, self.drop_every)
+        usage = {"prompt_tokens": len(prompt.split()), "completion_tokens": len(text.split())}
+        if payload.get("stream"):
+            self._send_stream(text, usage)
+        else:
+            self._send_json(200, {"choices": [{"text": text, "finish_reason": "stop"}], "usage": usage})
+
+    def _send_json(self, status, data, headers=None):
+        body = json.dumps(data).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_stream(self, text, usage):
+        events = [{"choices": [{"text": word}]} for word in re.findall(r"\s*\S+", text)]
+        events.append({"choices": [{"text": "", "finish_reason": "stop"}], "usage": usage})
+        body = "".join(f"data: {json.dumps(event)}\n\n" for event in events) + "data: [DONE]\n\n"
+        body = body.encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+def configured_handler(drop_every=0, latency=0.0, fail_every=0, fail_status=503, retry_after=None):
+    return type("ConfiguredStubHandler", (StubHandler,), {
+        "drop_every": drop_every, "latency": latency, "fail_every": fail_every,
+        "fail_status": fail_status, "retry_after": retry_after,
+        "requests_served": 0, "counter_lock": threading.Lock(),
+    })
+
+def serve_in_thread(port=0, drop_every=0, latency=0.0, fail_every=0, fail_status=503, retry_after=None):
+    """Start the stub on a daemon thread and return (server, completions_url)."""
+    handler = configured_handler(drop_every, latency, fail_every, fail_status, retry_after)
+    server = ThreadingHTTPServer(("127.0.0.1", port), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}/v1/completions"
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve a stub completions API for offline testing.")
+    parser.add_argument("--port", type=int, default=8001)
+    parser.add_argument("--drop-every", type=int, default=0, help="omit every Nth label from batch answers")
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds to sleep before answering")
+    parser.add_argument("--fail-every", type=int, default=0, help="answer every Nth request with an error")
+    parser.add_argument("--fail-status", type=int, default=503, help="HTTP status of the --fail-every errors")
+    parser.add_argument("--retry-after", default=None, help="Retry-After header sent with the errors")
+    args = parser.parse_args()
+    handler = configured_handler(args.drop_every, args.latency, args.fail_every, args.fail_status, args.retry_after)
+    print(f"Stub LLM listening on http://127.0.0.1:{args.port}/v1/completions")
+    ThreadingHTTPServer(("127.0.0.1", args.port), handler).serve_forever()
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# The API modules import each other as top-level modules, as under uvicorn api:app.
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
@@ -0,0 +1,68 @@
+"""Offline tests for batch categorization: no LLM is called.
+
+    python -m pytest tests/test_categorizer.py
+"""
+import unittest
+from unittest.mock import patch
+from categorizer import build_batch_prompt, parse_batch_answer, request_categories
+
+class ParseBatchAnswerTests(unittest.TestCase):
+    def test_numbered_lines(self):
+        text = "1. hardware issue\n2. software issue\n3. personnel issue"
+        self.assertEqual(parse_batch_answer(text, 3), ["hardware issue", "software issue", "personnel issue"])
+
+    def test_separators_and_case(self):
+        text = "1) Hardware Issue\n2: software issue.\n 3 - OTHER"
+        self.assertEqual(parse_batch_answer(text, 3), ["hardware issue", "software issue", "other"])
+
+    def test_shuffled_lines(self):
+        text = "3. other\n1. software issue\n2. hardware issue"
+        self.assertEqual(parse_batch_answer(text, 3), ["software issue", "hardware issue", "other"])
+
+    def test_missing_lines(self):
+        self.assertEqual(parse_batch_answer("2. hardware issue", 3), [None, "hardware issue", None])
+
+    def test_malformed_lines(self):
+        text = "Here are the categories:\n1. a printer thing\nhardware issue\n0. software issue\n4. other\n2. other"
+        self.assertEqual(parse_batch_answer(text, 3), [None, "other", None])
+
+    def test_first_answer_for_a_number_wins(self):
+        self.assertEqual(parse_batch_answer("1. other\n1. hardware issue", 1), ["other"])
+
+class RequestCategoriesFallbackTests(unittest.TestCase):
+    descriptions = ["Replace the disk", "Patch the compiler", "Hire a tester"]
+
+    def fake_complete(self, answers, calls):
+        def complete(prompt, max_tokens, stop):
+            calls.append(prompt)
+            if prompt == build_batch_prompt(self.descriptions):
+                return answers
+            return "personnel issue" if "Hire a tester" in prompt else "other"
+        return complete
+
+    def test_one_call_when_the_batch_answer_is_complete(self):
+        calls = []
+        answer = "1. hardware issue\n2. software issue\n3. personnel issue"
+        with patch("categorizer._complete", self.fake_complete(answer, calls)):
+            labels = request_categories(self.descriptions)
+        self.assertEqual(labels, ["hardware issue", "software issue", "personnel issue"])
+        self.assertEqual(len(calls), 1)
+
+    def test_missing_items_fall_back_to_single_calls(self):
+        calls = []
+        answer = "2. software issue\n1. hardware issue\n3. not sure"
+        with patch("categorizer._complete", self.fake_complete(answer, calls)):
+            labels = request_categories(self.descriptions)
+        self.assertEqual(labels, ["hardware issue", "software issue", "personnel issue"])
+        self.assertEqual(len(calls), 2)
+        self.assertIn("Hire a tester", calls[1])
+
+    def test_duplicates_are_asked_once(self):
+        calls = []
+        with patch("categorizer._complete", self.fake_complete("", calls)):
+            labels = request_categories(["Hire a tester", "Hire a tester"])
+        self.assertEqual(labels, ["personnel issue", "personnel issue"])
+        self.assertEqual(len(calls), 1)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,63 @@
+"""Tests for the persistent categorization cache.
+
+    python -m pytest tests/test_category_cache.py
+"""
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+from category_cache import CategoryCache, normalize_description
+from db import ConnectionPool
+
+class CategoryCacheTests(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.pool = ConnectionPool(os.path.join(self.directory.name, "cache.db"))
+
+    def tearDown(self):
+        self.pool.close_all()
+        self.directory.cleanup()
+
+    def test_miss_then_hit(self):
+        cache = CategoryCache(self.pool, "v1")
+        self.assertIsNone(cache.get("The printer jams"))
+        cache.put("The printer jams", "hardware issue")
+        self.assertEqual(cache.get("The printer jams"), "hardware issue")
+        stats = cache.stats()
+        self.assertEqual((stats["size"], stats["hits"], stats["misses"], stats["hit_rate"]), (1, 1, 1, 0.5))
+
+    def test_near_identical_descriptions_share_a_key(self):
+        self.assertEqual(normalize_description("  The Printer,  JAMS!\n"), "the printer jams")
+        cache = CategoryCache(self.pool, "v1")
+        cache.put("The printer jams.", "hardware issue")
+        self.assertEqual(cache.get("the PRINTER   jams"), "hardware issue")
+        self.assertNotEqual(cache.key("the printer jams"), cache.key("the printer jammed"))
+
+    def test_a_new_version_clears_the_cache(self):
+        CategoryCache(self.pool, "v1").put("The printer jams", "hardware issue")
+        self.assertEqual(CategoryCache(self.pool, "v1").get("The printer jams"), "hardware issue")
+        cache = CategoryCache(self.pool, "v2")
+        self.assertIsNone(cache.get("The printer jams"))
+        self.assertEqual(cache.stats()["size"], 0)
+
+    def test_expired_entries_are_misses(self):
+        cache = CategoryCache(self.pool, "v1", ttl=60)
+        with patch("category_cache.time.time", return_value=1000.0):
+            cache.put("The printer jams", "hardware issue")
+        with patch("category_cache.time.time", return_value=1061.0):
+            self.assertIsNone(cache.get("The printer jams"))
+        self.assertEqual(cache.stats()["size"], 0)
+
+    def test_least_recently_used_entries_are_evicted(self):
+        cache = CategoryCache(self.pool, "v1", max_entries=2)
+        for second, description in enumerate(["one", "two", "three"]):
+            with patch("category_cache.time.time", return_value=1000.0 + second):
+                cache.put(description, "other")
+        with patch("category_cache.time.time", return_value=1010.0):
+            cache.get("one")
+            self.assertEqual(cache.evict(), 1)
+            self.assertEqual(cache.get("one"), "other")
+            self.assertIsNone(cache.get("two"))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,86 @@
+"""Tests for the local classifier's confidence and training data.
+
+    python -m pytest tests/test_classifier.py
+"""
+import random
+import sqlite3
+import unittest
+from classifier import CentroidClassifier, load_training_rows
+from db import create_schema
+
+TEMPLATES = {
+    "hardware issue": (["The build server", "A developer laptop", "The backup disk", "The edge router"],
+                       ["needs to be replaced", "overheats during nightly jobs", "has a failing power supply"]),
+    "software issue": (["The login service", "The billing app", "The mobile app", "The customer portal"],
+                       ["crashes after the latest update", "needs a security patch", "has a bug in the export step"]),
+    "personnel issue": (["The QA team", "The support staff", "Two contractors", "The night shift"],
+                        ["needs additional training", "is understaffed for the release", "requires a new hire"]),
+}
+FILLER = "alpha bravo charlie delta echo foxtrot golf hotel india juliet kilo lima mike".split()
+
+def generate(count, seed):
+    rng = random.Random(seed)
+    rows = []
+    for _ in range(count):
+        category = rng.choice(sorted(TEMPLATES))
+        subjects, problems = TEMPLATES[category]
+        filler = " ".join(rng.sample(FILLER, 4))
+        rows.append((f"{rng.choice(subjects)} {rng.choice(problems)}. {filler}.", category))
+    return rows
+
+class CentroidClassifierTests(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        rows = generate(1500, seed=1)
+        cls.classifier = CentroidClassifier().fit([d for d, _ in rows], [label for _, label in rows])
+
+    def test_calibration_sets_temperature_and_margin(self):
+        self.assertGreater(self.classifier.temperature, 0)
+        self.assertGreater(self.classifier.min_margin, 0)
+
+    def test_held_out_rows_are_mostly_confident_and_correct(self):
+        rows = generate(200, seed=2)
+        accepted = [(self.classifier.predict(d), label) for d, label in rows]
+        accepted = [(category, label) for (category, confidence), label in accepted if confidence >= 0.6]
+        self.assertGreaterEqual(len(accepted), 0.95 * len(rows))
+        self.assertTrue(all(category == label for category, label in accepted))
+
+    def test_weak_evidence_falls_through(self):
+        for description in ["Update the project schedule", "Our vendor raised prices", "", "The app"]:
+            self.assertEqual(self.classifier.predict(description)[1], 0.0, description)
+
+    def test_probabilities_sum_to_one(self):
+        probabilities = self.classifier.predict_proba("The billing app needs a security patch")
+        self.assertAlmostEqual(sum(probabilities.values()), 1.0)
+        self.assertEqual(max(probabilities, key=probabilities.get), "software issue")
+
+class SkewedLabelTests(unittest.TestCase):
+    descriptions = [f"The backup disk {i} needs to be replaced" for i in range(9)] + ["The billing app crashes"]
+    labels = ["hardware issue"] * 9 + ["software issue"]
+
+    def test_a_rare_label_stays_in_the_training_split(self):
+        for seed in range(10):
+            classifier = CentroidClassifier(seed=seed).fit(self.descriptions, self.labels)
+            self.assertEqual(classifier.labels, ["hardware issue", "software issue"])
+            self.assertGreater(classifier.temperature, 0)
+
+    def test_a_single_label_skips_calibration(self):
+        classifier = CentroidClassifier().fit(self.descriptions[:9], self.labels[:9])
+        self.assertEqual((classifier.temperature, classifier.min_margin), (1.0, 0.0))
+        self.assertEqual(classifier.predict("The backup disk failed"), ("hardware issue", 1.0))
+
+class LoadTrainingRowsTests(unittest.TestCase):
+    def test_rows_labelled_by_the_classifier_or_fallback_are_excluded(self):
+        conn = sqlite3.connect(":memory:")
+        create_schema(conn)
+        conn.executemany(
+            "INSERT INTO change_requests (description, category, category_source) VALUES (?, ?, ?)",
+            [("legacy", "other", None), ("from llm", "software issue", "llm"),
+             ("from classifier", "software issue", "classifier"), ("failed", "other", "fallback"),
+             ("waiting", "pending", None)],
+        )
+        rows = load_training_rows(conn, ["software issue", "other"])
+        self.assertEqual(sorted(description for description, _ in rows), ["from llm", "legacy"])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,88 @@
+"""Tests for bulk ingestion's per-row error reporting.
+
+    python -m pytest tests/test_ingest.py
+"""
+import csv
+import io
+import json
+import os
+import tempfile
+import unittest
+from db import ConnectionPool, create_schema
+from ingest import ingest
+
+def record(number, **changes):
+    return {"project_name": "Alpha", "change_number": f"CR-{number}", "requested_by": "Alice Smith",
+            "date_of_request": "2024-01-02", "presented_to": "Bob Jones", "change_name": "Swap disk",
+            "description": "The backup disk needs to be replaced", "reason": "Failing",
+            "cost_items": [{"item_description": "disk", "dollars_increase": 120.0}], **changes}
+
+def jsonl(*lines):
+    return io.StringIO("".join(line + "\n" for line in lines))
+
+def csv_text(records):
+    out = io.StringIO()
+    writer = csv.DictWriter(out, fieldnames=list(record(0)))
+    writer.writeheader()
+    for row in records:
+        writer.writerow(row)
+    return io.StringIO(out.getvalue())
+
+class IngestTests(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.pool = ConnectionPool(os.path.join(self.directory.name, "change_requests.db"))
+        with self.pool.connection() as conn:
+            create_schema(conn)
+            # Lets a test make one row fail at insert time, after it passed validation.
+            conn.execute("CREATE TRIGGER reject_bad BEFORE INSERT ON change_requests "
+                         "WHEN new.change_number = 'CR-BAD' BEGIN SELECT RAISE(ABORT, 'rejected by test'); END")
+
+    def tearDown(self):
+        self.pool.close_all()
+        self.directory.cleanup()
+
+    def stored(self):
+        with self.pool.connection() as conn:
+            rows = conn.execute("SELECT change_number, category FROM change_requests ORDER BY id").fetchall()
+            cost_items = conn.execute("SELECT COUNT(*) FROM cost_items").fetchone()[0]
+        return rows, cost_items
+
+    def test_jsonl_errors_are_reported_by_line_and_valid_rows_inserted(self):
+        text = jsonl(json.dumps(record(1)), "{not json", "", json.dumps(record(2, project_name=None)),
+                     json.dumps(record(3)))
+        summary = ingest(self.pool, text, "jsonl")
+        self.assertEqual((summary["inserted"], summary["failed"], summary["errors_truncated"]), (2, 2, False))
+        self.assertEqual([error["line"] for error in summary["errors"]], [2, 4])
+        self.assertIn("invalid JSON", summary["errors"][0]["error"])
+        self.assertIn("project_name", summary["errors"][1]["error"])
+        self.assertEqual(self.stored(), ([("CR-1", "pending"), ("CR-3", "pending")], 2))
+
+    def test_csv_errors_are_reported_by_line(self):
+        rows = [record(1), record(2, cost_items="[broken"), record(3, date_of_request="")]
+        rows = [{**row, "cost_items": row["cost_items"] if isinstance(row["cost_items"], str)
+                 else json.dumps(row["cost_items"])} for row in rows]
+        summary = ingest(self.pool, csv_text(rows), "csv", category="other")
+        self.assertEqual((summary["inserted"], summary["failed"]), (2, 1))
+        self.assertEqual(summary["errors"][0]["line"], 3)
+        self.assertIn("cost_items is not valid JSON", summary["errors"][0]["error"])
+        self.assertEqual(self.stored()[0], [("CR-1", "other"), ("CR-3", "other")])
+
+    def test_a_rejected_row_does_not_abort_its_chunk(self):
+        text = jsonl(*(json.dumps(record(number)) for number in (1, "BAD", 3, 4)))
+        summary = ingest(self.pool, text, "jsonl", chunk_size=3)
+        self.assertEqual((summary["inserted"], summary["failed"]), (3, 1))
+        self.assertEqual(summary["errors"][0]["line"], 2)
+        self.assertIn("rejected by test", summary["errors"][0]["error"])
+        self.assertEqual(self.stored(), ([("CR-1", "pending"), ("CR-3", "pending"), ("CR-4", "pending")], 3))
+
+    def test_reported_errors_are_capped(self):
+        summary = ingest(self.pool, jsonl(*["{"] * 5), "jsonl", max_errors=2)
+        self.assertEqual((summary["failed"], len(summary["errors"]), summary["errors_truncated"]), (5, 2, True))
+
+    def test_unknown_format_is_rejected(self):
+        with self.assertRaises(ValueError):
+            ingest(self.pool, jsonl(), "xml")
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,124 @@
+"""Tests for the LLM client against stub_llm.py served on a local port.
+
+    python -m pytest tests/test_llm_client.py
+"""
+import asyncio
+import time
+import unittest
+from llm_client import LLMClient, LLMError
+from stub_llm import serve_in_thread
+
+class StubServerTestCase(unittest.TestCase):
+    stub_options = {}
+    client_options = {"backoff": 0.01, "max_retries": 3, "timeout": 10}
+
+    def setUp(self):
+        self.server, url = serve_in_thread(**self.stub_options)
+        self.client = LLMClient(url=url, api_key="test", **self.client_options)
+
+    def tearDown(self):
+        self.client.close()
+        self.server.shutdown()
+        self.server.server_close()
+
+    def served(self):
+        return self.server.RequestHandlerClass.requests_served
+
+class CompleteTests(StubServerTestCase):
+    def test_completion_text_and_usage(self):
+        self.assertEqual(self.client.complete("Description: the printer jams\nCategory:"), " hardware issue")
+        stats = self.client.stats()
+        self.assertEqual((stats["calls"], stats["errors"], stats["retries"]), (1, 0, 0))
+        self.assertGreater(stats["prompt_tokens"], 0)
+
+class RetryOn503Tests(StubServerTestCase):
+    stub_options = {"fail_every": 2}
+
+    def test_503_is_retried_and_counted(self):
+        for _ in range(3):
+            self.assertEqual(self.client.complete("Description: a new hire\nCategory:"), " personnel issue")
+        stats = self.client.stats()
+        # Requests 2 and 4 fail and are each retried once.
+        self.assertEqual(self.served(), 5)
+        self.assertEqual((stats["calls"], stats["errors"], stats["retries"]), (5, 2, 2))
+
+class RetryAfterTests(StubServerTestCase):
+    stub_options = {"fail_every": 2, "fail_status": 429, "retry_after": "0"}
+    client_options = {"backoff": 30.0, "max_retries": 3, "timeout": 10}
+
+    def test_429_waits_for_retry_after_instead_of_backoff(self):
+        self.client.complete("first")
+        start = time.perf_counter()
+        self.assertEqual(self.client.complete("second"), "This is a stub answer.")
+        self.assertLess(time.perf_counter() - start, 5)
+        self.assertEqual(self.client.stats()["retries"], 1)
+
+class RetryAfterCapTests(StubServerTestCase):
+    stub_options = {"fail_every": 2, "fail_status": 429, "retry_after": "3600"}
+    client_options = {"backoff": 0.01, "max_retries": 3, "timeout": 10, "max_backoff": 0.05}
+
+    def test_retry_after_is_capped_at_max_backoff(self):
+        self.client.complete("first")
+        start = time.perf_counter()
+        self.assertEqual(self.client.complete("second"), "This is a stub answer.")
+        self.assertLess(time.perf_counter() - start, 5)
+        self.assertEqual(self.client.stats()["retries"], 1)
+
+    def test_backoff_never_exceeds_max_backoff(self):
+        self.assertLessEqual(max(self.client._retry_delay(attempt) for attempt in range(20)), 0.05)
+
+class RetriesExhaustedTests(StubServerTestCase):
+    stub_options = {"fail_every": 1}
+    client_options = {"backoff": 0.01, "max_retries": 2, "timeout": 10}
+
+    def test_error_after_the_last_retry(self):
+        with self.assertRaises(LLMError) as caught:
+            self.client.complete("anything")
+        self.assertEqual(caught.exception.status, 503)
+        self.assertEqual(self.served(), 3)
+        self.assertEqual(self.client.stats()["retries"], 2)
+
+class NonRetryableStatusTests(StubServerTestCase):
+    stub_options = {"fail_every": 1, "fail_status": 400}
+
+    def test_client_errors_are_not_retried(self):
+        with self.assertRaises(LLMError) as caught:
+            self.client.complete("anything")
+        self.assertEqual(caught.exception.status, 400)
+        self.assertIn("HTTP 400", str(caught.exception))
+        self.assertEqual(self.served(), 1)
+        self.assertEqual(self.client.stats()["retries"], 0)
+
+class ConnectionErrorTests(unittest.TestCase):
+    def test_unreachable_server_raises_llm_error_without_status(self):
+        server, url = serve_in_thread()
+        server.server_close()
+        client = LLMClient(url=url, api_key="test", backoff=0.01, max_retries=1, timeout=5)
+        try:
+            with self.assertRaises(LLMError) as caught:
+                client.complete("anything")
+            self.assertIsNone(caught.exception.status)
+            self.assertEqual(client.stats()["retries"], 1)
+        finally:
+            client.close()
+
+class StreamTests(StubServerTestCase):
+    stub_options = {"fail_every": 2}
+
+    def collect(self, prompt):
+        async def run():
+            return [chunk async for chunk in self.client.astream(prompt)]
+        return asyncio.run(run())
+
+    def test_server_sent_events_are_parsed_into_chunks(self):
+        chunks = self.collect("tell me something")
+        self.assertEqual(chunks, ["This", " is", " a", " stub", " answer."])
+        self.assertEqual(self.client.stats()["completion_tokens"], 5)
+
+    def test_failed_connection_attempt_is_retried(self):
+        self.collect("first")
+        self.assertEqual("".join(self.collect("second")), "This is a stub answer.")
+        self.assertEqual(self.client.stats()["retries"], 1)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,47 @@
+"""Tests for request body validation of change requests and cost items.
+
+    python -m pytest tests/test_models.py
+"""
+import io
+import json
+import os
+import tempfile
+import unittest
+from pydantic import ValidationError
+from db import ConnectionPool, create_schema
+from ingest import ingest
+from models import ChangeRequest, CostItem
+
+class CostItemTests(unittest.TestCase):
+    def test_legacy_item_and_cost_keys_are_mapped(self):
+        item = CostItem.model_validate({"item": "w", "cost": 5})
+        self.assertEqual((item.item_description, item.dollars_increase), ("w", 5.0))
+
+    def test_legacy_and_current_keys_together_are_rejected(self):
+        with self.assertRaises(ValidationError):
+            CostItem.model_validate({"item": "old", "item_description": "new"})
+
+    def test_unknown_keys_are_rejected(self):
+        with self.assertRaises(ValidationError) as caught:
+            CostItem.model_validate({"item_description": "disk", "price": 120})
+        self.assertEqual(caught.exception.errors()[0]["loc"], ("price",))
+
+class LegacyPayloadTests(unittest.TestCase):
+    def test_legacy_cost_items_are_stored_not_zeroed(self):
+        body = {"project_name": "Alpha", "change_number": "CR-1", "requested_by": "Alice Smith",
+                "date_of_request": "2024-01-02", "presented_to": "Bob Jones", "change_name": "Widget",
+                "description": "Buy a widget", "reason": "Needed", "cost_items": [{"item": "w", "cost": 5}]}
+        ChangeRequest.model_validate(body)
+        with tempfile.TemporaryDirectory() as directory:
+            pool = ConnectionPool(os.path.join(directory, "change_requests.db"))
+            try:
+                create_schema(pool.get())
+                summary = ingest(pool, io.StringIO(json.dumps(body) + "\n"), "jsonl")
+                self.assertEqual(summary["inserted"], 1)
+                stored = pool.get().execute("SELECT item_description, dollars_increase FROM cost_items").fetchall()
+            finally:
+                pool.close_all()
+        self.assertEqual(stored, [("w", 5.0)])
+
+if __name__ == "__main__":
+    unittest.main()
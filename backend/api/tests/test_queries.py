@@ -0,0 +1,59 @@
+"""Tests for the read API's filters, run against an in-memory database.
+
+    python -m pytest tests/test_queries.py
+"""
+import sqlite3
+import unittest
+from db import create_schema
+from queries import MAX_PAGE_SIZE, change_request_stats, filter_clause, list_change_requests, parse_ids
+
+class NameFilterTests(unittest.TestCase):
+    def setUp(self):
+        self.conn = sqlite3.connect(":memory:")
+        create_schema(self.conn)
+        self.conn.executemany(
+            "INSERT INTO change_requests (project_name, requested_by, date_of_request, category) VALUES (?, ?, ?, ?)",
+            [("Alpha", "Alice Smith", "2024-01-02", "other"), ("Alpha", "Bob Jones", "2024-02-03", "other"),
+             ("Beta", "Alice Smith", "2024-03-04", "software issue")],
+        )
+
+    def test_names_match_case_insensitively(self):
+        items, _ = list_change_requests(self.conn, project_name="alpha")
+        self.assertEqual(len(items), 2)
+        items, _ = list_change_requests(self.conn, requested_by="ALICE SMITH")
+        self.assertEqual(len(items), 2)
+
+    def test_stats_for_a_lowercased_project(self):
+        stats = change_request_stats(self.conn, project_name="alpha", requested_by="alice smith")
+        self.assertEqual(stats["per_project"], [{"name": "Alpha", "count": 1}])
+
+    def test_name_filters_use_an_index(self):
+        for filters in ({"project_name": "alpha"}, {"requested_by": "alice smith"}):
+            conditions, params = filter_clause(**filters)
+            plan = self.conn.execute(
+                f"EXPLAIN QUERY PLAN SELECT id FROM change_requests WHERE {' AND '.join(conditions)} ORDER BY id",
+                params,
+            ).fetchall()
+            self.assertTrue(any("INDEX" in row[-1] for row in plan), plan)
+
+class IdsFilterTests(unittest.TestCase):
+    def setUp(self):
+        self.conn = sqlite3.connect(":memory:")
+        create_schema(self.conn)
+        self.conn.executemany("INSERT INTO change_requests (category) VALUES (?)", [("pending",), ("other",), ("pending",)])
+
+    def test_only_the_requested_rows_are_listed(self):
+        items, _ = list_change_requests(self.conn, fields="category", limit=MAX_PAGE_SIZE, ids=parse_ids("3, 1,1"))
+        self.assertEqual(items, [{"id": 1, "category": "pending"}, {"id": 3, "category": "pending"}])
+
+    def test_an_empty_id_list_matches_nothing(self):
+        self.assertEqual(list_change_requests(self.conn, ids=parse_ids(""))[0], [])
+
+    def test_invalid_or_too_many_ids_are_rejected(self):
+        with self.assertRaises(ValueError):
+            parse_ids("1,two")
+        with self.assertRaises(ValueError):
+            parse_ids(",".join(str(i) for i in range(MAX_PAGE_SIZE + 1)))
+
+if __name__ == "__main__":
+    unittest.main()
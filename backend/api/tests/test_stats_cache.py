@@ -0,0 +1,70 @@
+"""Tests that cached dashboard aggregates are recomputed after writes.
+
+    python -m pytest tests/test_stats_cache.py
+"""
+import importlib
+import json
+import os
+import sys
+import tempfile
+import unittest
+from unittest.mock import patch
+from stats_cache import StatsCache
+
+class StatsCacheTests(unittest.TestCase):
+    def test_cached_until_invalidated(self):
+        cache, calls = StatsCache(ttl=60), []
+        compute = lambda: calls.append(1) or len(calls)
+        self.assertEqual([cache.get_or_compute("key", compute) for _ in range(2)], [1, 1])
+        cache.invalidate()
+        self.assertEqual(cache.get_or_compute("key", compute), 2)
+        self.assertEqual((cache.hits, cache.misses), (1, 2))
+
+    def test_entries_expire_after_ttl(self):
+        cache = StatsCache(ttl=10)
+        with patch("stats_cache.time.time", return_value=100.0):
+            cache.get_or_compute("key", lambda: "old")
+        with patch("stats_cache.time.time", return_value=111.0):
+            self.assertEqual(cache.get_or_compute("key", lambda: "new"), "new")
+
+BODY = {"project_name": "Alpha", "change_number": "CR-1", "requested_by": "Alice Smith",
+        "date_of_request": "2024-01-02", "presented_to": "Bob Jones", "change_name": "Swap disk",
+        "description": "The backup disk needs to be replaced", "reason": "Failing",
+        "cost_items": [{"item_description": "disk", "dollars_increase": 120.0}]}
+
+class WritesInvalidateStatsTests(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        from fastapi.testclient import TestClient
+        cls.directory = tempfile.TemporaryDirectory()
+        environment = {"CHANGE_REQUESTS_DB": os.path.join(cls.directory.name, "change_requests.db"),
+                       "LOCAL_CLASSIFIER": "0", "STATS_CACHE_TTL": "3600"}
+        with patch.dict(os.environ, environment):
+            sys.modules.pop("api", None)
+            cls.api = importlib.import_module("api")
+        # Without entering the client the lifespan does not run, so no worker calls the LLM.
+        cls.client = TestClient(cls.api.app)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.api.pool.close_all()
+        cls.directory.cleanup()
+
+    def total(self):
+        response = self.client.get("/change_requests/stats", params={"project_name": "alpha"})
+        self.assertEqual(response.status_code, 200)
+        return sum(entry["count"] for entry in response.json()["per_project"])
+
+    def test_post_and_bulk_writes_invalidate_cached_stats(self):
+        self.assertEqual(self.total(), 0)
+        self.assertEqual(self.total(), 0)
+        self.assertEqual(self.api.stats_cache.hits, 1)
+        self.assertEqual(self.client.post("/change_requests", json=BODY).status_code, 200)
+        self.assertEqual(self.total(), 1)
+        body = json.dumps({**BODY, "change_number": "CR-2"}) + "\n"
+        response = self.client.post("/change_requests/bulk", params={"categorize": "false"}, content=body)
+        self.assertEqual(response.json()["inserted"], 1)
+        self.assertEqual(self.total(), 2)
+
+if __name__ == "__main__":
+    unittest.main()
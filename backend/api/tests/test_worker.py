@@ -0,0 +1,107 @@
+"""Tests for the background categorization worker, with categories from stub_llm.py.
+
+    python -m pytest tests/test_worker.py
+"""
+import asyncio
+import os
+import tempfile
+import unittest
+from functools import partial
+from unittest.mock import patch
+from categorizer import request_categories
+from db import ConnectionPool, create_schema
+from llm_client import LLMClient
+from stub_llm import serve_in_thread
+from worker import CategorizationWorker, PENDING_CATEGORY
+
+DESCRIPTIONS = ["The office printer jams", "The login page shows an error", "Hire two testers",
+                "Legal wants a new clause", "The laptop screen flickers", "The app crashes on start",
+                "Training for the support staff"]
+
+class WorkerTestCase(unittest.TestCase):
+    stub_options = {}
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.pool = ConnectionPool(os.path.join(self.directory.name, "change_requests.db"))
+        with self.pool.connection() as conn:
+            create_schema(conn)
+            conn.executemany("INSERT INTO change_requests (description, category) VALUES (?, ?)",
+                             [(description, PENDING_CATEGORY) for description in DESCRIPTIONS])
+        self.server, url = serve_in_thread(**self.stub_options)
+        self.client = LLMClient(url=url, api_key="test", backoff=0.01, max_retries=0, timeout=10)
+        patcher = patch("categorizer.get_client", return_value=self.client)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.batches = []
+        self.changes = 0
+
+    def tearDown(self):
+        self.client.close()
+        self.server.shutdown()
+        self.server.server_close()
+        self.pool.close_all()
+        self.directory.cleanup()
+
+    def categorize(self, descriptions):
+        self.batches.append(list(descriptions))
+        return request_categories(descriptions, with_sources=True)
+
+    def on_change(self):
+        self.changes += 1
+
+    def run_worker(self, **options):
+        async def run():
+            worker = CategorizationWorker(self.pool, self.categorize, on_change=self.on_change, **options)
+            await worker.start()
+            await worker._queue.join()
+            await worker.stop()
+            return worker
+        return asyncio.run(run())
+
+    def rows(self):
+        with self.pool.connection() as conn:
+            return conn.execute("SELECT description, category, category_source FROM change_requests ORDER BY id").fetchall()
+
+class DrainTests(WorkerTestCase):
+    def test_pending_rows_are_requeued_and_categorized_on_start(self):
+        self.run_worker(concurrency=2, batch_size=3)
+        rows = self.rows()
+        self.assertEqual([category for _, category, _ in rows],
+                         ["hardware issue", "software issue", "personnel issue", "other",
+                          "hardware issue", "software issue", "personnel issue"])
+        self.assertTrue(all(source == "llm" for _, _, source in rows))
+
+    def test_queued_rows_are_drained_in_batches_of_batch_size(self):
+        self.run_worker(concurrency=1, batch_size=3)
+        self.assertEqual([len(batch) for batch in self.batches], [3, 3, 1])
+        self.assertEqual([d for batch in self.batches for d in batch], DESCRIPTIONS)
+        self.assertEqual(self.changes, 3)
+
+    def test_submit_before_start_leaves_the_row_pending(self):
+        worker = CategorizationWorker(self.pool, self.categorize)
+        worker.submit(1, DESCRIPTIONS[0])
+        self.assertEqual(worker.queue_size(), 0)
+        self.assertEqual(self.rows()[0][1], PENDING_CATEGORY)
+
+    def test_a_row_is_only_queued_once(self):
+        async def run():
+            worker = CategorizationWorker(self.pool, self.categorize)
+            worker._queue = asyncio.Queue()
+            return worker._enqueue(1, DESCRIPTIONS[0]), worker._enqueue(1, DESCRIPTIONS[0]), worker.queue_size()
+        self.assertEqual(asyncio.run(run()), (True, False, 1))
+
+class FailedBatchTests(WorkerTestCase):
+    stub_options = {"fail_every": 1}
+
+    def test_failed_batches_get_the_fallback_after_retries(self):
+        self.run_worker(concurrency=1, batch_size=4, max_retries=2, backoff=0.0)
+        # Each of the two batches is tried max_retries + 1 times.
+        self.assertEqual(len(self.batches), 6)
+        rows = self.rows()
+        self.assertTrue(all(category == "other" and source == "fallback" for _, category, source in rows))
+        self.assertEqual(self.changes, 2)
+        self.assertEqual(self.client.stats()["errors"], self.server.RequestHandlerClass.requests_served)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,118 @@
+import asyncio
+import random
+
+PENDING_CATEGORY = "pending"
+
+class CategorizationWorker:
+    """Fill in categories for committed change requests on a bounded pool of asyncio tasks.
+
+    Rows are inserted with category 'pending', so the table itself is the persistent
+    job list: any rows still pending when the app restarts are picked up again on start.
+    Each task drains up to batch_size queued rows and categorizes them with one call to
+    categorize, which takes a list of descriptions and returns (category, source) pairs;
+    the source is stored in category_source, and rows that exhaust their retries get
+    the fallback category with source 'fallback'.
+    """
+
+    def __init__(self, pool, categorize, concurrency=4, batch_size=20, max_retries=3, backoff=1.0, fallback="other",
+                 on_change=None):
+        self.pool = pool
+        self.on_change = on_change
+        self.categorize = categorize
+        self.concurrency = concurrency
+        self.batch_size = batch_size
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.fallback = fallback
+        self._queue = None
+        self._loop = None
+        self._tasks = []
+        self._queued = set()
+
+    async def start(self):
+        """Spawn the worker tasks and requeue rows left pending by a previous run."""
+        self._loop = asyncio.get_running_loop()
+        self._queue = asyncio.Queue()
+        self._queued = set()
+        self._tasks = [asyncio.create_task(self._run()) for _ in range(self.concurrency)]
+        requeued = await self.enqueue_pending()
+        if requeued:
+            print(f"Requeued {requeued} pending change requests for categorization")
+
+    async def enqueue_pending(self):
+        """Queue every pending row that is not already queued and return how many were added."""
+        pending = await asyncio.to_thread(self._load_pending)
+        added = 0
+        for row_id, description in pending:
+            added += self._enqueue(row_id, description)
+        return added
+
+    def _enqueue(self, row_id, description):
+        if row_id in self._queued:
+            return False
+        self._queued.add(row_id)
+        self._queue.put_nowait((row_id, description))
+        return True
+
+    async def stop(self):
+        """Cancel the worker tasks; unfinished rows stay pending for the next start."""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def submit(self, row_id, description):
+        """Queue a row for categorization. Safe to call from the sync handler threadpool."""
+        if self._loop is None:
+            print(f"Categorization worker not running, change request {row_id} left pending")
+            return
+        self._loop.call_soon_threadsafe(self._enqueue, row_id, description)
+
+    def queue_size(self):
+        return self._queue.qsize() if self._queue is not None else 0
+
+    def _load_pending(self):
+        with self.pool.connection() as conn:
+            return conn.execute(
+                "SELECT id, description FROM change_requests WHERE category = ? ORDER BY id",
+                (PENDING_CATEGORY,)
+            ).fetchall()
+
+    def _save_categories(self, rows):
+        with self.pool.connection() as conn:
+            conn.executemany("UPDATE change_requests SET category = ?, category_source = ? WHERE id = ?", rows)
+
+    async def _categorize_with_retries(self, row_ids, descriptions):
+        for attempt in range(self.max_retries + 1):
+            try:
+                return await asyncio.to_thread(self.categorize, descriptions)
+            except Exception as e:
+                if attempt == self.max_retries:
+                    print(f"Categorization failed for change requests {row_ids} after {attempt + 1} attempts: {e}")
+                    return [(self.fallback, "fallback")] * len(descriptions)
+                delay = self.backoff * (2 ** attempt) * random.uniform(0.5, 1.5)
+                print(f"Categorization error for change requests {row_ids}: {e}, retrying in {delay:.1f}s")
+                await asyncio.sleep(delay)
+
+    def _drain(self, first):
+        batch = [first]
+        while len(batch) < self.batch_size and not self._queue.empty():
+            batch.append(self._queue.get_nowait())
+        return batch
+
+    async def _run(self):
+        while True:
+            batch = self._drain(await self._queue.get())
+            row_ids = [row_id for row_id, _ in batch]
+            try:
+                categories = await self._categorize_with_retries(row_ids, [description for _, description in batch])
+                rows = [(category, source, row_id) for (category, source), row_id in zip(categories, row_ids)]
+                await asyncio.to_thread(self._save_categories, rows)
+                if self.on_change is not None:
+                    self.on_change()
+            except Exception as e:
+                print(f"Could not store categories for change requests {row_ids}: {e}")
+            finally:
+                for row_id in row_ids:
+                    self._queued.discard(row_id)
+                    self._queue.task_done()
@@ -1,53 +1,245 @@
-import sqlite3
-from faker import Faker
+"""Generate synthetic change requests for development, benchmarks and load tests.
+
+    python fake_data.py                                      # 50 rows into change_requests.db
+    python fake_data.py --rows 1000000 --db /tmp/load.db --workers 4
+    python fake_data.py --rows 100000 --jsonl requests.jsonl  # for ingest.py or POST /change_requests/bulk
+    python fake_data.py --rows 100000 --parquet requests.parquet  # needs pyarrow
+
+Descriptions are built from per-category templates, so each row's category is
+one the categorizer would give it. Rows are made in fixed-size chunks
+seeded from --seed and the chunk number, and dates count from --start-date
+(2023-01-01 by default), so the output is the same for any number of workers
+and on any day. Change numbers continue after the largest one already in the
+target database, so appending never repeats one.
+"""
+import argparse
 import json
+import os
 import random
+import sqlite3
+import sys
+import time
+from datetime import date, datetime, timedelta
+from functools import lru_cache
+from multiprocessing import Pool
+from faker import Faker
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "api"))
+from db import COST_ITEM_INSERT_SQL, PRAGMAS, cost_item_values, create_schema, database_path
+
+CATEGORIES = ["hardware issue", "software issue", "personnel issue", "other"]
+CATEGORY_WEIGHTS = [0.3, 0.35, 0.15, 0.2]
+
+# (subjects, problems) per category; a description opens with "<subject> <problem>."
+TEMPLATES = {
+    "hardware issue": (
+        ["The build server", "A developer laptop", "The office printer", "The core network switch",
+         "The storage array", "A conference room monitor", "The backup disk", "The edge router"],
+        ["fails intermittently under load", "needs to be replaced", "is out of warranty",
+         "overheats during nightly jobs", "has a failing power supply", "drops network connections"],
+    ),
+    "software issue": (
+        ["The login service", "The billing app", "The reporting database", "The mobile app",
+         "The API gateway", "The deployment pipeline", "The customer portal"],
+        ["crashes after the latest update", "has a bug in the export step", "needs a security patch",
+         "throws errors on large uploads", "requires a license upgrade", "must be installed on new machines"],
+    ),
+    "personnel issue": (
+        ["The QA team", "The support staff", "The project manager", "Two contractors",
+         "The onboarding schedule", "The night shift"],
+        ["needs additional training", "is understaffed for the release", "requires a new hire",
+         "has a scheduling conflict with the launch", "is leaving the project early", "needs a manager sign-off"],
+    ),
+    "other": (
+        ["The client", "Legal", "Marketing", "The steering committee", "A regulator"],
+        ["asked for a new report layout", "requested updated branding", "moved the delivery date",
+         "added a deliverable to the scope", "changed the acceptance criteria"],
+    ),
+}
+
+CHUNK_ROWS = 10000
+
+# Fixed, so a seed gives the same dates and timestamps whenever it is run.
+DEFAULT_START_DATE = date(2023, 1, 1)
+
+@lru_cache(maxsize=None)
+def vocabulary(seed):
+    """Faker output reused across rows; building pools once is far faster than calling Faker per row."""
+    fake = Faker()
+    Faker.seed(seed)
+    return {
+        "companies": [fake.company() for _ in range(300)],
+        "names": [fake.name() for _ in range(2000)],
+        "catch_phrases": [fake.catch_phrase() for _ in range(2000)],
+        "sentences": [fake.sentence() for _ in range(5000)],
+        "words": [fake.word() for _ in range(1000)],
+    }
+
+def cost_items(rng, words):
+    items = []
+    for _ in range(rng.randint(1, 5)):
+        increase = rng.random() < 0.7
+        hours = rng.randint(1, 80)
+        dollars = round(rng.uniform(50, 20000), 2)
+        items.append({
+            "item_description": f"{rng.choice(words)} {rng.choice(words)}",
+            "hours_reduction": 0 if increase else hours,
+            "hours_increase": hours if increase else 0,
+            "dollars_reduction": 0.0 if increase else dollars,
+            "dollars_increase": dollars if increase else 0.0,
+        })
+    return items
+
+def generate_chunk(args):
+    """Return the rows of one chunk as dicts shaped like the ChangeRequest model plus category and timestamp."""
+    seed, chunk, first_row, rows, start_date, days = args
+    words = vocabulary(seed)
+    rng = random.Random(seed * 1_000_003 + chunk)
+    records = []
+    for number in range(first_row, first_row + rows):
+        category = rng.choices(CATEGORIES, CATEGORY_WEIGHTS)[0]
+        subjects, problems = TEMPLATES[category]
+        requested = start_date + timedelta(days=rng.randrange(days))
+        submitted = datetime.combine(requested, datetime.min.time()) + timedelta(seconds=rng.randrange(3 * 86400))
+        records.append({
+            "project_name": rng.choice(words["companies"]),
+            "change_number": f"CR-{number + 1:07d}",
+            "requested_by": rng.choice(words["names"]),
+            "date_of_request": requested.isoformat(),
+            "presented_to": rng.choice(words["names"]),
+            "change_name": rng.choice(words["catch_phrases"]),
+            "description": " ".join([f"{rng.choice(subjects)} {rng.choice(problems)}.",
+                                     *rng.sample(words["sentences"], rng.randint(1, 2))]),
+            "reason": rng.choice(words["sentences"]),
+            "cost_items": cost_items(rng, words["words"]),
+            "category": category,
+            "timestamp": submitted.strftime("%Y-%m-%d %H:%M:%S"),
+        })
+    return records
+
+def iter_chunks(rows, seed=0, workers=1, start_date=DEFAULT_START_DATE, days=730, first_number=0):
+    """Yield lists of records in order, generating chunks in worker processes when workers > 1.
+
+    Change numbers start at CR-<first_number + 1>; the rows themselves only depend on seed.
+    """
+    tasks = [(seed, chunk, first_number + first_row, min(CHUNK_ROWS, rows - first_row), start_date, days)
+             for chunk, first_row in enumerate(range(0, rows, CHUNK_ROWS))]
+    if workers > 1:
+        with Pool(workers) as pool:
+            yield from pool.imap(generate_chunk, tasks)
+    else:
+        yield from map(generate_chunk, tasks)
+
+RECORD_COLUMNS = ["project_name", "change_number", "requested_by", "date_of_request", "presented_to",
+                  "change_name", "description", "reason", "cost_items", "category", "timestamp"]
+
+INSERT_SQL = (
+    f"INSERT INTO change_requests ({', '.join(RECORD_COLUMNS)}) "
+    f"VALUES ({', '.join('?' for _ in RECORD_COLUMNS)})"
+)
+
+def last_change_number(path):
+    """The largest CR-<n> change number in the database at path, 0 when there is none."""
+    if not os.path.exists(path):
+        return 0
+    conn = sqlite3.connect(path)
+    try:
+        row = conn.execute(
+            "SELECT MAX(CAST(SUBSTR(change_number, 4) AS INTEGER)) FROM change_requests WHERE change_number LIKE 'CR-%'"
+        ).fetchone()
+    except sqlite3.OperationalError:
+        return 0
+    finally:
+        conn.close()
+    return row[0] or 0
+
+def write_database(chunks, path, commit_every=100000):
+    """Insert records with executemany, committing every commit_every rows; returns the row count."""
+    conn = sqlite3.connect(path)
+    for name, value in PRAGMAS.items():
+        conn.execute(f"PRAGMA {name} = {value}")
+    create_schema(conn)
+    written = pending = 0
+    conn.execute("BEGIN")
+    for records in chunks:
+        conn.executemany(INSERT_SQL, [
+            tuple(json.dumps(record[column]) if column == "cost_items" else record[column] for column in RECORD_COLUMNS)
+            for record in records
+        ])
+        # Ids of one executemany inside a transaction are consecutive, as in ingest.insert_change_requests.
+        last_id = conn.execute("SELECT last_insert_rowid()").fetchone()[0]
+        conn.executemany(COST_ITEM_INSERT_SQL, [
+            cost_item_values(change_request_id, item)
+            for change_request_id, record in zip(range(last_id - len(records) + 1, last_id + 1), records)
+            for item in record["cost_items"]
+        ])
+        written += len(records)
+        pending += len(records)
+        if pending >= commit_every:
+            conn.execute("COMMIT")
+            conn.execute("BEGIN")
+            pending = 0
+    conn.execute("COMMIT")
+    conn.close()
+    return written
+
+def write_jsonl(chunks, path):
+    written = 0
+    with open(path, "w") as f:
+        for records in chunks:
+            f.write("".join(json.dumps(record) + "\n" for record in records))
+            written += len(records)
+    return written
+
+def write_parquet(chunks, path):
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise SystemExit("Parquet export needs pyarrow: pip install pyarrow")
+    written = 0
+    writer = None
+    try:
+        for records in chunks:
+            table = pa.Table.from_pylist([{**record, "cost_items": json.dumps(record["cost_items"])} for record in records])
+            if writer is None:
+                writer = pq.ParquetWriter(path, table.schema)
+            writer.write_table(table)
+            written += len(records)
+    finally:
+        if writer is not None:
+            writer.close()
+    return written
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate synthetic change requests.")
+    parser.add_argument("--rows", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=1, help="processes generating chunks")
+    parser.add_argument("--start-date", type=date.fromisoformat, default=DEFAULT_START_DATE,
+                        help=f"first request date, YYYY-MM-DD (default {DEFAULT_START_DATE})")
+    parser.add_argument("--days", type=int, default=730, help="spread request dates over this many days")
+    parser.add_argument("--first-number", type=int, default=None,
+                        help="number change requests from CR-<first-number + 1> (default: after the largest "
+                             "change number in --db, or 0 for --jsonl and --parquet)")
+    parser.add_argument("--db", default=None, help="SQLite database to append to (default: CHANGE_REQUESTS_DB "
+                                                   "or backend/database/change_requests.db)")
+    parser.add_argument("--commit-every", type=int, default=100000, help="rows per transaction")
+    parser.add_argument("--jsonl", help="write JSON Lines here instead of a database")
+    parser.add_argument("--parquet", help="write Parquet here instead of a database")
+    args = parser.parse_args()
 
-fake = Faker()
-
-conn = sqlite3.connect('change_requests.db')
-
-c = conn.cursor()
-
-c.execute('''CREATE TABLE IF NOT EXISTS change_requests
-             (id INTEGER PRIMARY KEY AUTOINCREMENT,
-              project_name TEXT,
-              change_number TEXT,
-              requested_by TEXT,
-              date_of_request DATE,
-              presented_to TEXT,
-              change_name TEXT,
-              description TEXT,
-              reason TEXT,
-              cost_items TEXT,
-              category TEXT,
-              timestamp DATETIME)''')
-
-categories = ["hardware", "software", "personnel", "other"]
-
-for _ in range(50):
-    project_name = fake.company() 
-    change_number = "CR-" + str(fake.random_number(digits=3))
-    requested_by = fake.name()  
-    date_of_request = fake.date_this_year().strftime("%Y-%m-%d")
-    presented_to = fake.name() 
-    change_name = fake.catch_phrase()  
-    description = fake.paragraph()  
-    reason = fake.sentence() 
-    cost_items = json.dumps([
-        {"item": fake.word(), "cost": fake.random_number(digits=3)}
-        for _ in range(random.randint(1, 5))
-    ])
-    category = random.choice(categories)  
-    timestamp = fake.date_time_this_year().strftime("%Y-%m-%d %H:%M:%S")
-
-    c.execute("""
-        INSERT INTO change_requests (
-            project_name, change_number, requested_by, date_of_request, presented_to,
-            change_name, description, reason, cost_items, category, timestamp
-        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-    """, (project_name, change_number, requested_by, date_of_request, presented_to,
-          change_name, description, reason, cost_items, category, timestamp))
-
-conn.commit()
-conn.close()
\ No newline at end of file
+    start_time = time.perf_counter()
+    target = args.jsonl or args.parquet or args.db or database_path()
+    first_number = args.first_number
+    if first_number is None:
+        first_number = 0 if args.jsonl or args.parquet else last_change_number(target)
+    chunks = iter_chunks(args.rows, args.seed, args.workers, args.start_date, args.days, first_number)
+    if args.jsonl:
+        written = write_jsonl(chunks, args.jsonl)
+    elif args.parquet:
+        written = write_parquet(chunks, args.parquet)
+    else:
+        written = write_database(chunks, target, args.commit_every)
+    elapsed = time.perf_counter() - start_time
+    print(f"Wrote {written} change requests to {target} in {elapsed:.1f}s ({written / elapsed:,.0f} rows/s)")
@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.1/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -79,7 +80,8 @@ WSGI_APPLICATION = 'change_request_system.wsgi.application'
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+        # DJANGO_DATABASE points the app at another file, e.g. a throwaway one for load tests.
+        'NAME': os.getenv('DJANGO_DATABASE', BASE_DIR / 'db.sqlite3'),
     }
 }
 
@@ -124,3 +126,23 @@ STATIC_URL = 'static/'
 # https://docs.djangoproject.com/en/5.1/ref/settings/#default-auto-field
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
+
+
+# REST framework
+# https://www.django-rest-framework.org/api-guide/pagination/
+
+REST_FRAMEWORK = {
+    'DEFAULT_PAGINATION_CLASS': 'change_requests.pagination.ChangeRequestCursorPagination',
+    'PAGE_SIZE': int(os.getenv('API_PAGE_SIZE', '100')),
+}
+
+# Largest ?page_size a client may ask for, and how many rows ?count=estimate counts before stopping.
+CHANGE_REQUESTS_MAX_PAGE_SIZE = int(os.getenv('API_MAX_PAGE_SIZE', '1000'))
+CHANGE_REQUESTS_COUNT_ESTIMATE_LIMIT = int(os.getenv('API_COUNT_ESTIMATE_LIMIT', '10000'))
+
+# ?search= ranks at most this many of the newest matches by relevance, listing older
+# matches after them newest first (0: rank every match).
+CHANGE_REQUESTS_SEARCH_MAX_RANKED = int(os.getenv('API_SEARCH_MAX_RANKED', '10000'))
+
+# Most change requests one POST of a list may create.
+CHANGE_REQUESTS_MAX_BULK_CREATE = int(os.getenv('API_MAX_BULK_CREATE', '1000'))
@@ -0,0 +1,128 @@
+import json
+import re
+from urllib.parse import parse_qsl, urlsplit
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIRequestFactory
+from change_requests.models import ChangeRequest
+from change_requests.views import ChangeRequestViewSet
+
+URL = '/api/change_requests/'
+
+def scenarios(sample):
+    """
+    (name, action, query parameters, expected flags) for the requests the API
+    commonly serves. Ranking search results needs a sort, bounded by
+    CHANGE_REQUESTS_SEARCH_MAX_RANKED, so it is reported but not flagged.
+    """
+    project = sample.project_name if sample else 'Project'
+    requester = sample.requested_by if sample else 'Requester'
+    day = sample.date_of_request.isoformat() if sample else '2025-01-01'
+    words = re.findall(r'\w{4,}', sample.description if sample else '')
+    requests = [
+        ('list', 'list', {}, ()),
+        ('list, next page', 'list', 'next', ()),
+        ('filter by project', 'list', {'project_name': project}, ()),
+        ('filter by requester', 'list', {'requested_by': requester}, ()),
+        ('filter by date', 'list', {'date_of_request': day}, ()),
+        ('filter by project and date', 'list', {'project_name': project, 'date_of_request': day}, ()),
+        ('list with totals', 'list', {'totals': 'true'}, ()),
+        ('summary with totals', 'list', {'summary': 'true', 'totals': 'true'}, ()),
+        ('exact count by project', 'list', {'count': 'exact', 'project_name': project}, ()),
+        ('search', 'list', {'search': words[0] if words else 'change'}, ('sort',)),
+    ]
+    if sample:
+        requests.append(('retrieve', 'retrieve', {}, ()))
+    return requests
+
+def outer_query(sql):
+    """The SQL with every parenthesised part, subqueries included, removed."""
+    while True:
+        sql, removed = re.subn(r'\([^()]*\)', '', sql)
+        if not removed:
+            return sql
+
+def flag(detail, sql):
+    """
+    Why a plan step is slow, or None. A scan by a query with a LIMIT and no
+    WHERE of its own reads rows in id order and stops after one page.
+    """
+    if detail.startswith('USE TEMP B-TREE'):
+        return 'sort'
+    if detail.startswith('SCAN') and not any(
+        part in detail for part in ('VIRTUAL TABLE', 'COVERING INDEX', 'CONSTANT ROW')
+    ):
+        outer = outer_query(sql)
+        if ' WHERE ' in outer or ' LIMIT ' not in outer:
+            return 'full scan'
+    return None
+
+class Command(BaseCommand):
+    help = (
+        "Run EXPLAIN QUERY PLAN over the SQL the change request API issues for its common "
+        "requests and flag full table scans and sorts. Requests go through ChangeRequestViewSet, "
+        "so the plans are for the queries the API really runs against this database."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--json', action='store_true', help='print machine-readable results')
+        parser.add_argument('--fail-on-scan', action='store_true', help='exit with an error if anything is flagged')
+
+    def run_view(self, action, params, pk=None):
+        # Pagination links need a host that passes ALLOWED_HOSTS; with DEBUG, localhost always does.
+        host = next((host for host in settings.ALLOWED_HOSTS if not host.startswith(('.', '*'))), 'localhost')
+        request = APIRequestFactory().get(URL, params, HTTP_HOST=host)
+        view = ChangeRequestViewSet.as_view({'get': action})
+        with CaptureQueriesContext(connection) as queries:
+            response = view(request, pk=pk) if action == 'retrieve' else view(request)
+        if response.status_code != 200:
+            raise CommandError(f'{action} {params} returned {response.status_code}: {response.data}')
+        return response, [query['sql'] for query in queries.captured_queries if query['sql'].startswith('SELECT')]
+
+    def explain(self, sql):
+        with connection.cursor() as cursor:
+            cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+            return [row[-1] for row in cursor.fetchall()]
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'sqlite':
+            raise CommandError('explain_queries reads SQLite query plans; the database is ' + connection.vendor)
+        sample = ChangeRequest.objects.order_by('id').first()
+        results = []
+        for name, action, params, expected in scenarios(sample):
+            if params == 'next':
+                response, _ = self.run_view('list', {'page_size': 1})
+                params = dict(parse_qsl(urlsplit(response.data['next'] or '').query))
+            _, statements = self.run_view(action, params, pk=sample.pk if sample else None)
+            queries = []
+            for sql in statements:
+                plan = self.explain(sql)
+                found = {f for f in (flag(detail, sql) for detail in plan) if f}
+                queries.append({
+                    'sql': sql,
+                    'plan': plan,
+                    'flags': sorted(found - set(expected)),
+                    'expected': sorted(found & set(expected)),
+                })
+            results.append({'name': name, 'params': params, 'queries': queries})
+
+        flagged = [(result['name'], query) for result in results for query in result['queries'] if query['flags']]
+        if options['json']:
+            self.stdout.write(json.dumps({'scenarios': results, 'flagged': len(flagged)}, indent=2))
+        else:
+            for result in results:
+                self.stdout.write(f"{result['name']} {result['params'] or ''}")
+                for query in result['queries']:
+                    self.stdout.write(f"  {query['sql'][:160]}{'...' if len(query['sql']) > 160 else ''}")
+                    for detail in query['plan']:
+                        self.stdout.write(f'    {detail}')
+                    if query['flags']:
+                        self.stdout.write(self.style.WARNING(f"    ^ {', '.join(query['flags'])}"))
+                    if query['expected']:
+                        self.stdout.write(f"    ^ {', '.join(query['expected'])} (expected)")
+            summary = f'{len(flagged)} of {sum(len(result["queries"]) for result in results)} queries flagged'
+            self.stdout.write(self.style.WARNING(summary) if flagged else self.style.SUCCESS(summary))
+        if flagged and options['fail_on_scan']:
+            raise CommandError(', '.join(f'{name}: {", ".join(query["flags"])}' for name, query in flagged))
@@ -0,0 +1,34 @@
+# Generated by Django 5.1.6 on 2026-10-18 07:31
+
+import change_requests.search
+import django.db.models.deletion
+from django.db import migrations, models
+from change_requests.search import (
+    CREATE_TABLE_SQL, CREATE_TRIGGERS_SQL, DROP_TABLE_SQL, DROP_TRIGGERS_SQL, run_on_sqlite
+)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('change_requests', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ChangeRequestSearch',
+            fields=[
+                ('change_request', models.OneToOneField(db_column='rowid', on_delete=django.db.models.deletion.DO_NOTHING, primary_key=True, related_name='search_index', serialize=False, to='change_requests.changerequest')),
+                ('document', change_requests.search.SearchDocumentField(db_column='change_requests_changerequest_fts')),
+                ('rank', models.FloatField()),
+            ],
+            options={
+                'db_table': 'change_requests_changerequest_fts',
+                'managed': False,
+            },
+        ),
+        migrations.RunPython(
+            run_on_sqlite(CREATE_TABLE_SQL + CREATE_TRIGGERS_SQL),
+            run_on_sqlite(DROP_TRIGGERS_SQL + DROP_TABLE_SQL)
+        ),
+    ]
@@ -0,0 +1,51 @@
+# Generated by Django 5.1.6 on 2026-10-18 07:35
+
+from django.db import migrations, models
+from change_requests.search import CREATE_TRIGGERS_SQL, DROP_TRIGGERS_SQL, run_on_sqlite
+
+
+def number_duplicate_change_numbers(apps, schema_editor):
+    """Suffix repeated change numbers with the row id so the unique constraint can be added."""
+    ChangeRequest = apps.get_model('change_requests', 'ChangeRequest')
+    seen = set()
+    for change_request in ChangeRequest.objects.order_by('id').only('id', 'change_number').iterator():
+        if change_request.change_number in seen:
+            suffix = f'-{change_request.id}'
+            change_request.change_number = change_request.change_number[:50 - len(suffix)] + suffix
+            change_request.save(update_fields=['change_number'])
+        seen.add(change_request.change_number)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('change_requests', '0002_change_request_fts'),
+    ]
+
+    operations = [
+        migrations.RunPython(number_duplicate_change_numbers, migrations.RunPython.noop),
+        # Making change_number unique rebuilds the table on SQLite, which drops the search index triggers.
+        migrations.RunPython(run_on_sqlite(DROP_TRIGGERS_SQL), run_on_sqlite(CREATE_TRIGGERS_SQL)),
+        migrations.AlterField(
+            model_name='changerequest',
+            name='change_number',
+            field=models.CharField(max_length=50, unique=True),
+        ),
+        migrations.RunPython(run_on_sqlite(CREATE_TRIGGERS_SQL), run_on_sqlite(DROP_TRIGGERS_SQL)),
+        migrations.AddIndex(
+            model_name='changerequest',
+            index=models.Index(fields=['project_name'], name='cr_project_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='changerequest',
+            index=models.Index(fields=['requested_by'], name='cr_requested_by_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='changerequest',
+            index=models.Index(fields=['date_of_request'], name='cr_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='changerequest',
+            index=models.Index(fields=['project_name', 'date_of_request'], name='cr_project_date_idx'),
+        ),
+    ]
@@ -1,8 +1,9 @@
 from django.db import models
+from .search import FTS_TABLE, SearchDocumentField
 
 class ChangeRequest(models.Model):
     project_name = models.CharField(max_length=255)
-    change_number = models.CharField(max_length=50)
+    change_number = models.CharField(max_length=50, unique=True)
     requested_by = models.CharField(max_length=255)
     date_of_request = models.DateField()
     presented_to = models.CharField(max_length=255)
@@ -14,6 +15,17 @@ class ChangeRequest(models.Model):
     effect_on_schedule = models.TextField()
     effect_of_not_approving = models.TextField()
 
+    class Meta:
+        # The API filters on these columns and pages by id. SQLite appends the
+        # rowid to every index, so an equality filter on an index's columns
+        # also comes back in id order and needs no sort.
+        indexes = [
+            models.Index(fields=['project_name'], name='cr_project_idx'),
+            models.Index(fields=['requested_by'], name='cr_requested_by_idx'),
+            models.Index(fields=['date_of_request'], name='cr_date_idx'),
+            models.Index(fields=['project_name', 'date_of_request'], name='cr_project_date_idx'),
+        ]
+
     def __str__(self):
         return f"{self.change_number} - {self.change_name}"
 
@@ -38,4 +50,24 @@ class CostItem(models.Model):
     )
 
     def __str__(self):
-        return self.item_description
\ No newline at end of file
+        return self.item_description
+
+class ChangeRequestSearch(models.Model):
+    """
+    A change request's row in the FTS5 index. The virtual table and the
+    triggers that keep it in sync are created by migration 0002; the model
+    only lets queries join to it.
+    """
+    change_request = models.OneToOneField(
+        ChangeRequest,
+        primary_key=True,
+        db_column='rowid',
+        related_name='search_index',
+        on_delete=models.DO_NOTHING
+    )
+    document = SearchDocumentField(db_column=FTS_TABLE)
+    rank = models.FloatField()
+
+    class Meta:
+        managed = False
+        db_table = FTS_TABLE
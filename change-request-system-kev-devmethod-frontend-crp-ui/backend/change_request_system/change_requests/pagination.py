@@ -0,0 +1,44 @@
+from django.conf import settings
+from rest_framework.pagination import CursorPagination
+from rest_framework.response import Response
+
+class ChangeRequestCursorPagination(CursorPagination):
+    """
+    Cursor pagination over the primary key, newest first.
+
+    Every page is a `WHERE id < cursor ORDER BY id DESC LIMIT n` range scan,
+    so deep pages cost the same as the first one and a response never holds
+    more than max_page_size rows. No COUNT(*) is run unless asked for with
+    ?count=exact, or ?count=estimate, which counts at most
+    CHANGE_REQUESTS_COUNT_ESTIMATE_LIMIT rows and reports whether it stopped.
+    """
+    ordering = '-id'
+    page_size_query_param = 'page_size'
+    max_page_size = getattr(settings, 'CHANGE_REQUESTS_MAX_PAGE_SIZE', 1000)
+    count_estimate_limit = getattr(settings, 'CHANGE_REQUESTS_COUNT_ESTIMATE_LIMIT', 10000)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.count = None
+        self.count_is_estimate = False
+        mode = request.query_params.get('count', 'none').lower()
+        if mode == 'exact':
+            self.count = queryset.count()
+        elif mode == 'estimate':
+            self.count = queryset.order_by()[:self.count_estimate_limit + 1].count()
+            self.count_is_estimate = self.count > self.count_estimate_limit
+            self.count = min(self.count, self.count_estimate_limit)
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        body = {'next': self.get_next_link(), 'previous': self.get_previous_link()}
+        if self.count is not None:
+            body['count'] = self.count
+            body['count_is_estimate'] = self.count_is_estimate
+        body['results'] = data
+        return Response(body)
+
+    def get_paginated_response_schema(self, schema):
+        response_schema = super().get_paginated_response_schema(schema)
+        response_schema['properties']['count'] = {'type': 'integer', 'example': 123}
+        response_schema['properties']['count_is_estimate'] = {'type': 'boolean'}
+        return response_schema
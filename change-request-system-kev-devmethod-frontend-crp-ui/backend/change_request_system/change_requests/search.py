@@ -0,0 +1,164 @@
+import re
+from django.conf import settings
+from django.db import connection, models
+from django.db.models import Case, F, FloatField, Value, When
+from django.db.models.expressions import RawSQL
+from rest_framework import filters
+
+FTS_TABLE = 'change_requests_changerequest_fts'
+
+# Indexed change request columns, in FTS column order, with their BM25 weights.
+FTS_COLUMNS = {
+    'change_name': 3.0,
+    'description': 2.0,
+    'reason': 1.0,
+    'effect_on_deliverables': 1.0,
+    'effect_on_organization': 1.0,
+    'effect_on_schedule': 1.0,
+    'effect_of_not_approving': 1.0,
+}
+
+CONTENT_TABLE = 'change_requests_changerequest'
+
+_COLUMNS = ', '.join(FTS_COLUMNS)
+_NEW = ', '.join(f'new.{column}' for column in FTS_COLUMNS)
+_OLD = ', '.join(f'old.{column}' for column in FTS_COLUMNS)
+
+# An external-content FTS5 index: the text lives only in the change request
+# table, and triggers keep the index in step with every insert, update and
+# delete, including bulk_create and queryset.update(), which skip signals.
+CREATE_TABLE_SQL = [
+    f"CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5({_COLUMNS}, content='{CONTENT_TABLE}', content_rowid='id', "
+    f"tokenize='unicode61 remove_diacritics 2', prefix='2 3')",
+    f"INSERT INTO {FTS_TABLE} ({FTS_TABLE}, rank) "
+    f"VALUES ('rank', 'bm25({', '.join(str(weight) for weight in FTS_COLUMNS.values())})')",
+    f"INSERT INTO {FTS_TABLE} ({FTS_TABLE}) VALUES ('rebuild')",
+]
+
+# SQLite drops these whenever a migration rebuilds the change request table
+# (altering a column, adding a constraint), so such a migration has to drop
+# them before and recreate them after; see 0003_change_request_indexes.
+CREATE_TRIGGERS_SQL = [
+    f"CREATE TRIGGER {FTS_TABLE}_insert AFTER INSERT ON {CONTENT_TABLE} BEGIN "
+    f"INSERT INTO {FTS_TABLE} (rowid, {_COLUMNS}) VALUES (new.id, {_NEW}); END",
+    f"CREATE TRIGGER {FTS_TABLE}_delete AFTER DELETE ON {CONTENT_TABLE} BEGIN "
+    f"INSERT INTO {FTS_TABLE} ({FTS_TABLE}, rowid, {_COLUMNS}) VALUES ('delete', old.id, {_OLD}); END",
+    f"CREATE TRIGGER {FTS_TABLE}_update AFTER UPDATE OF {_COLUMNS} ON {CONTENT_TABLE} BEGIN "
+    f"INSERT INTO {FTS_TABLE} ({FTS_TABLE}, rowid, {_COLUMNS}) VALUES ('delete', old.id, {_OLD}); "
+    f"INSERT INTO {FTS_TABLE} (rowid, {_COLUMNS}) VALUES (new.id, {_NEW}); END",
+]
+
+DROP_TRIGGERS_SQL = [
+    f"DROP TRIGGER IF EXISTS {FTS_TABLE}_update",
+    f"DROP TRIGGER IF EXISTS {FTS_TABLE}_delete",
+    f"DROP TRIGGER IF EXISTS {FTS_TABLE}_insert",
+]
+
+DROP_TABLE_SQL = [f"DROP TABLE IF EXISTS {FTS_TABLE}"]
+
+def run_on_sqlite(statements):
+    """A RunPython function executing statements; the index only exists on SQLite."""
+    def run(apps, schema_editor):
+        if schema_editor.connection.vendor == 'sqlite':
+            for statement in statements:
+                schema_editor.execute(statement)
+    return run
+
+# The rowid of the Nth newest match; rows older than it are not ranked.
+RANKED_FLOOR_SQL = (
+    f"SELECT COALESCE((SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s "
+    f"ORDER BY rowid DESC LIMIT 1 OFFSET %s), 0)"
+)
+
+# BM25 ranks are always negative, so UNRANKED - id sorts unranked matches
+# after the ranked ones, newest first, and is unique for the cursor paginator.
+UNRANKED = 1e15
+
+SNIPPET_SQL = f"snippet({FTS_TABLE}, -1, '<mark>', '</mark>', '…', 12)"
+
+TOKEN = re.compile(r'"([^"]*)"|(\w+)(\*?)')
+
+class SearchDocumentField(models.TextField):
+    """The FTS5 hidden column named after its table, the left-hand side of MATCH."""
+
+@SearchDocumentField.register_lookup
+class Match(models.Lookup):
+    lookup_name = 'match'
+
+    def as_sql(self, compiler, connection):
+        lhs, lhs_params = self.process_lhs(compiler, connection)
+        rhs, rhs_params = self.process_rhs(compiler, connection)
+        return f'{lhs} MATCH {rhs}', [*lhs_params, *rhs_params]
+
+def match_query(text):
+    """
+    Turn user input into an FTS5 query that cannot be a syntax error: every
+    word must match, "quoted phrases" match as phrases and word* matches as a
+    prefix. Returns '' when the input has no searchable words.
+    """
+    terms = []
+    for phrase, word, star in TOKEN.findall(text):
+        words = re.findall(r'\w+', phrase) if phrase else [word]
+        if words:
+            terms.append('"' + ' '.join(words) + '"' + star)
+    return ' '.join(terms)
+
+def add_search_snippets(query, change_requests):
+    """
+    Set search_snippet on each change request to its text around the matches
+    of query, with one query for all of them. Run for the rows being rendered
+    only, as snippet() is far costlier than ranking. None off SQLite.
+    """
+    snippets = {}
+    if connection.vendor == 'sqlite' and change_requests:
+        ids = [change_request.pk for change_request in change_requests]
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"SELECT rowid, {SNIPPET_SQL} FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s "
+                f"AND rowid IN ({', '.join(['%s'] * len(ids))})",
+                [query, *ids],
+            )
+            snippets = dict(cursor.fetchall())
+    for change_request in change_requests:
+        change_request.search_snippet = snippets.get(change_request.pk)
+
+class FullTextSearchFilter(filters.SearchFilter):
+    """
+    ?search= over the FTS5 index of a change request's text fields.
+
+    Matches are ranked by BM25, best first, and annotated with search_rank.
+    BM25 has to score every match before the best can be picked, so only the
+    newest CHANGE_REQUESTS_SEARCH_MAX_RANKED matches are ranked (0 for all);
+    older matches follow them, newest first. That keeps a term found in most
+    of a million rows nearly as fast as a rare one, while every match is still
+    returned and counted. The index is only built on SQLite; other databases
+    fall back to SearchFilter's LIKE matching over the view's search_fields.
+    """
+    max_ranked = getattr(settings, 'CHANGE_REQUESTS_SEARCH_MAX_RANKED', 10000)
+
+    def get_query(self, request):
+        return match_query(request.query_params.get(self.search_param, ''))
+
+    def filter_queryset(self, request, queryset, view):
+        if connection.vendor != 'sqlite':
+            return super().filter_queryset(request, queryset, view)
+        query = self.get_query(request)
+        if not query:
+            return queryset
+        queryset = queryset.filter(search_index__document__match=query)
+        rank = F('search_index__rank')
+        if self.max_ranked:
+            # CASE only reads the rank, and so runs BM25, for rows inside the window.
+            floor = RawSQL(RANKED_FLOOR_SQL, [query, self.max_ranked - 1])
+            rank = Case(
+                When(id__gte=floor, then=rank),
+                default=Value(UNRANKED) - F('id'),
+                output_field=FloatField(),
+            )
+        return queryset.annotate(search_rank=rank).order_by('search_rank', '-id')
+
+    def get_ordering(self, request, queryset, view):
+        """Order search results by rank for cursor pagination; None keeps the paginator's ordering."""
+        if connection.vendor == 'sqlite' and self.get_query(request):
+            return ('search_rank', '-id')
+        return None
@@ -1,7 +1,14 @@
+from django.db import models, transaction
+from django.db.models import prefetch_related_objects
 from rest_framework import serializers
+from rest_framework.validators import UniqueValidator
 from .models import ChangeRequest, CostItem
+from .search import add_search_snippets
 
 class CostItemSerializer(serializers.ModelSerializer):
+    # Writable so an update can say which existing item each entry is; ignored on create.
+    id = serializers.IntegerField(required=False)
+
     class Meta:
         model = CostItem
         fields = [
@@ -13,7 +20,112 @@ class CostItemSerializer(serializers.ModelSerializer):
             'dollars_increase'
         ]
 
-class ChangeRequestSerializer(serializers.ModelSerializer):
+    def validate(self, attrs):
+        # A PATCH skips required fields all the way down, but an item without an id is new and needs them.
+        if self.root.partial and attrs.get('id') is None:
+            missing = {
+                name: [field.error_messages['required']]
+                for name, field in self.fields.items()
+                if field.required and not field.read_only and name not in attrs
+            }
+            if missing:
+                raise serializers.ValidationError(missing)
+        return attrs
+
+COST_TOTAL_FIELDS = [
+    'total_hours_reduction',
+    'total_hours_increase',
+    'total_dollars_reduction',
+    'total_dollars_increase'
+]
+
+class CostTotalsMixin(serializers.Serializer):
+    """
+    Cost item sums annotated by the view; the fields are dropped unless the
+    serializer context has with_totals set.
+    """
+    total_hours_reduction = serializers.IntegerField(read_only=True)
+    total_hours_increase = serializers.IntegerField(read_only=True)
+    total_dollars_reduction = serializers.DecimalField(max_digits=12, decimal_places=2, read_only=True)
+    total_dollars_increase = serializers.DecimalField(max_digits=12, decimal_places=2, read_only=True)
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        if not self.context.get('with_totals'):
+            for field in COST_TOTAL_FIELDS:
+                self.fields.pop(field, None)
+
+def new_cost_items(change_request, cost_items_data):
+    return [
+        CostItem(change_request=change_request, **{key: value for key, value in data.items() if key != 'id'})
+        for data in cost_items_data
+    ]
+
+class SearchSnippetListSerializer(serializers.ListSerializer):
+    """Builds the search snippets of every row being rendered in one query."""
+    def to_representation(self, data):
+        query = self.context.get('search_query')
+        if query:
+            data = list(data.all() if isinstance(data, models.manager.BaseManager) else data)
+            add_search_snippets(query, data)
+        return super().to_representation(data)
+
+class ChangeRequestListSerializer(SearchSnippetListSerializer):
+    """
+    Creates a list of change requests with two bulk INSERTs, one for the
+    change requests and one for all of their cost items, in one transaction.
+    Change numbers are checked against the table in one query rather than by
+    each item's UniqueValidator.
+    """
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        field = self.child.fields['change_number']
+        field.validators = [validator for validator in field.validators if not isinstance(validator, UniqueValidator)]
+
+    def validate(self, attrs):
+        numbers = [item['change_number'] for item in attrs]
+        repeated = sorted({number for number in numbers if numbers.count(number) > 1})
+        if repeated:
+            raise serializers.ValidationError(f"Change numbers are repeated in the request: {', '.join(repeated)}")
+        existing = sorted(
+            ChangeRequest.objects.filter(change_number__in=numbers).values_list('change_number', flat=True)
+        )
+        if existing:
+            raise serializers.ValidationError(f"Change numbers already exist: {', '.join(existing)}")
+        return attrs
+
+    def create(self, validated_data):
+        cost_items_data = [item.pop('cost_items') for item in validated_data]
+        with transaction.atomic():
+            change_requests = ChangeRequest.objects.bulk_create([ChangeRequest(**item) for item in validated_data])
+            CostItem.objects.bulk_create([
+                cost_item
+                for change_request, data in zip(change_requests, cost_items_data)
+                for cost_item in new_cost_items(change_request, data)
+            ])
+        # One query for every change request's cost items when the response is rendered.
+        prefetch_related_objects(change_requests, 'cost_items')
+        return change_requests
+
+class SearchSnippetMixin(serializers.Serializer):
+    """
+    The text around the matches of the serializer context's search_query,
+    highlighted; dropped unless search_query is set.
+    """
+    search_snippet = serializers.CharField(read_only=True)
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        if not self.context.get('search_query'):
+            self.fields.pop('search_snippet', None)
+
+    def to_representation(self, instance):
+        query = self.context.get('search_query')
+        if query and not hasattr(instance, 'search_snippet'):
+            add_search_snippets(query, [instance])
+        return super().to_representation(instance)
+
+class ChangeRequestSerializer(SearchSnippetMixin, CostTotalsMixin, serializers.ModelSerializer):
     cost_items = CostItemSerializer(many=True)
 
     class Meta:
@@ -32,15 +144,82 @@ class ChangeRequestSerializer(serializers.ModelSerializer):
             'effect_on_organization',
             'effect_on_schedule',
             'effect_of_not_approving',
-            'cost_items'
+            'cost_items',
+            *COST_TOTAL_FIELDS,
+            'search_snippet'
         ]
+        list_serializer_class = ChangeRequestListSerializer
+
+    def validate(self, attrs):
+        if self.instance is not None and 'cost_items' in attrs:
+            ids = [item['id'] for item in attrs['cost_items'] if item.get('id') is not None]
+            known = {cost_item.id for cost_item in self.instance.cost_items.all()}
+            unknown = sorted(set(ids) - known)
+            if unknown or len(ids) != len(set(ids)):
+                raise serializers.ValidationError({
+                    'cost_items': f'Cost item ids must be unique and belong to this change request; got {ids}.'
+                })
+        return attrs
 
     def create(self, validated_data):
         cost_items_data = validated_data.pop('cost_items')
-        change_request = ChangeRequest.objects.create(**validated_data)
-        for cost_item_data in cost_items_data:
-            CostItem.objects.create(
-                change_request=change_request,
-                **cost_item_data
-            )
-        return change_request
\ No newline at end of file
+        with transaction.atomic():
+            change_request = ChangeRequest.objects.create(**validated_data)
+            CostItem.objects.bulk_create(new_cost_items(change_request, cost_items_data))
+        return change_request
+
+    def update(self, instance, validated_data):
+        """
+        Update the change request and, when cost_items is given, make its cost
+        items match the list: entries with an id update that item, entries
+        without one are created and items left out are deleted. Each kind of
+        change is one bulk query, however many items there are.
+        """
+        cost_items_data = validated_data.pop('cost_items', None)
+        with transaction.atomic():
+            for field, value in validated_data.items():
+                setattr(instance, field, value)
+            instance.save()
+            if cost_items_data is not None:
+                existing = {cost_item.id: cost_item for cost_item in instance.cost_items.all()}
+                changed, fields = [], set()
+                for data in cost_items_data:
+                    cost_item = existing.pop(data['id'], None) if data.get('id') is not None else None
+                    if cost_item is None:
+                        continue
+                    updates = {
+                        field: value for field, value in data.items()
+                        if field != 'id' and getattr(cost_item, field) != value
+                    }
+                    for field, value in updates.items():
+                        setattr(cost_item, field, value)
+                    if updates:
+                        changed.append(cost_item)
+                        fields.update(updates)
+                if changed:
+                    CostItem.objects.bulk_update(changed, sorted(fields))
+                created = [data for data in cost_items_data if data.get('id') is None]
+                if created:
+                    CostItem.objects.bulk_create(new_cost_items(instance, created))
+                if existing:
+                    CostItem.objects.filter(id__in=list(existing)).delete()
+        return instance
+
+class ChangeRequestSummarySerializer(SearchSnippetMixin, CostTotalsMixin, serializers.ModelSerializer):
+    """
+    Read-only listing without the nested cost items, so no cost item query is needed.
+    """
+    class Meta:
+        model = ChangeRequest
+        fields = [
+            'id',
+            'project_name',
+            'change_number',
+            'requested_by',
+            'date_of_request',
+            'change_name',
+            *COST_TOTAL_FIELDS,
+            'search_snippet'
+        ]
+        read_only_fields = fields
+        list_serializer_class = SearchSnippetListSerializer
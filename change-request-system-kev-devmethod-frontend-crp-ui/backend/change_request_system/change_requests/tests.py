@@ -1,3 +1,473 @@
-from django.test import TestCase
+import json
+import os
+import statistics
+import sys
+import time
+from datetime import date, timedelta
+from io import StringIO
+from unittest import skipUnless
+from unittest.mock import patch
+from django.core.management import call_command
+from django.db import DatabaseError, connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APITestCase
+from .models import ChangeRequest, CostItem
+from .management.commands.explain_queries import flag
+from .pagination import ChangeRequestCursorPagination
+from .search import FullTextSearchFilter
 
-# Create your tests here.
+def change_request_data(number, cost_items=2):
+    """A valid POST body for the change request API."""
+    return {
+        'project_name': f'Project {number % 10}',
+        'change_number': f'CR-{number:05d}',
+        'requested_by': f'Requester {number % 25}',
+        'date_of_request': (date(2025, 1, 1) + timedelta(days=number % 365)).isoformat(),
+        'presented_to': 'Review Board',
+        'change_name': f'Change {number}',
+        'description': f'The build server needs a replacement disk ({number}).',
+        'reason': 'Capacity',
+        'effect_on_deliverables': 'None',
+        'effect_on_organization': 'None',
+        'effect_on_schedule': 'One day',
+        'effect_of_not_approving': 'Outage risk',
+        'cost_items': [
+            {'item_description': f'Item {i}', 'hours_increase': i + 1, 'dollars_increase': '100.00'}
+            for i in range(cost_items)
+        ],
+    }
+
+def create_change_requests(count, cost_items=2):
+    """Insert count change requests with their cost items directly through the ORM."""
+    change_requests = ChangeRequest.objects.bulk_create([
+        ChangeRequest(**{key: value for key, value in change_request_data(number).items() if key != 'cost_items'})
+        for number in range(count)
+    ])
+    CostItem.objects.bulk_create([
+        CostItem(change_request=change_request, item_description=f'Item {i}', hours_increase=i + 1,
+                 dollars_increase=100)
+        for change_request in change_requests
+        for i in range(cost_items)
+    ])
+    return change_requests
+
+class ChangeRequestViewSetTests(APITestCase):
+    url = reverse('changerequest-list')
+
+    def test_create_stores_cost_items(self):
+        response = self.client.post(self.url, change_request_data(1, cost_items=3), format='json')
+        self.assertEqual(response.status_code, 201)
+        change_request = ChangeRequest.objects.get(pk=response.data['id'])
+        self.assertEqual(change_request.cost_items.count(), 3)
+
+    def test_list_includes_cost_items(self):
+        create_change_requests(3)
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data['results']), 3)
+        self.assertEqual(len(response.data['results'][0]['cost_items']), 2)
+
+    def test_change_number_is_unique(self):
+        self.client.post(self.url, change_request_data(1), format='json')
+        response = self.client.post(self.url, change_request_data(1), format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('change_number', response.data)
+
+    def test_filter_and_search(self):
+        create_change_requests(20)
+        response = self.client.get(self.url, {'project_name': 'Project 3'})
+        self.assertEqual({item['project_name'] for item in response.data['results']}, {'Project 3'})
+        response = self.client.get(self.url, {'search': '(7)'})
+        self.assertEqual([item['change_number'] for item in response.data['results']], ['CR-00007'])
+
+class NestedWriteTests(APITestCase):
+    url = reverse('changerequest-list')
+
+    def detail_url(self, pk):
+        return reverse('changerequest-detail', args=[pk])
+
+    def count_queries(self, method, *args, **kwargs):
+        with CaptureQueriesContext(connection) as queries:
+            response = method(*args, format='json', **kwargs)
+        self.assertLess(response.status_code, 300, response.data)
+        return len(queries), response
+
+    def test_create_query_count_is_constant(self):
+        few, _ = self.count_queries(self.client.post, self.url, change_request_data(1, cost_items=2))
+        # 150 items of six columns fit in one INSERT under SQLite's 999 parameter limit.
+        many, response = self.count_queries(self.client.post, self.url, change_request_data(2, cost_items=150))
+        self.assertEqual(few, many)
+        self.assertEqual(len(response.data['cost_items']), 150)
+
+    def test_create_is_atomic(self):
+        with patch.object(CostItem.objects, 'bulk_create', side_effect=DatabaseError('disk full')):
+            with self.assertRaises(DatabaseError):
+                self.client.post(self.url, change_request_data(1), format='json')
+        self.assertFalse(ChangeRequest.objects.exists())
+
+    def update_body(self, change_request_id):
+        """Keep the first item, change the second, drop the rest and add two new ones."""
+        current = self.client.get(self.detail_url(change_request_id)).data
+        items = current['cost_items']
+        body = {**change_request_data(1), 'change_number': current['change_number'], 'change_name': 'Renamed'}
+        body['cost_items'] = [
+            items[0],
+            {**items[1], 'hours_reduction': 7, 'dollars_reduction': '12.50'},
+            {'item_description': 'New A', 'hours_increase': 1},
+            {'item_description': 'New B', 'dollars_increase': '3.00'},
+        ]
+        return body
+
+    def test_update_diffs_cost_items(self):
+        change_request = create_change_requests(1, cost_items=4)[0]
+        items = list(change_request.cost_items.order_by('id'))
+        response = self.client.put(self.detail_url(change_request.pk), self.update_body(change_request.pk), format='json')
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assertEqual(response.data['change_name'], 'Renamed')
+        stored = list(change_request.cost_items.order_by('id'))
+        self.assertEqual([item.id for item in stored[:2]], [items[0].id, items[1].id])
+        self.assertEqual((stored[1].hours_reduction, str(stored[1].dollars_reduction)), (7, '12.50'))
+        self.assertEqual([item.item_description for item in stored[2:]], ['New A', 'New B'])
+        self.assertEqual(len(response.data['cost_items']), 4)
+
+    def test_update_query_count_is_constant(self):
+        few, many = create_change_requests(2, cost_items=4)
+        many.cost_items.all().delete()
+        CostItem.objects.bulk_create([CostItem(change_request=many, item_description=f'Item {i}') for i in range(60)])
+        counts = [
+            self.count_queries(self.client.put, self.detail_url(change_request.pk),
+                               self.update_body(change_request.pk))[0]
+            for change_request in (few, many)
+        ]
+        self.assertEqual(counts[0], counts[1])
+
+    def test_patch_without_cost_items_keeps_them(self):
+        change_request = create_change_requests(1, cost_items=3)[0]
+        response = self.client.patch(self.detail_url(change_request.pk), {'reason': 'Budget'}, format='json')
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assertEqual(change_request.cost_items.count(), 3)
+
+    def test_update_rejects_foreign_cost_items(self):
+        mine, other = create_change_requests(2)
+        foreign = other.cost_items.first()
+        response = self.client.patch(self.detail_url(mine.pk), {
+            'cost_items': [{'id': foreign.id, 'item_description': 'Stolen'}]
+        }, format='json')
+        self.assertEqual(response.status_code, 400)
+        foreign.refresh_from_db()
+        self.assertEqual(foreign.item_description, 'Item 0')
+
+    def test_create_many(self):
+        few, response = self.count_queries(self.client.post, self.url, [change_request_data(n) for n in range(3)])
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual([item['change_number'] for item in response.data], ['CR-00000', 'CR-00001', 'CR-00002'])
+        self.assertEqual(CostItem.objects.count(), 6)
+        many, _ = self.count_queries(self.client.post, self.url, [change_request_data(n) for n in range(10, 40)])
+        # Change numbers are checked for the whole batch in one query.
+        self.assertEqual(few, many)
+        self.assertEqual(ChangeRequest.objects.count(), 33)
+
+    def test_create_many_rejects_existing_change_numbers(self):
+        create_change_requests(2)
+        response = self.client.post(self.url, [change_request_data(5), change_request_data(1)], format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('CR-00001', str(response.data))
+        self.assertEqual(ChangeRequest.objects.count(), 2)
+
+    def test_list_body_is_rejected_on_update(self):
+        change_request = create_change_requests(1)[0]
+        for method in (self.client.put, self.client.patch):
+            response = method(self.detail_url(change_request.pk), [change_request_data(1)], format='json')
+            self.assertEqual(response.status_code, 400)
+
+    def test_patch_requires_fields_of_new_cost_items(self):
+        change_request = create_change_requests(1, cost_items=1)[0]
+        item = change_request.cost_items.get()
+        response = self.client.patch(self.detail_url(change_request.pk), {
+            'cost_items': [{'id': item.id, 'hours_reduction': 3}, {'hours_increase': 2}]
+        }, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('item_description', response.data['cost_items'][1])
+        response = self.client.patch(self.detail_url(change_request.pk), {
+            'cost_items': [{'id': item.id, 'hours_reduction': 3}, {'item_description': 'New', 'hours_increase': 2}]
+        }, format='json')
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assertEqual(sorted(change_request.cost_items.values_list('item_description', flat=True)),
+                         ['Item 0', 'New'])
+
+    def test_create_many_rejects_repeated_change_numbers(self):
+        response = self.client.post(self.url, [change_request_data(1), change_request_data(1)], format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(ChangeRequest.objects.exists())
+
+    def test_create_many_is_capped(self):
+        with self.settings(CHANGE_REQUESTS_MAX_BULK_CREATE=2):
+            response = self.client.post(self.url, [change_request_data(n) for n in range(3)], format='json')
+        self.assertEqual(response.status_code, 400)
+
+class ChangeRequestQueryCountTests(APITestCase):
+    """The number of queries per request must not grow with the number of change requests."""
+    url = reverse('changerequest-list')
+
+    def assert_constant_queries(self, expected, params=None):
+        for count in (5, 50):
+            ChangeRequest.objects.all().delete()
+            create_change_requests(count)
+            with self.assertNumQueries(expected):
+                response = self.client.get(self.url, params)
+            self.assertEqual(len(response.data['results']), count)
+
+    def test_list_prefetches_cost_items(self):
+        self.assert_constant_queries(2)
+
+    def test_summary_skips_cost_items(self):
+        self.assert_constant_queries(1, {'summary': 'true'})
+
+    def test_totals_are_computed_in_sql(self):
+        self.assert_constant_queries(2, {'totals': 'true'})
+        self.assert_constant_queries(1, {'summary': 'true', 'totals': 'true'})
+
+    def test_retrieve_prefetches_cost_items(self):
+        change_request = create_change_requests(1)[0]
+        with self.assertNumQueries(2):
+            self.client.get(reverse('changerequest-detail', args=[change_request.pk]))
+
+class ChangeRequestRepresentationTests(APITestCase):
+    url = reverse('changerequest-list')
+
+    def test_totals(self):
+        create_change_requests(1, cost_items=3)
+        item = self.client.get(self.url, {'totals': 'true'}).data['results'][0]
+        self.assertEqual(item['total_hours_increase'], 6)
+        self.assertEqual(item['total_dollars_increase'], '300.00')
+        self.assertEqual(item['total_dollars_reduction'], '0.00')
+        self.assertEqual(len(item['cost_items']), 3)
+
+    def test_totals_without_cost_items(self):
+        create_change_requests(1, cost_items=0)
+        item = self.client.get(self.url, {'summary': 'true', 'totals': 'true'}).data['results'][0]
+        self.assertEqual(item['total_hours_increase'], 0)
+        self.assertEqual(item['total_dollars_increase'], '0.00')
+
+    def test_summary_omits_cost_items_and_totals_by_default(self):
+        create_change_requests(1)
+        item = self.client.get(self.url, {'summary': 'true'}).data['results'][0]
+        self.assertNotIn('cost_items', item)
+        self.assertNotIn('total_dollars_increase', item)
+        self.assertNotIn('total_dollars_increase', self.client.get(self.url).data['results'][0])
+
+class ChangeRequestPaginationTests(APITestCase):
+    url = reverse('changerequest-list')
+
+    def test_pages_walk_the_table_newest_first(self):
+        create_change_requests(25)
+        seen = []
+        url, params = self.url, {'page_size': 10}
+        while url:
+            response = self.client.get(url, params)
+            seen.extend(item['id'] for item in response.data['results'])
+            url, params = response.data['next'], None
+        self.assertEqual(seen, sorted(ChangeRequest.objects.values_list('id', flat=True), reverse=True))
+
+    def test_page_size_is_capped(self):
+        create_change_requests(5)
+        with patch.object(ChangeRequestCursorPagination, 'max_page_size', 3):
+            response = self.client.get(self.url, {'page_size': 1000})
+        self.assertEqual(len(response.data['results']), 3)
+
+    def test_deep_pages_take_the_same_queries(self):
+        create_change_requests(60)
+        response = self.client.get(self.url, {'page_size': 10})
+        for _ in range(4):
+            with self.assertNumQueries(2):
+                response = self.client.get(response.data['next'])
+        self.assertEqual(len(response.data['results']), 10)
+
+    def test_count_modes(self):
+        create_change_requests(12)
+        response = self.client.get(self.url)
+        self.assertNotIn('count', response.data)
+        response = self.client.get(self.url, {'count': 'exact', 'project_name': 'Project 3'})
+        self.assertEqual(response.data['count'], 1)
+        self.assertFalse(response.data['count_is_estimate'])
+        with patch.object(ChangeRequestCursorPagination, 'count_estimate_limit', 5):
+            response = self.client.get(self.url, {'count': 'estimate'})
+        self.assertEqual(response.data['count'], 5)
+        self.assertTrue(response.data['count_is_estimate'])
+
+class FullTextSearchTests(APITestCase):
+    url = reverse('changerequest-list')
+
+    def create(self, number, **fields):
+        data = change_request_data(number)
+        data.pop('cost_items')
+        return ChangeRequest.objects.create(**{**data, **fields})
+
+    def search(self, text, **params):
+        response = self.client.get(self.url, {'search': text, **params})
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def test_ranks_best_match_first(self):
+        self.create(1, description='The firewall rules need review.')
+        self.create(2, change_name='Firewall replacement', description='Swap the firewall appliance.')
+        self.create(3, description='Unrelated printer work.')
+        results = self.search('firewall')['results']
+        self.assertEqual([item['change_number'] for item in results], ['CR-00002', 'CR-00001'])
+
+    def test_prefix_and_phrase(self):
+        self.create(1, description='Migrate the database cluster.')
+        self.create(2, description='Cluster the database migration tasks.')
+        self.assertEqual(len(self.search('migrat*')['results']), 2)
+        self.assertEqual(len(self.search('migrat')['results']), 0)
+        results = self.search('"database cluster"')['results']
+        self.assertEqual([item['change_number'] for item in results], ['CR-00001'])
+
+    def test_searches_every_text_field(self):
+        self.create(1, effect_of_not_approving='Compliance audit failure.')
+        self.assertEqual(len(self.search('compliance')['results']), 1)
+
+    def test_snippet_highlights_match(self):
+        change_request = self.create(1, description='Replace the failing backup tape drive.')
+        item = self.search('backup')['results'][0]
+        self.assertIn('<mark>backup</mark>', item['search_snippet'])
+        detail_url = reverse('changerequest-detail', args=[change_request.pk])
+        self.assertIn('<mark>backup</mark>', self.client.get(detail_url, {'search': 'backup'}).data['search_snippet'])
+        self.assertNotIn('search_snippet', self.client.get(self.url).data['results'][0])
+
+    def test_index_follows_updates_and_deletes(self):
+        change_request = self.create(1, description='Upgrade the router.')
+        ChangeRequest.objects.filter(pk=change_request.pk).update(description='Upgrade the switch.')
+        self.assertEqual(len(self.search('router')['results']), 0)
+        self.assertEqual(len(self.search('switch')['results']), 1)
+        change_request.delete()
+        self.assertEqual(len(self.search('switch')['results']), 0)
+
+    def test_combines_with_filters_and_pages_by_rank(self):
+        create_change_requests(30)
+        data = self.search('build server', project_name='Project 3', page_size=2)
+        seen = [item['change_number'] for item in data['results']]
+        while data['next']:
+            data = self.client.get(data['next']).data
+            seen.extend(item['change_number'] for item in data['results'])
+        self.assertEqual(sorted(seen), ['CR-00003', 'CR-00013', 'CR-00023'])
+
+    def test_ranks_only_newest_matches(self):
+        for number in range(5):
+            self.create(number, description='Patch the kernel.')
+        self.create(5, description='Printer toner.')
+        self.create(6, change_name='Kernel kernel', description='Patch the kernel.')
+        with patch.object(FullTextSearchFilter, 'max_ranked', 3):
+            data = self.search('kernel', count='exact')
+        # The best match among the newest three comes first; older matches follow, newest first.
+        self.assertEqual([item['change_number'] for item in data['results']],
+                         ['CR-00006', 'CR-00004', 'CR-00003', 'CR-00002', 'CR-00001', 'CR-00000'])
+        self.assertEqual(data['count'], 6)
+        self.assertTrue(all('<mark>kernel</mark>' in item['search_snippet'].lower() for item in data['results']))
+
+    def test_pages_past_the_ranked_matches(self):
+        for number in range(7):
+            self.create(number, description='Patch the kernel.')
+        seen = []
+        with patch.object(FullTextSearchFilter, 'max_ranked', 3):
+            data = self.search('kernel', page_size=2, summary='true')
+            seen.extend(item['change_number'] for item in data['results'])
+            while data['next']:
+                data = self.client.get(data['next']).data
+                seen.extend(item['change_number'] for item in data['results'])
+                self.assertTrue(all(item['search_snippet'] for item in data['results']))
+        self.assertEqual(sorted(seen), [f'CR-{number:05d}' for number in range(7)])
+        self.assertEqual(seen[3:], ['CR-00003', 'CR-00002', 'CR-00001', 'CR-00000'])
+
+    def test_query_syntax_is_never_an_error(self):
+        self.create(1, description='Anything at all.')
+        for text in ('"', 'AND', 'NOT (', '*', 'a:b', '-x', 'OR "anything'):
+            self.search(text)
+
+class ExplainQueriesCommandTests(APITestCase):
+    def explain(self):
+        out = StringIO()
+        call_command('explain_queries', '--json', stdout=out)
+        return json.loads(out.getvalue())
+
+    def test_common_queries_use_indexes(self):
+        create_change_requests(20)
+        result = self.explain()
+        self.assertEqual(result['flagged'], 0, json.dumps(result, indent=2))
+        call_command('explain_queries', '--fail-on-scan', stdout=StringIO())
+
+    def test_flag_rules(self):
+        self.assertEqual(flag('SCAN t', 'SELECT * FROM t WHERE a = 1 ORDER BY id DESC LIMIT 21'), 'full scan')
+        self.assertEqual(flag('SCAN t', 'SELECT COUNT(*) FROM t'), 'full scan')
+        self.assertEqual(flag('USE TEMP B-TREE FOR ORDER BY', 'SELECT * FROM t ORDER BY a'), 'sort')
+        self.assertIsNone(flag('SCAN t', 'SELECT * FROM t ORDER BY id DESC LIMIT 21'))
+        self.assertIsNone(flag('SCAN t', 'SELECT (SELECT SUM(x) FROM u WHERE u.t_id = t.id) FROM t LIMIT 21'))
+        self.assertIsNone(flag('SCAN t USING COVERING INDEX i', 'SELECT COUNT(*) FROM t'))
+        self.assertIsNone(flag('SEARCH t USING INDEX i (a=?)', 'SELECT * FROM t WHERE a = 1'))
+        self.assertIsNone(flag('SCAN fts VIRTUAL TABLE INDEX 0:M7', 'SELECT * FROM fts WHERE fts MATCH 1'))
+
+@skipUnless(os.getenv('RUN_BENCHMARKS'), 'set RUN_BENCHMARKS=1 to run the benchmarks')
+class ChangeRequestViewSetBenchmark(APITestCase):
+    """List and create latency of the API.
+
+    Results are written as JSON to BENCHMARK_OUTPUT, or to stderr when it is
+    unset. BENCHMARK_ROWS sets the table size (default 1000).
+    """
+    rows = int(os.getenv('BENCHMARK_ROWS', '1000'))
+    iterations = int(os.getenv('BENCHMARK_ITERATIONS', '20'))
+    url = reverse('changerequest-list')
+    results = []
+
+    @classmethod
+    def setUpTestData(cls):
+        create_change_requests(cls.rows)
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        output = os.getenv('BENCHMARK_OUTPUT')
+        if output:
+            with open(output, 'w') as f:
+                json.dump(cls.results, f, indent=2)
+        else:
+            json.dump(cls.results, sys.stderr, indent=2)
+
+    def record(self, name, samples):
+        ordered = sorted(samples)
+        self.results.append({
+            'name': name,
+            'rows': self.rows,
+            'iterations': len(samples),
+            'mean_ms': statistics.mean(samples) * 1000,
+            'p50_ms': ordered[len(ordered) // 2] * 1000,
+            'p95_ms': ordered[int(0.95 * (len(ordered) - 1))] * 1000,
+            'ops_per_sec': len(samples) / sum(samples),
+        })
+
+    def test_list_latency(self):
+        samples = []
+        for _ in range(self.iterations):
+            start_time = time.perf_counter()
+            response = self.client.get(self.url)
+            samples.append(time.perf_counter() - start_time)
+            self.assertEqual(response.status_code, 200)
+        self.record('django_list_change_requests', samples)
+
+    def test_search_latency(self):
+        samples = []
+        for _ in range(self.iterations):
+            start_time = time.perf_counter()
+            response = self.client.get(self.url, {'search': 'replacement disk', 'summary': 'true', 'page_size': 20})
+            samples.append(time.perf_counter() - start_time)
+            self.assertEqual(response.status_code, 200)
+        self.record('django_search_change_requests', samples)
+
+    def test_create_latency(self):
+        samples = []
+        for number in range(self.iterations):
+            start_time = time.perf_counter()
+            response = self.client.post(self.url, change_request_data(self.rows + number), format='json')
+            samples.append(time.perf_counter() - start_time)
+            self.assertEqual(response.status_code, 201)
+        self.record('django_create_change_request', samples)
@@ -1,14 +1,96 @@
-from rest_framework import viewsets, filters
+from decimal import Decimal
+from django.conf import settings
+from django.db.models import DecimalField, IntegerField, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+from rest_framework import viewsets
 from django_filters.rest_framework import DjangoFilterBackend
-from .models import ChangeRequest
-from .serializers import ChangeRequestSerializer
+from .models import ChangeRequest, CostItem
+from .search import FullTextSearchFilter
+from .serializers import ChangeRequestSerializer, ChangeRequestSummarySerializer
+
+def cost_total(field, output_field, zero):
+    """
+    The sum of one cost item column for each change request, as a correlated
+    subquery: SQLite evaluates it only for the rows on the page, where a JOIN
+    with GROUP BY would aggregate the whole table before the LIMIT applies.
+    """
+    total = (
+        CostItem.objects.filter(change_request=OuterRef('pk'))
+        .values('change_request')
+        .annotate(total=Sum(field))
+        .values('total')
+    )
+    return Coalesce(Subquery(total, output_field=output_field), Value(zero), output_field=output_field)
+
+COST_TOTALS = {
+    'total_hours_reduction': cost_total('hours_reduction', IntegerField(), 0),
+    'total_hours_increase': cost_total('hours_increase', IntegerField(), 0),
+    'total_dollars_reduction': cost_total(
+        'dollars_reduction', DecimalField(max_digits=12, decimal_places=2), Decimal('0')
+    ),
+    'total_dollars_increase': cost_total(
+        'dollars_increase', DecimalField(max_digits=12, decimal_places=2), Decimal('0')
+    ),
+}
+
+def query_flag(request, name):
+    return request.query_params.get(name, '').lower() in ('1', 'true', 'yes')
 
 class ChangeRequestViewSet(viewsets.ModelViewSet):
     """
     ViewSet for managing change requests with filtering and search capabilities.
+
+    Cost items are prefetched in one query, so listing does not issue a query
+    per change request. On list and retrieve, ?totals=true adds cost sums
+    computed in SQL and ?summary=true returns rows without nested cost items.
+    ?search= is a full-text search ranked by relevance, with a highlighted
+    search_snippet on each result. POSTing a list creates every change request
+    in it in one transaction, up to CHANGE_REQUESTS_MAX_BULK_CREATE at a time.
     """
-    queryset = ChangeRequest.objects.all()
+    queryset = ChangeRequest.objects.prefetch_related('cost_items')
     serializer_class = ChangeRequestSerializer
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter]
+    filter_backends = [DjangoFilterBackend, FullTextSearchFilter]
     filterset_fields = ['project_name', 'requested_by', 'date_of_request']
-    search_fields = ['description']
\ No newline at end of file
+    # Only used by FullTextSearchFilter's LIKE fallback on databases without FTS5.
+    search_fields = [
+        'change_name',
+        'description',
+        'reason',
+        'effect_on_deliverables',
+        'effect_on_organization',
+        'effect_on_schedule',
+        'effect_of_not_approving'
+    ]
+
+    def is_read(self):
+        return self.request is not None and self.action in ('list', 'retrieve')
+
+    def wants_summary(self):
+        return self.is_read() and query_flag(self.request, 'summary')
+
+    def wants_totals(self):
+        return self.is_read() and query_flag(self.request, 'totals')
+
+    def get_queryset(self):
+        queryset = ChangeRequest.objects.all() if self.wants_summary() else super().get_queryset()
+        if self.wants_totals():
+            queryset = queryset.annotate(**COST_TOTALS)
+        return queryset
+
+    def get_serializer_class(self):
+        if self.wants_summary():
+            return ChangeRequestSummarySerializer
+        return super().get_serializer_class()
+
+    def get_serializer(self, *args, **kwargs):
+        # Only create takes a list; elsewhere a list body gets the usual 400.
+        if self.action == 'create' and isinstance(kwargs.get('data'), list):
+            kwargs['many'] = True
+            kwargs['max_length'] = getattr(settings, 'CHANGE_REQUESTS_MAX_BULK_CREATE', 1000)
+        return super().get_serializer(*args, **kwargs)
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context['with_totals'] = self.wants_totals()
+        context['search_query'] = FullTextSearchFilter().get_query(self.request) if self.is_read() else ''
+        return context
@@ -81,6 +81,11 @@ def on_submit_click(event):
         response = requests.post(database_api_url, json=change_request_data)
         if response.status_code == 201:
             message_pane.object = "Change request submitted successfully."
+            change_number.value = f"CR-{generate_cr_num()}"
+        elif response.status_code == 400 and "change_number" in response.json():
+            # Change numbers are unique; draw a new one so the form can be resubmitted.
+            change_number.value = f"CR-{generate_cr_num()}"
+            message_pane.object = "That change number is already taken; a new one has been assigned, please submit again."
         else:
             message_pane.object = f"Error submitting change request: {response.text}"
     except Exception as e:
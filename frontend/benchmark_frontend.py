@@ -0,0 +1,83 @@
+"""Benchmark the chat and plotting paths of the frontend against generated data.
+
+Times context building (retrieval index, convert_df_to_text, create_prompt) for
+the Database Query chat and filter_simulated_data/generate_plot for the
+plotting chat, at each table size. No LLM calls are made.
+
+    python benchmark_frontend.py --sizes 1000 10000 100000 --json
+"""
+import argparse
+import contextlib
+import json
+import os
+import sys
+import tempfile
+import pandas as pd
+
+BACKEND = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "backend")
+sys.path.append(os.path.join(BACKEND, "api"))
+sys.path.append(os.path.join(BACKEND, "database"))
+from benchmark_api import summarize, timed
+from fake_data import iter_chunks, write_database
+
+QUESTION = "Which hardware issues mention the build server?"
+
+def records(rows, seed=0):
+    return [record for chunk in iter_chunks(rows, seed) for record in chunk]
+
+def benchmark(sizes, iterations=20, plot_rows=2000, seed=0):
+    path = os.path.join(tempfile.mkdtemp(prefix="crs-bench-"), "change_requests.db")
+    write_database(iter_chunks(1000, seed), path)
+    os.environ.update(CHANGE_REQUESTS_DB=path, REFRESH_INTERVAL="0", TOGETHER_API_KEY=os.getenv("TOGETHER_API_KEY", "benchmark"))
+    import matplotlib.pyplot as plt
+    import llama3_interface
+    import model_interface
+    from retrieval import RowRetriever
+
+    results = []
+    for rows in sizes:
+        data = records(rows, seed)
+        df = pd.DataFrame([{**record, "cost_items": json.dumps(record["cost_items"])} for record in data])
+        df.insert(0, "id", range(1, rows + 1))
+
+        holder = {}
+        results.append(summarize("retrieval_index_build", timed(lambda: holder.update(r=RowRetriever(df)), 3), rows=rows))
+        retriever = holder["r"]
+        results.append(summarize("retrieval_retrieve", timed(
+            lambda: retriever.retrieve(QUESTION, limit=model_interface.MAX_CONTEXT_ROWS), iterations), rows=rows))
+        candidates, _ = retriever.retrieve(QUESTION, limit=model_interface.MAX_CONTEXT_ROWS)
+        results.append(summarize("convert_df_to_text", timed(
+            lambda: model_interface.convert_df_to_text(candidates, total_rows=rows), iterations), rows=rows))
+        context = model_interface.convert_df_to_text(candidates, total_rows=rows)
+        results.append(summarize("create_prompt", timed(
+            lambda: model_interface.create_prompt(context, QUESTION), iterations), rows=rows))
+
+        llama3_interface.SIMULATED_DATA = data
+        project = data[0]["project_name"].lower()
+        results.append(summarize("filter_simulated_data", timed(
+            lambda: llama3_interface.filter_simulated_data({"project_name": project}), iterations), rows=rows))
+        plot_df = llama3_interface.filter_simulated_data({}).head(plot_rows)
+        for plot_type in ("Change Requests per Project", "Total Cost Increase"):
+            def plot():
+                plt.close(llama3_interface.generate_plot(plot_df.copy(), plot_type))
+            results.append(summarize("generate_plot", timed(plot, 3), rows=len(plot_df), plot_type=plot_type))
+    return results
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark frontend prompt building and plotting.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--iterations", type=int, default=20)
+    parser.add_argument("--plot-rows", type=int, default=2000, help="rows plotted per generate_plot call")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", action="store_true", help="print machine-readable results")
+    args = parser.parse_args()
+
+    # The modules under test log every call; keep that off stdout so --json output stays parseable.
+    with contextlib.redirect_stdout(sys.stderr):
+        results = benchmark(args.sizes, args.iterations, args.plot_rows, args.seed)
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        for result in results:
+            label = f"{result['name']} ({result['rows']} rows{', ' + result['plot_type'] if 'plot_type' in result else ''})"
+            print(f"{label:<60} p50 {result['p50_ms']:9.3f} ms  p95 {result['p95_ms']:9.3f} ms")
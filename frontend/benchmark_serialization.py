@@ -0,0 +1,108 @@
+"""Time DataFrame-to-prompt serialization on fake change requests.
+
+Compares the original convert_df_to_text loop (iterrows and += with per-cell
+markup), the same TSV output built row by row, and the vectorized serializer in
+prompt_budget, at each table size. Fake rows are sampled from a pool generated
+with Faker so large tables are quick to build.
+
+    python benchmark_serialization.py --sizes 1000 10000 100000 --json
+"""
+import argparse
+import json
+import random
+import time
+import pandas as pd
+from faker import Faker
+from prompt_budget import iter_rows_text, render_rows
+
+CATEGORIES = ["hardware issue", "software issue", "personnel issue", "other"]
+
+def fake_table(rows, pool_size=2000, seed=0):
+    """Return a change_requests-shaped DataFrame of rows rows drawn from pool_size Faker rows."""
+    fake = Faker()
+    Faker.seed(seed)
+    rng = random.Random(seed)
+    pool = [{
+        "project_name": fake.company(),
+        "change_number": f"CR-{fake.random_number(digits=3)}",
+        "requested_by": fake.name(),
+        "date_of_request": fake.date_this_year().strftime("%Y-%m-%d"),
+        "presented_to": fake.name(),
+        "change_name": fake.catch_phrase(),
+        "description": fake.paragraph(),
+        "reason": fake.sentence(),
+        "cost_items": json.dumps([{"item": fake.word(), "cost": fake.random_number(digits=3)}
+                                  for _ in range(rng.randint(1, 5))]),
+        "category": rng.choice(CATEGORIES),
+        "timestamp": fake.date_time_this_year().strftime("%Y-%m-%d %H:%M:%S"),
+    } for _ in range(min(pool_size, rows))]
+    df = pd.DataFrame([pool[rng.randrange(len(pool))] for _ in range(rows)])
+    df.insert(0, "id", range(1, rows + 1))
+    return df
+
+def legacy_convert_df_to_text(df):
+    """The original serializer, kept as the baseline."""
+    data_text = f"Database: change_requests\nTotal Entries: {len(df)}\nColumns: {', '.join(df.columns)}\n\n"
+    for i, (_, row) in enumerate(df.iterrows(), 1):
+        data_text += f"Change Request {i}:\n"
+        for col in df.columns:
+            data_text += f"  **{col}**: {row[col]}\n"
+        data_text += "\n"
+    return data_text
+
+def rowwise_tsv(df):
+    """TSV built one row at a time, to separate the format change from the vectorization."""
+    lines = ["\t".join(df.columns)]
+    for row in df.itertuples(index=False, name=None):
+        lines.append("\t".join("" if value is None else " ".join(str(value).split()) for value in row))
+    return "\n".join(lines) + "\n"
+
+def chunked_tsv(df, chunk_rows=10000):
+    """Consume the streaming serializer the way a file writer would, without joining the chunks."""
+    return sum(len(chunk) for chunk in iter_rows_text(df, chunk_rows))
+
+def timed(function, df, repeat):
+    best = None
+    for _ in range(repeat):
+        start_time = time.perf_counter()
+        function(df)
+        elapsed = time.perf_counter() - start_time
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+def benchmark(sizes, repeat=3, legacy_max_rows=100000):
+    results = []
+    for rows in sizes:
+        df = fake_table(rows)
+        result = {"name": "dataframe_serialization", "rows": rows}
+        if rows <= legacy_max_rows:
+            result["legacy_seconds"] = timed(legacy_convert_df_to_text, df, 1)
+        result["rowwise_tsv_seconds"] = timed(rowwise_tsv, df, repeat)
+        result["vectorized_seconds"] = timed(render_rows, df, repeat)
+        result["chunked_seconds"] = timed(chunked_tsv, df, repeat)
+        if "legacy_seconds" in result:
+            result["speedup_vs_legacy"] = result["legacy_seconds"] / result["vectorized_seconds"]
+        result["speedup_vs_rowwise"] = result["rowwise_tsv_seconds"] / result["vectorized_seconds"]
+        result["best_ms"] = result["vectorized_seconds"] * 1000
+        results.append(result)
+    return results
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark DataFrame-to-prompt serialization.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--repeat", type=int, default=3, help="runs per serializer, the best is reported")
+    parser.add_argument("--legacy-max-rows", type=int, default=100000,
+                        help="skip the original loop above this many rows")
+    parser.add_argument("--json", action="store_true", help="print machine-readable results")
+    args = parser.parse_args()
+
+    results = benchmark(args.sizes, args.repeat, args.legacy_max_rows)
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        for result in results:
+            legacy = f"{result['legacy_seconds']:.3f}s" if "legacy_seconds" in result else "skipped"
+            speedup = f"{result['speedup_vs_legacy']:.1f}x" if "speedup_vs_legacy" in result else "n/a"
+            print(f"{result['rows']:>7} rows: legacy {legacy}, row-wise TSV {result['rowwise_tsv_seconds']:.3f}s, "
+                  f"vectorized {result['vectorized_seconds']:.3f}s, chunked {result['chunked_seconds']:.3f}s "
+                  f"(speedup {speedup} vs legacy, {result['speedup_vs_rowwise']:.1f}x vs row-wise)")
@@ -112,7 +112,10 @@ def on_submit_click(event):
         response_data = response.json()
         
         category = response_data.get("category", "unknown")
-        pn.state.notifications.success(f"Change request submitted successfully. Category: {category}")
+        if category == "pending":
+            pn.state.notifications.success("Change request submitted successfully. Categorization in progress.")
+        else:
+            pn.state.notifications.success(f"Change request submitted successfully. Category: {category}")
         
         reset_form()
     except requests.exceptions.RequestException as e:
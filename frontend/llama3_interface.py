@@ -4,6 +4,7 @@ import pandas as pd
 import matplotlib.pyplot as plt
 import matplotlib
 import re
+import requests
 
 # Set Matplotlib backend to 'agg' before any plotting
 matplotlib.use('agg')
@@ -14,6 +15,8 @@ pn.extension(theme="dark")
 # Global variable to store the last DataFrame
 last_df = None
 
+stats_api_url = "http://127.0.0.1:8000/change_requests/stats"
+
 # Simulated database of change requests
 SIMULATED_DATA = [
     {
@@ -122,6 +125,40 @@ def generate_plot(df, plot_type):
     
     return None
 
+def fetch_stats(params):
+    """Fetch server-side aggregates, translating parse_query parameters to the stats API filters.
+
+    parse_query lowercases names; the API matches project and requester names case-insensitively.
+    """
+    api_params = {
+        "project_name": params.get('project_name'),
+        "requested_by": params.get('requested_by'),
+        "date_from": params.get('date_of_request__gte'),
+        "date_to": params.get('date_of_request__lte'),
+    }
+    response = requests.get(stats_api_url, params={k: v for k, v in api_params.items() if v}, timeout=10)
+    response.raise_for_status()
+    return response.json()
+
+def generate_stats_plot(stats, plot_type):
+    """Generate a Matplotlib plot from pre-aggregated stats instead of raw rows."""
+    plt.style.use('dark_background')
+    if plot_type == 'Change Requests per Category':
+        series = pd.Series({entry['name']: entry['count'] for entry in stats['per_category']})
+        title, xlabel = "Change Requests per Category", "Category"
+    elif plot_type == 'Change Requests per Month':
+        series = pd.Series({entry['month']: entry['count'] for entry in stats['per_month']})
+        title, xlabel = "Change Requests per Month", "Month"
+    else:
+        series = pd.Series({entry['name']: entry['count'] for entry in stats['per_project']})
+        title, xlabel = "Change Requests per Project (top)", "Project Name"
+    fig, ax = plt.subplots()
+    series.plot(kind='bar', ax=ax)
+    ax.set_title(title)
+    ax.set_xlabel(xlabel)
+    ax.set_ylabel("Number of Requests")
+    return fig
+
 
 def query_callback(contents, user, instance):
     """Handle user messages: process queries, return results, and manage plot requests."""
@@ -138,6 +175,26 @@ def query_callback(contents, user, instance):
         plot_area.object = fig
         return
     
+    if re.search(r'\b(stats|statistics|dashboard)\b', message):
+        try:
+            stats = fetch_stats(parse_query(message))
+        except requests.RequestException as e:
+            instance.send(f"Couldn't reach the stats API: {e}")
+            return
+        costs = stats['costs']
+        instance.send(
+            f"{stats['total']} change requests, net cost increase ${costs['net_dollars_increase']:,.2f} "
+            f"({costs['hours_increase'] - costs['hours_reduction']} net hours)."
+        )
+        if 'category' in message:
+            plot_type = 'Change Requests per Category'
+        elif 'month' in message:
+            plot_type = 'Change Requests per Month'
+        else:
+            plot_type = 'Change Requests per Project'
+        plot_area.object = generate_stats_plot(stats, plot_type)
+        return
+
     if re.search(r'\b(show|list|find|get)\b', message) and 'change request' in message:
         params = parse_query(message)
         df = filter_simulated_data(params)
@@ -177,7 +234,7 @@ chat_interface.placeholder = "Type your query here (e.g., 'Show me change reques
 
 # welcome message
 chat_interface.send(
-    "Hi! I’m here to help you query change requests. Type 'Test me!' for a demo with simulated data and a plot, or use a natural language query like 'Show me all change requests for project Alpha' or 'List change requests by John Doe after 2023-01-01'. Once you see results, you can request a plot, like 'plot change requests per project'. What would you like to do?",
+    "Hi! I’m here to help you query change requests. Type 'Test me!' for a demo with simulated data and a plot, or use a natural language query like 'Show me all change requests for project Alpha' or 'List change requests by John Doe after 2023-01-01'. Type 'stats', 'stats per category' or 'stats per month' for live database statistics. Once you see results, you can request a plot, like 'plot change requests per project'. What would you like to do?",
     user="System",
     respond=False
 )
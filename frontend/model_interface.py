@@ -1,20 +1,35 @@
+import asyncio
+import hashlib
+import itertools
 import sqlite3
+import sys
 import pandas as pd
 import requests
 import os
 import time
 from dotenv import load_dotenv
 import panel as pn
+# The LLM client is shared with the backend so both reuse one connection pool and one endpoint config.
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "backend", "api"))
+from llm_client import LLMError, get_client
+from refresh import IncrementalLoader, PeriodicRefresher
+from prompt_budget import pack_rows
+from response_cache import DataVersion, ResponseCache
+from retrieval import RowRetriever
+from sql_mode import answer_with_sql
 
 pn.extension(theme="dark", notifications=True)
 
 load_dotenv()
 TOGETHER_API_KEY = os.getenv("TOGETHER_API_KEY")
+CHANGE_REQUESTS_API_URL = os.getenv("CHANGE_REQUESTS_API_URL")  # e.g. http://127.0.0.1:8000/change_requests
+DATABASE_PATH = os.getenv("CHANGE_REQUESTS_DB", "../backend/database/change_requests.db")
+REFRESH_INTERVAL = float(os.getenv("REFRESH_INTERVAL", "5"))  # seconds between polls for new rows, 0 disables
 if not TOGETHER_API_KEY:
     print("Error: TOGETHER_API_KEY not found.")
     exit(1)
 
-def load_database(db_path="../backend/database/change_requests.db"):
+def load_database(db_path=DATABASE_PATH):
     try:
         with sqlite3.connect(db_path) as conn:
             df = pd.read_sql_query("SELECT * FROM change_requests", conn)
@@ -24,34 +39,109 @@ def load_database(db_path="../backend/database/change_requests.db"):
         print(f"Database error: {e}")
         return pd.DataFrame()
 
-table = load_database()
+def load_database_from_api(api_url, page_size=500):
+    """Page through GET /change_requests instead of reading the database file directly."""
+    rows = []
+    cursor = None
+    try:
+        while True:
+            params = {"limit": page_size}
+            if cursor:
+                params["cursor"] = cursor
+            response = requests.get(api_url, params=params, timeout=30)
+            response.raise_for_status()
+            page = response.json()
+            rows.extend(page["items"])
+            cursor = page["next_cursor"]
+            if not cursor:
+                break
+        print(f"Loaded {len(rows)} rows from {api_url}")
+        return pd.DataFrame(rows)
+    except requests.RequestException as e:
+        print(f"API error: {e}")
+        return pd.DataFrame()
+
+table = load_database_from_api(CHANGE_REQUESTS_API_URL) if CHANGE_REQUESTS_API_URL else load_database()
 if table.empty:
     print("Failed to load database. Exiting.")
     exit(1)
 
-def convert_df_to_text(df):
-    total_rows = len(df)
-    columns = ", ".join(df.columns)
-    data_text = f"Database: change_requests\nTotal Entries: {total_rows}\nColumns: {columns}\n\n"
-    for i, (_, row) in enumerate(df.iterrows(), 1):
-        data_text += f"Change Request {i}:\n"
-        for col in df.columns:
-            data_text += f"  **{col}**: {row[col]}\n"
-        data_text += "\n"
-    print(f"Generated database text with {total_rows} rows, length: {len(data_text)} characters")
+CONTEXT_TOKEN_BUDGET = int(os.getenv("CONTEXT_TOKEN_BUDGET", "7000"))  # tokens of row data per prompt
+MAX_CONTEXT_ROWS = int(os.getenv("RETRIEVAL_MAX_ROWS", "400"))  # candidates retrieved before budgeting
+
+def convert_df_to_text(df, total_rows=None, header_lines=(), budget=CONTEXT_TOKEN_BUDGET):
+    """Render rows as TSV, keeping whole rows in the order given until the token budget is spent."""
+    total_rows = len(df) if total_rows is None else total_rows
+    rows_text, shown, dropped, tokens = pack_rows(df, budget)
+    lines = [
+        "Database: change_requests",
+        f"Total Entries: {total_rows}",
+        *header_lines,
+        f"Entries Shown: {shown}",
+        "",
+        "Rows (tab-separated, header first):",
+        rows_text,
+    ]
+    data_text = "\n".join(lines) + "\n"
+    print(f"Generated database text with {shown} rows ({dropped} dropped for the budget), ~{tokens} tokens")
     return data_text
 
-database_text = convert_df_to_text(table)
+retriever = RowRetriever(table)
+
+def build_context(question):
+    """Render the rows most relevant to the question that fit the token budget, with counts so totals stay exact."""
+    rows, info = retriever.retrieve(question, limit=MAX_CONTEXT_ROWS)
+    header_lines = [
+        f"Entries Matching Filters {info['filters'] or '{}'}: {info['matching']}",
+        f"Ranked by relevance to: {', '.join(info['terms']) or 'most recent'}",
+    ]
+    return convert_df_to_text(rows, total_rows=retriever.count(), header_lines=header_lines)
+
+loader = IncrementalLoader(
+    table["id"].max() if "id" in table else 0,
+    IncrementalLoader.pending_in(table),
+    db_path=DATABASE_PATH,
+    api_url=CHANGE_REQUESTS_API_URL,
+)
+
+def rows_digest(df):
+    """Order-insensitive hash of the rows' contents."""
+    if df.empty:
+        return 0
+    return int(pd.util.hash_pandas_object(df.astype(str), index=False).sum())
+
+def data_fingerprint(previous, new_rows, updated_rows):
+    """Fold only the rows a refresh added or changed into the previous fingerprint.
+
+    Cached answers are tied to the fingerprint, so any change to the data moves
+    it, at a cost proportional to the change rather than to the table.
+    """
+    return hashlib.sha1(f"{previous}:{rows_digest(new_rows):x}:{rows_digest(updated_rows):x}".encode()).hexdigest()[:16]
+
+# Hashed in full once at startup; the response cache may be on disk and outlive this process.
+table_fingerprint = data_fingerprint(len(table), table, pd.DataFrame())
+# From here on the retriever's copy is the table; refreshes only touch the rows that changed.
+del table
+
+def refresh_table():
+    """Append rows added since the last poll and apply late category updates, without a full reload."""
+    global table_fingerprint
+    new_rows, updated_rows = loader.poll()
+    if new_rows.empty and updated_rows.empty:
+        return 0
+    retriever.add_rows(new_rows)
+    retriever.update_rows(updated_rows)
+    table_fingerprint = data_fingerprint(table_fingerprint, new_rows, updated_rows)
+    print(f"Refreshed table: {len(new_rows)} new rows, {len(updated_rows)} updated rows, {retriever.count()} total")
+    return len(new_rows) + len(updated_rows)
+
+refresher = PeriodicRefresher(refresh_table, REFRESH_INTERVAL)
 
 def create_prompt(database_text, question):
-    max_db_length = 26000  # ~7,000 tokens, leaving room for prompt overhead
-    if len(database_text) > max_db_length:
-        database_text = database_text[:max_db_length] + "... [truncated]"
-        print(f"Warning: Database text truncated to {max_db_length} characters. Full length: {len(database_text)}")
     prompt = f"""You are a precise database assistant. Answer the user's question based on the provided database content. Follow these rules:
 - Provide clear and concise answers using all available data.
-- Use 'Total Entries' for total counts.
-- For queries about 'issues', check the '**category**' field unless another field (e.g., '**description**') is specified.
+- Use 'Total Entries' for total counts and 'Entries Matching Filters' for counts of the filtered subset; only a ranked sample of rows is shown.
+- For queries about 'issues', check the 'category' column unless another column (e.g., 'description') is specified.
 - For lists or detailed responses, provide complete information.
 
 Database content:
@@ -62,53 +152,94 @@ Question: {question}
 Answer:"""
     return prompt
 
-response_cache = {}
-def generate_response(question):
-    print(f"Generating response for question: {question}")
-    if question in response_cache:
-        print("Returning cached response.")
-        return response_cache[question]
-    
-    start_time = time.time()
-    prompt = create_prompt(database_text, question)
+def complete(prompt, max_tokens=500, stop=("\n\n",)):
+    """Send a prompt to the completions API and return the generated text."""
     print(f"Prompt length: {len(prompt)} characters")
-    
+    return get_client().complete(prompt, max_tokens=max_tokens, stop=stop, top_p=0.95).strip()
+
+def stream_complete(prompt, max_tokens=500, stop=("\n\n",)):
+    """Yield text chunks from the completions API as they arrive; closing the generator closes the connection."""
+    print(f"Prompt length: {len(prompt)} characters")
+    return get_client().astream(prompt, max_tokens=max_tokens, stop=stop, top_p=0.95)
+
+QUERY_MODES = {"Rows": "rows", "SQL": "sql"}
+
+response_cache = ResponseCache(
+    max_entries=int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", "500")),
+    max_bytes=int(os.getenv("RESPONSE_CACHE_MAX_BYTES", str(5 * 1024 * 1024))),
+    path=os.getenv("RESPONSE_CACHE_PATH"),
+)
+# Without the refresher table_fingerprint never moves, but SQL mode reads the live database.
+sql_data_version = DataVersion(DATABASE_PATH) if REFRESH_INTERVAL <= 0 else None
+
+# Each question takes the next number; a stream stops as soon as a newer question has been asked.
+question_counter = itertools.count(1)
+latest_question = 0
+
+async def stream_response(question, mode="rows"):
+    """Yield the answer to a question as it grows, streaming tokens in "rows" mode.
+
+    SQL mode needs the full query before it can run it, so it runs in a worker
+    thread and yields once. Only answers that finish are cached.
+    """
+    global latest_question
+    question_id = latest_question = next(question_counter)
+    print(f"Streaming response for question: {question} (mode: {mode})")
+    fingerprint = table_fingerprint
+    if mode == "sql" and sql_data_version is not None:
+        fingerprint = f"{fingerprint}:{sql_data_version()}"
+    cached = response_cache.get(mode, question, fingerprint)
+    if cached is not None:
+        print(f"Returning cached response. Cache: {response_cache.stats()}")
+        yield cached
+        return
+
+    start_time = time.time()
+    if mode == "sql":
+        try:
+            answer = await asyncio.to_thread(answer_with_sql, question, complete, DATABASE_PATH)
+        except LLMError as e:
+            yield f"API error: {e}"
+            return
+        response_cache.put(mode, question, fingerprint, answer)
+        print(f"API call: {time.time() - start_time:.2f}s")
+        yield answer
+        return
+
+    prompt = await asyncio.to_thread(lambda: create_prompt(build_context(question), question))
+    answer = ""
+    first_token_time = None
     try:
-        response = requests.post(
-            "https://api.together.xyz/v1/completions",
-            headers={
-                "Authorization": f"Bearer {TOGETHER_API_KEY}",
-                "Content-Type": "application/json"
-            },
-            json={
-                "model": "meta-llama/Llama-3.3-70B-Instruct-Turbo-Free",
-                "prompt": prompt,
-                "max_tokens": 500,
-                "temperature": 0.0,
-                "top_p": 0.95,
-                "stop": ["\n\n"]
-            }
-        )
-        response.raise_for_status()
-        result = response.json()
-        answer = result.get("choices", [{}])[0].get("text", "").strip()
-    except requests.RequestException as e:
-        answer = f"API error: {e}"
-        if hasattr(e.response, 'text'):
-            print(f"Error details: {e.response.text}")
-    
-    api_time = time.time() - start_time
-    print(f"API call: {api_time:.2f}s")
+        async for chunk in stream_complete(prompt):
+            if question_id != latest_question:
+                print(f"Stopped streaming answer to {question!r}: a newer question was asked")
+                return
+            if first_token_time is None:
+                first_token_time = time.time() - start_time
+                print(f"Time to first token: {first_token_time:.2f}s")
+            answer += chunk
+            yield answer
+    except LLMError as e:
+        yield f"{answer}\n\nAPI error: {e}" if answer else f"API error: {e}"
+        return
+    answer = answer.strip()
+    response_cache.put(mode, question, fingerprint, answer)
+    print(f"API call: {time.time() - start_time:.2f}s")
     print(f"Response: {answer}")
-    
-    response_cache[question] = answer
-    return answer
+    print(f"LLM client: {get_client().stats()}")
+    yield answer
 
-def chat_callback(contents, user, instance):
+refresher.start()
+
+query_mode = pn.widgets.RadioButtonGroup(name="Query Mode", options=list(QUERY_MODES), value="Rows")
+
+async def chat_callback(contents, user, instance):
     instance.placeholder_text = "*(generating response...)*"
-    response = generate_response(contents)
-    instance.placeholder_text = "*(thinking...)*"
-    return response
+    try:
+        async for partial in stream_response(contents, QUERY_MODES[query_mode.value]):
+            yield partial
+    finally:
+        instance.placeholder_text = "*(thinking...)*"
 
 chat_interface = pn.chat.ChatInterface(
     callback=chat_callback,
@@ -118,11 +249,14 @@ chat_interface = pn.chat.ChatInterface(
     height=600,
     placeholder_text="*(thinking...)*",
     name="Database Query Chat",
+    # Sending a new question cancels the one still streaming (Panel versions that support it).
+    **({"adaptive": True} if "adaptive" in pn.chat.ChatInterface.param else {}),
     sizing_mode="stretch_width"
 )
 
 layout = pn.Column(
     "# Database Query",
+    pn.Row(pn.pane.Markdown("Answer from:"), query_mode),
     chat_interface,
     sizing_mode="stretch_both"
 )
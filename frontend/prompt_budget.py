@@ -0,0 +1,91 @@
+import math
+import re
+
+try:
+    import tiktoken
+    # Llama 3 uses a tiktoken-style BPE with a larger vocabulary; cl100k_base is a close, slightly pessimistic proxy.
+    _encoding = tiktoken.get_encoding("cl100k_base")
+except Exception:
+    _encoding = None
+
+TOKEN_PATTERN = re.compile(r"[A-Za-z]+|\d{1,3}|[^\sA-Za-z\d]|\s+")
+
+def count_tokens(text):
+    """Count tokens with tiktoken when installed, otherwise estimate them BPE-style.
+
+    The estimate splits words into ~4 character pieces, numbers into groups of
+    three digits and counts punctuation separately; it errs slightly high.
+    """
+    if _encoding is not None:
+        return len(_encoding.encode_ordinary(text))
+    tokens = 0
+    for piece in TOKEN_PATTERN.findall(text):
+        if piece.isspace():
+            tokens += piece.count("\n")
+        elif piece[0].isalpha():
+            tokens += math.ceil(len(piece) / 4)
+        else:
+            tokens += 1
+    return tokens
+
+LINE_BREAKS = re.compile(r"[\t\n\r]")
+
+def column_text(series):
+    """Render one column as strings that are safe on a TSV line; missing values become empty.
+
+    Whitespace is only collapsed in the cells that contain a tab or line break,
+    found with one scan over the joined column, since most columns have none.
+    """
+    text = series.astype(object).where(series.notna(), "").astype(str)
+    joined = "".join(text.tolist())
+    if "\t" in joined or "\n" in joined or "\r" in joined:
+        mask = text.str.contains(LINE_BREAKS)
+        text = text.copy()
+        text[mask] = text[mask].str.replace(r"\s+", " ", regex=True).str.strip()
+    return text
+
+def serialize_rows(df):
+    """Return (header line, list of row lines) in tab-separated form, the header given once.
+
+    Each column is rendered as a whole and the finished columns are joined in a
+    single pass, instead of formatting and appending cell by cell.
+    """
+    header = "\t".join(map(str, df.columns))
+    if df.empty:
+        return header, []
+    columns = [column_text(df.iloc[:, i]).tolist() for i in range(df.shape[1])]
+    return header, ["\t".join(values) for values in zip(*columns)]
+
+def iter_row_lines(df, chunk_rows=10000):
+    """Yield row lines, serializing chunk_rows rows at a time so only one chunk is held as strings."""
+    for start in range(0, len(df), chunk_rows):
+        yield from serialize_rows(df.iloc[start:start + chunk_rows])[1]
+
+def iter_rows_text(df, chunk_rows=10000):
+    """Yield the header line, then one block of TSV text per chunk_rows rows, for writing large tables out."""
+    yield "\t".join(map(str, df.columns)) + "\n"
+    for start in range(0, len(df), chunk_rows):
+        _, lines = serialize_rows(df.iloc[start:start + chunk_rows])
+        yield "\n".join(lines) + "\n"
+
+def render_rows(df):
+    """Render a whole table as TSV text."""
+    return "".join(iter_rows_text(df, chunk_rows=max(len(df), 1)))
+
+def pack_rows(df, budget, chunk_rows=256):
+    """Serialize whole rows, in the order given, until the next one would exceed budget tokens.
+
+    Rows are rendered a chunk at a time, so a long candidate list costs only as
+    much serialization as the budget can hold. Returns (text, rows_shown,
+    rows_dropped, tokens_used).
+    """
+    header = "\t".join(map(str, df.columns))
+    used = count_tokens(header) + 1
+    kept = []
+    for line in iter_row_lines(df, chunk_rows):
+        cost = count_tokens(line) + 1
+        if used + cost > budget:
+            break
+        kept.append(line)
+        used += cost
+    return "\n".join([header, *kept]), len(kept), len(df) - len(kept), used
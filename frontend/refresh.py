@@ -0,0 +1,118 @@
+import sqlite3
+import threading
+import pandas as pd
+import requests
+
+PENDING_CATEGORIES = ("pending",)
+
+# Pending ids sent per request to the list endpoint; its ids filter accepts up to one page.
+API_IDS_PER_REQUEST = 500
+
+class IncrementalLoader:
+    """Fetch only the change requests added or recategorized since the last poll.
+
+    Tracks the highest id seen plus the ids still waiting for a category. Reads
+    the database directly when given db_path, where PRAGMA data_version lets an
+    unchanged database be skipped without querying it, or pages through the
+    FastAPI read endpoint when given api_url, asking for the categories of
+    pending rows API_IDS_PER_REQUEST ids at a time.
+    """
+
+    def __init__(self, last_id, pending_ids, db_path=None, api_url=None):
+        self.last_id = int(last_id or 0)
+        self.pending_ids = set(pending_ids)
+        self.db_path = db_path
+        self.api_url = api_url
+        self._conn = None
+        self._data_version = None
+
+    @staticmethod
+    def pending_in(df):
+        if df.empty or "category" not in df:
+            return set()
+        mask = df["category"].isna() | df["category"].isin(PENDING_CATEGORIES)
+        return set(df.loc[mask, "id"].astype(int))
+
+    def poll(self):
+        """Return (new_rows, updated_rows) DataFrames; both are empty when nothing changed."""
+        if self.api_url:
+            new_rows, updated_rows = self._poll_api()
+        else:
+            new_rows, updated_rows = self._poll_database()
+        if not new_rows.empty:
+            self.last_id = int(new_rows["id"].max())
+            self.pending_ids |= self.pending_in(new_rows)
+        if not updated_rows.empty:
+            self.pending_ids -= set(updated_rows["id"].astype(int))
+        return new_rows, updated_rows
+
+    def _poll_database(self):
+        if self._conn is None:
+            self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        data_version = self._conn.execute("PRAGMA data_version").fetchone()[0]
+        if data_version == self._data_version:
+            return pd.DataFrame(), pd.DataFrame()
+        self._data_version = data_version
+        new_rows = pd.read_sql_query(
+            "SELECT * FROM change_requests WHERE id > ? ORDER BY id", self._conn, params=(self.last_id,)
+        )
+        updated_rows = pd.DataFrame()
+        if self.pending_ids:
+            ids = sorted(self.pending_ids)
+            placeholders = ", ".join("?" for _ in ids)
+            placeholders_pending = ", ".join("?" for _ in PENDING_CATEGORIES)
+            updated_rows = pd.read_sql_query(
+                f"SELECT * FROM change_requests WHERE id IN ({placeholders}) "
+                f"AND category IS NOT NULL AND category NOT IN ({placeholders_pending})",
+                self._conn, params=(*ids, *PENDING_CATEGORIES)
+            )
+        return new_rows, updated_rows
+
+    def _poll_api(self):
+        rows = []
+        params = {"since_id": self.last_id, "limit": 500}
+        while True:
+            response = requests.get(self.api_url, params=params, timeout=30)
+            response.raise_for_status()
+            page = response.json()
+            rows.extend(page["items"])
+            if not page["next_cursor"]:
+                break
+            params["cursor"] = page["next_cursor"]
+        updated = []
+        pending = sorted(self.pending_ids)
+        for start in range(0, len(pending), API_IDS_PER_REQUEST):
+            ids = pending[start:start + API_IDS_PER_REQUEST]
+            response = requests.get(
+                self.api_url,
+                params={"ids": ",".join(map(str, ids)), "fields": "id,category", "limit": API_IDS_PER_REQUEST},
+                timeout=30,
+            )
+            response.raise_for_status()
+            updated.extend(item for item in response.json()["items"]
+                           if item["category"] is not None and item["category"] not in PENDING_CATEGORIES)
+        return pd.DataFrame(rows), pd.DataFrame(updated)
+
+class PeriodicRefresher:
+    """Call refresh every interval seconds on a daemon thread."""
+
+    def __init__(self, refresh, interval):
+        self.refresh = refresh
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread is None and self.interval > 0:
+            self._thread = threading.Thread(target=self._run, name="table-refresher", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.refresh()
+            except Exception as e:
+                print(f"Refresh error: {e}")
@@ -0,0 +1,113 @@
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+def normalize_question(question):
+    """Lowercase, collapse whitespace and drop trailing punctuation so trivial variants share a key."""
+    return " ".join(question.lower().split()).rstrip(" ?!.")
+
+class DataVersion:
+    """Token that moves whenever another connection commits to the database, from PRAGMA data_version.
+
+    The pragma is only comparable on the one connection that read it, so the value
+    is prefixed with a per-instance id and keys built from it never match after a restart.
+    """
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+        self.instance = uuid.uuid4().hex[:8]
+        self._conn = None
+        self._lock = threading.Lock()
+
+    def __call__(self):
+        with self._lock:
+            if self._conn is None:
+                self._conn = sqlite3.connect(f"file:{os.path.abspath(self.db_path)}?mode=ro", uri=True,
+                                             check_same_thread=False)
+            return f"{self.instance}:{self._conn.execute('PRAGMA data_version').fetchone()[0]}"
+
+class ResponseCache:
+    """LRU cache of chat answers keyed on (mode, normalized question, data fingerprint).
+
+    The fingerprint identifies the table contents the answer was computed from;
+    once the data changes, old entries can no longer be hit and age out of the
+    LRU. Size is capped both by entry count and by approximate bytes. With a path,
+    entries are also kept in a SQLite file and reloaded on start.
+    """
+
+    def __init__(self, max_entries=500, max_bytes=5 * 1024 * 1024, path=None):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._conn = None
+        if path:
+            self._conn = sqlite3.connect(path, check_same_thread=False)
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS responses (key TEXT PRIMARY KEY, answer TEXT NOT NULL, last_used REAL NOT NULL)"
+            )
+            rows = self._conn.execute(
+                "SELECT key, answer FROM responses ORDER BY last_used DESC LIMIT ?", (max_entries,)
+            ).fetchall()
+            for key, answer in reversed(rows):
+                self._store(key, answer)
+            self._conn.execute("DELETE FROM responses WHERE key NOT IN (SELECT key FROM responses "
+                               "ORDER BY last_used DESC LIMIT ?)", (max_entries,))
+            self._conn.commit()
+            print(f"Loaded {len(self._entries)} cached responses from {path}")
+
+    @staticmethod
+    def key(mode, question, fingerprint):
+        return f"{mode}\0{fingerprint}\0{normalize_question(question)}"
+
+    @staticmethod
+    def _size(key, answer):
+        return len(key.encode()) + len(answer.encode())
+
+    def _store(self, key, answer):
+        if key in self._entries:
+            self._bytes -= self._size(key, self._entries.pop(key))
+        self._entries[key] = answer
+        self._bytes += self._size(key, answer)
+        evicted = []
+        while self._entries and (len(self._entries) > self.max_entries or self._bytes > self.max_bytes):
+            old_key, old_answer = self._entries.popitem(last=False)
+            self._bytes -= self._size(old_key, old_answer)
+            evicted.append(old_key)
+        return evicted
+
+    def get(self, mode, question, fingerprint):
+        key = self.key(mode, question, fingerprint)
+        with self._lock:
+            answer = self._entries.get(key)
+            if answer is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            if self._conn is not None:
+                self._conn.execute("UPDATE responses SET last_used = ? WHERE key = ?", (time.time(), key))
+                self._conn.commit()
+            return answer
+
+    def put(self, mode, question, fingerprint, answer):
+        key = self.key(mode, question, fingerprint)
+        with self._lock:
+            evicted = self._store(key, answer)
+            if self._conn is not None:
+                self._conn.execute("INSERT OR REPLACE INTO responses (key, answer, last_used) VALUES (?, ?, ?)",
+                                   (key, answer, time.time()))
+                self._conn.executemany("DELETE FROM responses WHERE key = ?", [(k,) for k in evicted])
+                self._conn.commit()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {"entries": len(self._entries), "bytes": self._bytes, "hits": self.hits, "misses": self.misses,
+                    "hit_rate": self.hits / lookups if lookups else 0.0}
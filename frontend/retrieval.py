@@ -0,0 +1,213 @@
+import re
+import sqlite3
+import threading
+import pandas as pd
+
+CATEGORIES = ["hardware issue", "software issue", "personnel issue", "other"]
+
+STOPWORDS = set("""
+a an and any are as at be by can change changes count did do does for from give had has have how i in is it its
+list many me most of on or per please request requests show tell that the their there these this to total was
+were what when which who whose why with all after before between project issue issues category categories
+about mention mentions mentioning contain contains containing related regarding
+""".split())
+
+TEXT_COLUMNS = ["change_name", "description", "reason"]
+
+def match_project(question, project_names):
+    """The longest known project name that directly follows the word "project", case-insensitively.
+
+    project_names maps lowercased names to their stored spelling. Questions such as
+    "Which project has the most requests?" name no project and return None.
+    """
+    for match in re.finditer(r'\bproject\s+', question, re.IGNORECASE):
+        rest = question[match.end():].lower()
+        found = [name for name in project_names
+                 if rest.startswith(name) and not rest[len(name):len(name) + 1].isalnum()]
+        if found:
+            return project_names[max(found, key=len)]
+    return None
+
+def extract_filters(question, project_names=None):
+    """Pull structured filters out of a question, in the style of parse_query.
+
+    A project filter is only set for a name in project_names (see match_project).
+    """
+    filters = {}
+    lowered = question.lower()
+    project_name = match_project(question, project_names or {})
+    if project_name is not None:
+        filters['project_name'] = project_name
+    match = re.search(r'\bby\s+([A-Z][\w\-]+\s+[A-Z][\w\-]+)', question)
+    if match:
+        filters['requested_by'] = match.group(1)
+    match = re.search(r'after\s+(\d{4}-\d{2}-\d{2})', lowered)
+    if match:
+        filters['date_from'] = match.group(1)
+    match = re.search(r'before\s+(\d{4}-\d{2}-\d{2})', lowered)
+    if match:
+        filters['date_to'] = match.group(1)
+    for category in CATEGORIES:
+        if category.split()[0] in lowered and category != "other":
+            filters['category'] = category
+            break
+    return filters
+
+def search_terms(question, filters):
+    """Keywords for the full-text search: question words minus stopwords and filter values."""
+    used = " ".join(str(value) for value in filters.values()).lower()
+    words = re.findall(r"[a-z0-9]+", question.lower())
+    return [word for word in dict.fromkeys(words) if word not in STOPWORDS and word not in used and len(word) > 2]
+
+class RowRetriever:
+    """Select the rows relevant to a question from an in-memory SQLite copy of the table.
+
+    Structured filters become SQL conditions on the copy, and free-text terms are
+    ranked with BM25 over an FTS5 index of change_name, description and reason,
+    so the context sent to the model stays bounded as the table grows.
+    """
+
+    def __init__(self, df):
+        self._lock = threading.RLock()
+        self.conn = sqlite3.connect(":memory:", check_same_thread=False)
+        self.columns = list(df.columns)
+        column_defs = ", ".join(f'"{column}"' for column in self.columns)
+        self.conn.execute(f"CREATE TABLE rows ({column_defs})")
+        indexed = [column for column in TEXT_COLUMNS if column in self.columns]
+        self.conn.execute(
+            f"CREATE VIRTUAL TABLE rows_fts USING fts5({', '.join(indexed)}, content='rows', content_rowid='rowid')"
+        )
+        self.indexed = indexed
+        for column in ("project_name", "requested_by", "category", "date_of_request"):
+            if column in self.columns:
+                self.conn.execute(f'CREATE INDEX "idx_rows_{column}" ON rows ("{column}" COLLATE NOCASE)')
+        if "id" in self.columns:
+            self.conn.execute('CREATE INDEX "idx_rows_id" ON rows (id)')
+        self._project_names = {}
+        self.add_rows(df)
+
+    @staticmethod
+    def _values(df, columns):
+        values = df[columns].astype(object).where(df[columns].notna(), None)
+        return values.map(lambda v: v if v is None or isinstance(v, (int, float, str)) else str(v))
+
+    def add_rows(self, df):
+        """Append rows to the copy and index only the new rows' text."""
+        if df.empty:
+            return
+        df = df.reindex(columns=self.columns)
+        values = self._values(df, self.columns)
+        placeholders = ", ".join("?" for _ in self.columns)
+        with self._lock:
+            start = self.conn.execute("SELECT COALESCE(MAX(rowid), 0) FROM rows").fetchone()[0]
+            self.conn.executemany(f"INSERT INTO rows VALUES ({placeholders})", values.itertuples(index=False, name=None))
+            self.conn.execute(
+                f"INSERT INTO rows_fts (rowid, {', '.join(self.indexed)}) "
+                f"SELECT rowid, {', '.join(self.indexed)} FROM rows WHERE rowid > ?",
+                (start,)
+            )
+            self.conn.commit()
+            if self._project_names is not None and "project_name" in self.columns:
+                for name in df["project_name"].dropna().unique():
+                    self._project_names.setdefault(str(name).lower(), str(name))
+
+    def update_rows(self, df):
+        """Overwrite the columns present in df for rows matched on id, re-indexing their text if it changed."""
+        columns = [column for column in df.columns if column in self.columns and column != "id"]
+        if df.empty or not columns:
+            return
+        reindex = [column for column in columns if column in self.indexed]
+        fts_columns = ", ".join(self.indexed)
+        fts_placeholders = ", ".join("?" for _ in self.indexed)
+        assignments = ", ".join(f'"{column}" = ?' for column in columns)
+        with self._lock:
+            for row_id, *values in self._values(df, ["id", *columns]).itertuples(index=False, name=None):
+                found = self.conn.execute(f"SELECT rowid, {fts_columns} FROM rows WHERE id = ?", (row_id,)).fetchone()
+                if found is None:
+                    continue
+                if reindex:
+                    self.conn.execute(
+                        f"INSERT INTO rows_fts (rows_fts, rowid, {fts_columns}) VALUES ('delete', ?, {fts_placeholders})",
+                        found
+                    )
+                self.conn.execute(f"UPDATE rows SET {assignments} WHERE rowid = ?", (*values, found[0]))
+                if reindex:
+                    self.conn.execute(
+                        f"INSERT INTO rows_fts (rowid, {fts_columns}) SELECT rowid, {fts_columns} FROM rows WHERE rowid = ?",
+                        (found[0],)
+                    )
+            self.conn.commit()
+            if "project_name" in columns:
+                # A renamed project may have left its old name unused; rebuild on next use.
+                self._project_names = None
+
+    def count(self):
+        with self._lock:
+            return self.conn.execute("SELECT COUNT(*) FROM rows").fetchone()[0]
+
+    def project_names(self):
+        """Distinct project names in the copy, keyed by their lowercased form."""
+        with self._lock:
+            if self._project_names is None:
+                self._project_names = {}
+                if "project_name" in self.columns:
+                    for (name,) in self.conn.execute("SELECT DISTINCT project_name FROM rows WHERE project_name IS NOT NULL"):
+                        self._project_names.setdefault(str(name).lower(), str(name))
+            return self._project_names
+
+    def _where(self, filters):
+        conditions, params = [], []
+        for column in ("project_name", "requested_by"):
+            if column in filters and column in self.columns:
+                conditions.append(f'rows."{column}" = ? COLLATE NOCASE')
+                params.append(filters[column])
+        if "category" in filters and "category" in self.columns:
+            # Older rows carry bare labels such as 'hardware', so match on the first word.
+            conditions.append("rows.category LIKE ?")
+            params.append(filters["category"].split()[0] + "%")
+        if "date_from" in filters and "date_of_request" in self.columns:
+            conditions.append("rows.date_of_request >= ?")
+            params.append(filters["date_from"])
+        if "date_to" in filters and "date_of_request" in self.columns:
+            conditions.append("rows.date_of_request <= ?")
+            params.append(filters["date_to"])
+        return conditions, params
+
+    def retrieve(self, question, limit=40):
+        """Return (DataFrame of up to limit ranked rows, info dict with filters, terms and match count)."""
+        with self._lock:
+            return self._retrieve(question, limit)
+
+    def _retrieve(self, question, limit):
+        filters = extract_filters(question, self.project_names())
+        terms = search_terms(question, filters)
+        conditions, params = self._where(filters)
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        matching = self.conn.execute(f"SELECT COUNT(*) FROM rows {where}", params).fetchone()[0]
+        select = ", ".join(f'rows."{column}"' for column in self.columns)
+
+        rowids, records = set(), []
+        if terms:
+            match = " OR ".join(f'"{term}"*' for term in terms)
+            ranked = self.conn.execute(
+                f"SELECT rows.rowid, {select} FROM rows_fts JOIN rows ON rows.rowid = rows_fts.rowid "
+                f"WHERE rows_fts MATCH ? {'AND ' + ' AND '.join(conditions) if conditions else ''} "
+                f"ORDER BY bm25(rows_fts) LIMIT ?",
+                (match, *params, limit)
+            ).fetchall()
+            for row in ranked:
+                rowids.add(row[0])
+                records.append(row[1:])
+        if len(records) < limit:
+            # Fill the rest of the budget with the most recent rows that match the filters.
+            recent = self.conn.execute(
+                f"SELECT rows.rowid, {select} FROM rows {where} ORDER BY rows.rowid DESC LIMIT ?",
+                (*params, limit)
+            ).fetchall()
+            for row in recent:
+                if len(records) >= limit:
+                    break
+                if row[0] not in rowids:
+                    records.append(row[1:])
+        info = {"filters": filters, "terms": terms, "matching": matching, "returned": len(records)}
+        return pd.DataFrame(records, columns=self.columns), info
@@ -0,0 +1,154 @@
+import os
+import re
+import sqlite3
+import time
+
+TABLES = ("change_requests", "cost_items")
+
+# replace() is also a string function, so only the REPLACE INTO statement is matched.
+FORBIDDEN = re.compile(
+    r"\b(insert|update|delete|replace\s+into|drop|alter|create|attach|detach|pragma|vacuum|reindex|analyze|"
+    r"begin|commit|rollback|savepoint|release|load_extension)\b",
+    re.IGNORECASE,
+)
+
+# sqlite3 authorizer actions a plain read query needs; everything else is denied.
+ALLOWED_ACTIONS = {sqlite3.SQLITE_SELECT, sqlite3.SQLITE_READ, sqlite3.SQLITE_FUNCTION}
+if hasattr(sqlite3, "SQLITE_RECURSIVE"):
+    ALLOWED_ACTIONS.add(sqlite3.SQLITE_RECURSIVE)
+
+def authorize(action, arg1, arg2, db_name, trigger_or_view):
+    """sqlite3 authorizer: allow ALLOWED_ACTIONS, and reads only of columns of TABLES.
+
+    For SQLITE_READ arg1 is the table and db_name its schema; a CTE is read with no schema.
+    This keeps sqlite_master, category_cache, views and any other table out of reach.
+    """
+    if action not in ALLOWED_ACTIONS:
+        return sqlite3.SQLITE_DENY
+    if action == sqlite3.SQLITE_READ and db_name is not None and arg1 not in TABLES:
+        return sqlite3.SQLITE_DENY
+    return sqlite3.SQLITE_OK
+
+SQL_PROMPT = """You write SQLite queries. Given the schema below, write ONE read-only SELECT statement that answers the question.
+Rules:
+- Use only the tables and columns in the schema.
+- Prefer aggregates (COUNT, SUM, GROUP BY) over returning many rows.
+- Text comparisons should be case-insensitive (use LOWER() or LIKE).
+- Return only the SQL, with no explanation.
+
+Schema:
+{schema}
+
+Question: {question}
+SQL:"""
+
+SUMMARY_PROMPT = """You are a precise database assistant. Answer the question using only the query result below.
+If the result was truncated, say the answer covers the first rows only.
+
+Question: {question}
+SQL: {sql}
+Result ({row_count} rows{truncated}):
+{result}
+
+Answer:"""
+
+class UnsafeQueryError(ValueError):
+    pass
+
+def read_schema(db_path):
+    """Return the CREATE statements of the queryable tables from a read-only connection."""
+    conn = connect_readonly(db_path)
+    try:
+        placeholders = ", ".join("?" for _ in TABLES)
+        rows = conn.execute(
+            f"SELECT sql FROM sqlite_master WHERE type = 'table' AND name IN ({placeholders})", TABLES
+        ).fetchall()
+    finally:
+        conn.close()
+    return "\n".join(re.sub(r"\s+", " ", sql) + ";" for (sql,) in rows)
+
+def connect_readonly(db_path):
+    return sqlite3.connect(f"file:{os.path.abspath(db_path)}?mode=ro", uri=True, check_same_thread=False)
+
+def extract_sql(text):
+    """Pull a single statement out of a model answer, dropping code fences and anything after it.
+
+    The statement ends at the first ';' that sqlite3.complete_statement accepts, so a ';'
+    inside a string literal or comment does not cut it short.
+    """
+    text = re.sub(r"```(?:sql)?", "", text, flags=re.IGNORECASE).strip()
+    match = re.search(r"\b(select|with)\b", text, re.IGNORECASE)
+    if match:
+        text = text[match.start():]
+    for end in (i + 1 for i, char in enumerate(text) if char == ";"):
+        if sqlite3.complete_statement(text[:end]):
+            return text[:end - 1].strip()
+    return text.strip()
+
+def validate_sql(sql):
+    """Allow only a single SELECT/WITH statement without write or schema keywords."""
+    stripped = re.sub(r"'(?:[^']|'')*'", "''", sql)  # string literals may mention any word
+    if not re.match(r"^\s*(select|with)\b", stripped, re.IGNORECASE):
+        raise UnsafeQueryError("Only SELECT queries are allowed")
+    if ";" in stripped.rstrip().rstrip(";"):
+        raise UnsafeQueryError("Only one statement is allowed")
+    match = FORBIDDEN.search(stripped)
+    if match:
+        raise UnsafeQueryError(f"Keyword not allowed: {match.group(0)}")
+    return sql
+
+def run_readonly_query(db_path, sql, max_rows=200, timeout=2.0):
+    """Run a validated query on a read-only connection with an authorizer, a row cap and a time limit.
+
+    Returns (columns, rows, truncated).
+    """
+    validate_sql(sql)
+    conn = connect_readonly(db_path)
+    try:
+        conn.set_authorizer(authorize)
+        deadline = time.monotonic() + timeout
+        conn.set_progress_handler(lambda: 1 if time.monotonic() > deadline else 0, 10000)
+        try:
+            cursor = conn.execute(sql)
+            rows = cursor.fetchmany(max_rows + 1)
+        except sqlite3.OperationalError as e:
+            if "interrupted" in str(e):
+                raise TimeoutError(f"Query exceeded {timeout:.1f}s")
+            raise
+        columns = [column[0] for column in cursor.description or []]
+    finally:
+        conn.close()
+    return columns, rows[:max_rows], len(rows) > max_rows
+
+def format_result(columns, rows):
+    lines = [" | ".join(columns)]
+    lines.extend(" | ".join("" if value is None else str(value) for value in row) for row in rows)
+    return "\n".join(lines)
+
+def answer_with_sql(question, complete, db_path, max_rows=200, timeout=2.0):
+    """Answer a question by having the model write SQL, running it in the sandbox and summarizing the result.
+
+    complete(prompt, max_tokens, stop) returns the model's text. A failing query
+    is sent back to the model once with the error so it can correct itself.
+    """
+    schema = read_schema(db_path)
+    prompt = SQL_PROMPT.format(schema=schema, question=question)
+    sql, error = None, None
+    for attempt in range(2):
+        if error:
+            prompt += f" {sql}\nThat query failed with: {error}\nCorrected SQL:"
+        sql = extract_sql(complete(prompt, max_tokens=200, stop=["\n\n\n"]))
+        try:
+            columns, rows, truncated = run_readonly_query(db_path, sql, max_rows, timeout)
+            break
+        except (UnsafeQueryError, TimeoutError, sqlite3.Error) as e:
+            error = str(e)
+            print(f"SQL attempt {attempt + 1} failed: {error}\nSQL: {sql}")
+    else:
+        return f"Sorry, I couldn't build a working query for that question ({error})."
+    print(f"SQL: {sql}\nReturned {len(rows)} rows{' (truncated)' if truncated else ''}")
+    summary_prompt = SUMMARY_PROMPT.format(
+        question=question, sql=sql, row_count=len(rows),
+        truncated=", truncated" if truncated else "", result=format_result(columns, rows),
+    )
+    return complete(summary_prompt, max_tokens=300, stop=["\n\n\n"])
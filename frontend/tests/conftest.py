@@ -0,0 +1,5 @@
+import os
+import sys
+
+# The frontend modules import each other as top-level modules, as under panel serve main.py.
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
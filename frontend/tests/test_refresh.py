@@ -0,0 +1,51 @@
+"""Tests for the incremental loader's API polling, with the HTTP calls answered in-process.
+
+    python -m pytest tests/test_refresh.py
+"""
+import unittest
+from unittest.mock import patch
+from refresh import API_IDS_PER_REQUEST, IncrementalLoader
+
+class FakeResponse:
+    def __init__(self, body):
+        self.body = body
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return self.body
+
+class PollApiTests(unittest.TestCase):
+    def setUp(self):
+        self.calls = []
+
+    def fake_get(self, url, params=None, timeout=None):
+        self.calls.append((url, dict(params)))
+        if "ids" in params:
+            ids = [int(i) for i in params["ids"].split(",")]
+            return FakeResponse({"items": [{"id": i, "category": "pending" if i % 2 else "other"} for i in ids],
+                                 "next_cursor": None})
+        return FakeResponse({"items": [{"id": 2001, "category": "pending"}], "next_cursor": None})
+
+    def test_pending_categories_are_fetched_in_batches(self):
+        loader = IncrementalLoader(2000, range(1, 1201), api_url="http://api/change_requests")
+        with patch("refresh.requests.get", self.fake_get):
+            new_rows, updated_rows = loader.poll()
+        id_calls = [params for url, params in self.calls if "ids" in params]
+        self.assertEqual(len(id_calls), -(-1200 // API_IDS_PER_REQUEST))
+        self.assertTrue(all(url == "http://api/change_requests" for url, _ in self.calls))
+        self.assertEqual(list(new_rows["id"]), [2001])
+        self.assertEqual(len(updated_rows), 600)
+        self.assertTrue((updated_rows["category"] == "other").all())
+        self.assertEqual(len(loader.pending_ids), 601)
+        self.assertIn(2001, loader.pending_ids)
+
+    def test_no_pending_rows_means_one_request(self):
+        loader = IncrementalLoader(2000, [], api_url="http://api/change_requests")
+        with patch("refresh.requests.get", self.fake_get):
+            loader.poll()
+        self.assertEqual(len(self.calls), 1)
+
+if __name__ == "__main__":
+    unittest.main()
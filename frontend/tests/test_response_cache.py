@@ -0,0 +1,73 @@
+"""Tests for the chat response cache and the database version used to key SQL-mode answers.
+
+    python -m pytest tests/test_response_cache.py
+"""
+import os
+import sqlite3
+import tempfile
+import unittest
+from response_cache import DataVersion, ResponseCache
+
+class ResponseCacheTests(unittest.TestCase):
+    def test_trivial_variants_of_a_question_share_an_entry(self):
+        cache = ResponseCache()
+        cache.put("rows", "How many CRs?", "f1", "12")
+        self.assertEqual(cache.get("rows", "  how many   crs ", "f1"), "12")
+        self.assertIsNone(cache.get("sql", "How many CRs?", "f1"))
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+
+    def test_new_fingerprint_misses(self):
+        cache = ResponseCache()
+        cache.put("rows", "How many CRs?", "f1", "12")
+        self.assertIsNone(cache.get("rows", "How many CRs?", "f2"))
+
+    def test_least_recently_used_entries_are_evicted(self):
+        cache = ResponseCache(max_entries=2)
+        cache.put("rows", "a", "f", "1")
+        cache.put("rows", "b", "f", "2")
+        cache.get("rows", "a", "f")
+        cache.put("rows", "c", "f", "3")
+        self.assertIsNone(cache.get("rows", "b", "f"))
+        self.assertEqual(cache.get("rows", "a", "f"), "1")
+
+    def test_size_is_capped_in_bytes(self):
+        cache = ResponseCache(max_bytes=100)
+        cache.put("rows", "a", "f", "x" * 60)
+        cache.put("rows", "b", "f", "y" * 60)
+        self.assertIsNone(cache.get("rows", "a", "f"))
+        self.assertLessEqual(cache.stats()["bytes"], 100)
+
+    def test_entries_persist_across_instances(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "responses.db")
+            ResponseCache(path=path).put("rows", "a", "f", "1")
+            self.assertEqual(ResponseCache(path=path).get("rows", "a", "f"), "1")
+
+class DataVersionTests(unittest.TestCase):
+    def setUp(self):
+        handle, self.db_path = tempfile.mkstemp(suffix=".db")
+        os.close(handle)
+        with sqlite3.connect(self.db_path) as conn:
+            conn.execute("CREATE TABLE change_requests (id INTEGER PRIMARY KEY)")
+
+    def tearDown(self):
+        os.remove(self.db_path)
+
+    def test_version_moves_only_when_the_database_is_written(self):
+        version = DataVersion(self.db_path)
+        before = version()
+        self.assertEqual(version(), before)
+        with sqlite3.connect(self.db_path) as conn:
+            conn.execute("INSERT INTO change_requests DEFAULT VALUES")
+        self.assertNotEqual(version(), before)
+
+    def test_sql_answer_is_not_served_after_a_write(self):
+        cache, version = ResponseCache(), DataVersion(self.db_path)
+        cache.put("sql", "How many CRs?", f"f:{version()}", "0")
+        self.assertEqual(cache.get("sql", "How many CRs?", f"f:{version()}"), "0")
+        with sqlite3.connect(self.db_path) as conn:
+            conn.execute("INSERT INTO change_requests DEFAULT VALUES")
+        self.assertIsNone(cache.get("sql", "How many CRs?", f"f:{version()}"))
+
+    def test_versions_from_separate_instances_never_match(self):
+        self.assertNotEqual(DataVersion(self.db_path)(), DataVersion(self.db_path)())
@@ -0,0 +1,61 @@
+"""Tests for question filters and row retrieval over an in-memory copy of the table.
+
+    python -m pytest tests/test_retrieval.py
+"""
+import unittest
+import pandas as pd
+from retrieval import RowRetriever, extract_filters
+
+ROWS = pd.DataFrame([
+    {"id": 1, "project_name": "Alpha", "requested_by": "Alice Smith", "date_of_request": "2024-01-02",
+     "change_name": "Disk swap", "description": "The backup disk needs to be replaced", "reason": "Failing",
+     "category": "hardware issue"},
+    {"id": 2, "project_name": "Smith, Jones and Brown", "requested_by": "Bob Jones", "date_of_request": "2024-02-03",
+     "change_name": "Patch", "description": "The billing app needs a security patch", "reason": "Audit",
+     "category": "software issue"},
+    {"id": 3, "project_name": "Beta", "requested_by": "Alice Smith", "date_of_request": "2024-03-04",
+     "change_name": "Hiring", "description": "The QA team requires a new hire", "reason": "Release",
+     "category": "personnel issue"},
+])
+
+class ExtractFiltersTests(unittest.TestCase):
+    projects = {"alpha": "Alpha", "beta": "Beta", "smith, jones and brown": "Smith, Jones and Brown"}
+
+    def test_questions_about_projects_in_general_have_no_project_filter(self):
+        for question in ["Which project has the most change requests?", "Summarize the project status",
+                         "What is the project with the highest cost?"]:
+            self.assertNotIn("project_name", extract_filters(question, self.projects), question)
+
+    def test_known_project_matches_case_insensitively(self):
+        self.assertEqual(extract_filters("How many requests for project alpha?", self.projects)["project_name"], "Alpha")
+
+    def test_multi_word_project_name(self):
+        filters = extract_filters("Show project Smith, Jones and Brown requests", self.projects)
+        self.assertEqual(filters["project_name"], "Smith, Jones and Brown")
+
+    def test_no_known_projects_means_no_project_filter(self):
+        self.assertNotIn("project_name", extract_filters("Show project alpha"))
+
+class RowRetrieverTests(unittest.TestCase):
+    def setUp(self):
+        self.retriever = RowRetriever(ROWS)
+
+    def test_aggregate_question_sees_every_row(self):
+        for question in ["Which project has the most change requests?", "Summarize the project status"]:
+            _, info = self.retriever.retrieve(question)
+            self.assertEqual(info["matching"], len(ROWS), question)
+
+    def test_project_question_is_filtered(self):
+        df, info = self.retriever.retrieve("What changed in project BETA?")
+        self.assertEqual(info["filters"]["project_name"], "Beta")
+        self.assertEqual(list(df["id"]), [3])
+
+    def test_new_and_renamed_projects_are_recognised(self):
+        self.retriever.add_rows(pd.DataFrame([{**ROWS.iloc[0].to_dict(), "id": 4, "project_name": "Gamma"}]))
+        self.assertEqual(self.retriever.retrieve("project gamma")[1]["matching"], 1)
+        self.retriever.update_rows(pd.DataFrame([{"id": 3, "project_name": "Delta"}]))
+        self.assertNotIn("project_name", self.retriever.retrieve("project beta")[1]["filters"])
+        self.assertEqual(self.retriever.retrieve("project delta")[1]["matching"], 1)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,74 @@
+"""Tests for the SQL-mode sandbox: the authorizer, the time limit and statement extraction.
+
+    python -m pytest tests/test_sql_mode.py
+"""
+import os
+import sqlite3
+import tempfile
+import unittest
+from unittest.mock import patch
+from sql_mode import UnsafeQueryError, extract_sql, run_readonly_query
+
+class SandboxTests(unittest.TestCase):
+    def setUp(self):
+        handle, self.db_path = tempfile.mkstemp(suffix=".db")
+        os.close(handle)
+        conn = sqlite3.connect(self.db_path)
+        conn.executescript("""
+            CREATE TABLE change_requests (id INTEGER PRIMARY KEY, project_name TEXT, category TEXT);
+            CREATE TABLE cost_items (id INTEGER PRIMARY KEY, change_request_id INTEGER, dollars_increase REAL);
+            CREATE TABLE category_cache (key TEXT PRIMARY KEY, category TEXT);
+            CREATE VIEW cache_view AS SELECT key FROM category_cache;
+            INSERT INTO change_requests VALUES (1, 'Apollo', 'hardware issue'), (2, 'Zephyr', 'other');
+            INSERT INTO cost_items VALUES (1, 1, 10.0), (2, 1, 5.5);
+            INSERT INTO category_cache VALUES ('secret', 'other');
+        """)
+        conn.commit()
+        conn.close()
+
+    def tearDown(self):
+        os.remove(self.db_path)
+
+    def test_reads_of_the_queryable_tables_are_allowed(self):
+        columns, rows, truncated = run_readonly_query(self.db_path, """
+            SELECT c.project_name, SUM(i.dollars_increase) FROM change_requests c
+            JOIN cost_items i ON i.change_request_id = c.id GROUP BY c.id""")
+        self.assertEqual(rows, [("Apollo", 15.5)])
+        self.assertFalse(truncated)
+
+    def test_ctes_subqueries_and_replace_function_are_allowed(self):
+        _, rows, _ = run_readonly_query(self.db_path, """
+            WITH named AS (SELECT REPLACE(project_name, 'o', '0') AS name FROM change_requests)
+            SELECT name FROM named WHERE name IN (SELECT REPLACE(project_name, 'o', '0') FROM change_requests)
+            ORDER BY name""")
+        self.assertEqual(rows, [("Ap0ll0",), ("Zephyr",)])
+
+    def test_reading_other_tables_is_denied(self):
+        for sql in ("SELECT key FROM category_cache", "SELECT sql FROM sqlite_master",
+                    "SELECT key FROM cache_view",
+                    "SELECT id FROM change_requests WHERE id IN (SELECT rowid FROM category_cache)"):
+            with self.subTest(sql=sql), self.assertRaisesRegex(sqlite3.DatabaseError, "prohibited"):
+                run_readonly_query(self.db_path, sql)
+
+    def test_writes_are_denied_by_the_authorizer(self):
+        # Past validate_sql, the authorizer still refuses the write.
+        with patch("sql_mode.validate_sql", lambda sql: sql), self.assertRaisesRegex(sqlite3.DatabaseError, "not authorized"):
+            run_readonly_query(self.db_path, "INSERT INTO change_requests (project_name) VALUES ('x')")
+        with self.assertRaises(UnsafeQueryError):
+            run_readonly_query(self.db_path, "REPLACE INTO change_requests (id) VALUES (1)")
+
+    def test_runaway_recursive_query_times_out(self):
+        sql = "WITH RECURSIVE n(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM n) SELECT count(*) FROM n"
+        with self.assertRaises(TimeoutError):
+            run_readonly_query(self.db_path, sql, timeout=0.2)
+
+class ExtractSqlTests(unittest.TestCase):
+    def test_semicolon_inside_a_string_does_not_end_the_statement(self):
+        self.assertEqual(extract_sql("SELECT 'x;y' FROM t;"), "SELECT 'x;y' FROM t")
+
+    def test_fences_and_trailing_text_are_dropped(self):
+        text = "Here you go:\n```sql\nSELECT a FROM t; -- all rows\n```\nThis lists a."
+        self.assertEqual(extract_sql(text), "SELECT a FROM t")
+
+    def test_statement_without_semicolon_is_kept_whole(self):
+        self.assertEqual(extract_sql("WITH c AS (SELECT 1) SELECT * FROM c"), "WITH c AS (SELECT 1) SELECT * FROM c")
@@ -0,0 +1,124 @@
+"""Run every benchmark and save one machine-readable record of the results.
+
+Each suite runs in its own process from its own directory, as the services
+do. Results are written with the commit, Python version and parameters, so
+runs can be compared over time:
+
+    python run_benchmarks.py --quick
+    python run_benchmarks.py --compare benchmark_results/<earlier run>.json
+
+With --compare, any benchmark whose p50 (or best time, for suites that report
+one) grew by more than --threshold times is listed and the exit status is 1.
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+from datetime import datetime, timezone
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+DJANGO_DIR = os.path.join(ROOT, "change-request-system-kev-devmethod-frontend-crp-ui", "backend", "change_request_system")
+
+def suites(quick):
+    sizes = ["1000", "10000"] if quick else ["1000", "10000", "100000"]
+    rows = "2000" if quick else "20000"
+    return {
+        "fastapi": (os.path.join(ROOT, "backend", "api"),
+                    ["benchmark_api.py", "--json", "--rows", rows, "--posts", "200" if quick else "1000"], {}),
+        "serialization": (os.path.join(ROOT, "frontend"),
+                          ["benchmark_serialization.py", "--json", "--sizes", *sizes], {}),
+        "frontend": (os.path.join(ROOT, "frontend"),
+                     ["benchmark_frontend.py", "--json", "--sizes", *sizes], {}),
+        "django": (DJANGO_DIR,
+                   ["manage.py", "test", "change_requests.tests.ChangeRequestViewSetBenchmark"],
+                   {"RUN_BENCHMARKS": "1", "BENCHMARK_ROWS": "500" if quick else "5000"}),
+    }
+
+def run_suite(name, cwd, args, env):
+    print(f"Running {name} benchmarks...", file=sys.stderr)
+    env = {**os.environ, **env}
+    output = None
+    if name == "django":
+        output = tempfile.NamedTemporaryFile(suffix=".json", delete=False).name
+        env["BENCHMARK_OUTPUT"] = output
+    completed = subprocess.run([sys.executable, *args], cwd=cwd, env=env, capture_output=True, text=True)
+    if completed.returncode != 0:
+        return {"error": completed.stderr[-2000:]}
+    if output:
+        with open(output) as f:
+            results = json.load(f)
+        os.unlink(output)
+        return results
+    return json.loads(completed.stdout)
+
+def result_key(suite, result):
+    return (suite, result["name"], result.get("rows"), result.get("plot_type"))
+
+def headline_ms(result):
+    return result.get("p50_ms", result.get("best_ms"))
+
+def compare(current, previous, threshold):
+    """Return (key, old ms, new ms) for benchmarks whose p50 or best time grew more than threshold times."""
+    old = {result_key(suite, result): result
+           for suite, results in previous["suites"].items() if isinstance(results, list) for result in results}
+    regressions = []
+    for suite, results in current["suites"].items():
+        if not isinstance(results, list):
+            continue
+        for result in results:
+            before = old.get(result_key(suite, result))
+            if before and headline_ms(before) and headline_ms(result) and headline_ms(result) > headline_ms(before) * threshold:
+                regressions.append((result_key(suite, result), headline_ms(before), headline_ms(result)))
+    return regressions
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], cwd=ROOT, capture_output=True, text=True).stdout.strip()
+    except OSError:
+        return None
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run all benchmarks and record the results.")
+    parser.add_argument("--quick", action="store_true", help="smaller tables, for a fast check")
+    parser.add_argument("--only", nargs="+", help="suites to run (fastapi, serialization, frontend, django)")
+    parser.add_argument("--output", help="results file (default: benchmark_results/<timestamp>.json)")
+    parser.add_argument("--compare", help="earlier results file to check for regressions")
+    parser.add_argument("--threshold", type=float, default=1.25, help="p50 ratio counted as a regression")
+    args = parser.parse_args()
+
+    started = datetime.now(timezone.utc)
+    record = {
+        "timestamp": started.isoformat(),
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "quick": args.quick,
+        "suites": {},
+    }
+    for name, (cwd, suite_args, env) in suites(args.quick).items():
+        if args.only and name not in args.only:
+            continue
+        record["suites"][name] = run_suite(name, cwd, suite_args, env)
+
+    output = args.output or os.path.join(ROOT, "benchmark_results", started.strftime("%Y%m%dT%H%M%SZ") + ".json")
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(record, f, indent=2)
+    print(f"Wrote {output}")
+    failed = [name for name, results in record["suites"].items() if isinstance(results, dict)]
+    for name in failed:
+        print(f"Suite {name} failed:\n{record['suites'][name]['error']}")
+
+    regressions = []
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(record, json.load(f), args.threshold)
+        for key, before, after in regressions:
+            print(f"Regression in {' / '.join(str(part) for part in key if part is not None)}: "
+                  f"{before:.3f} ms -> {after:.3f} ms")
+        if not regressions:
+            print(f"No regressions over {args.threshold:.2f}x against {args.compare}")
+    sys.exit(1 if failed or regressions else 0)